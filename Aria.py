@@ -12,6 +12,8 @@ from Managers import ConfigManager
 from Managers import DocumentManager
 from Managers import CommandManager
 from Managers import ContextManager
+from Managers import ProcessManager
+from Managers import SchedulerManager
 from tracking_tools.TrackingManager import TrackingManager
 
 # Set up commandline argument parsing
@@ -19,27 +21,40 @@ arg_parser = argparse.ArgumentParser(description="A virtual assistant.")
 arg_parser.add_argument("--cmd", type = str, help = "A command to be run when Aria starts.")
 arg_parser.add_argument("--close", action = "store_true", help = "Whether Aria should close after running a command provided via --cmd.")
 arg_parser.add_argument("--debug", action="store_true", help = "Enable debug features.")
-args = arg_parser.parse_args()
+arg_parser.add_argument("--daemon", action = "store_true", help = "Run background jobs, such as uptime monitoring, without reading commands.")
+arg_parser.add_argument("--record-trace", type = str, help = "Record context changes to this file, for replaying with benchmarks/context_bench.py.")
 
-# Set up subsystem managers
-managers = {}
 
-ConfigManager = ConfigManager(debug = args.debug)
-config = ConfigManager.get_config()
-managers["config"] = ConfigManager
+def init_managers(args):
+    """
+    Sets up all subsystem managers.
+
+    Parameters:
+        args : argparse.Namespace - Parsed commandline arguments.
+
+    Returns:
+        dict - References to all manager objects, keyed by subsystem.
+    """
+    managers = {}
 
-TrackingManager = TrackingManager(managers["config"].get("aria_path")+"/data/")
-managers["tracking"] = TrackingManager
+    config_manager = ConfigManager(debug = args.debug)
+    config_manager.get_config()
+    managers["config"] = config_manager
 
-DocumentManager = DocumentManager(managers, debug = args.debug)
-managers["docs"] = DocumentManager
+    managers["tracking"] = TrackingManager(managers["config"].get("aria_path")+"/data/")
+    managers["docs"] = DocumentManager(managers, debug = args.debug)
 
-CommandManager = CommandManager(managers, debug = args.debug)
-commands = CommandManager.get_all_commands()
-managers["command"] = CommandManager
+    command_manager = CommandManager(managers, debug = args.debug)
+    command_manager.get_all_commands()
+    managers["command"] = command_manager
+    config_manager.add_listener(command_manager.apply_config)
 
-ContextManager = ContextManager(managers, debug = args.debug)
-managers["context"] = ContextManager
+    managers["processes"] = ProcessManager(debug = args.debug)
+    managers["scheduler"] = SchedulerManager(debug = args.debug)
+    managers["context"] = ContextManager(managers, debug = args.debug)
+    if args.record_trace is not None:
+        managers["context"].record_trace(args.record_trace)
+    return managers
 
 
 def parse_input(str_in, managers):
@@ -76,39 +91,39 @@ def parse_input(str_in, managers):
         cmd_name = managers["command"].get_command_name(str_in[5:].lower())
         managers["command"].cmd_method(cmd_name, "help")
     else:
-        # Run invocation checkers for each command plugin
-        for (cmd, invocation_checker) in managers["command"].invocations.items():
-            if invocation_checker(str_in):
-                cmd_name = cmd
-
-        # If no invocation method has been found, try finding a matching command filename
-        if cmd_name == "" or cmd_name is None:
-            first_word = str_in.split(" ")[0]
-            cmd_name = managers["command"].get_command_name(first_word.lower())
+        # Run invocation checkers for each command plugin, then try finding a matching command filename
+        cmd_name = managers["command"].resolve_command(str_in)
 
         # If no matching filename is found, see if any plugin wants to handle the input
         handler = None
         max_handler_score = 0
         if cmd_name == "" or cmd_name is None:
-            for (cmd, handler_checker) in managers["command"].handler_checkers.items():
+            managers["context"].browser.begin_input()
+            # Config reloads can load and unload plugins on another thread, so check against a copy
+            with managers["command"].lock:
+                handler_checkers = list(managers["command"].handler_checkers.items())
+                handlers = dict(managers["command"].handlers)
+            for (cmd, handler_checker) in handler_checkers:
                 handler_score = handler_checker(str_in, managers)
                 if handler_score > max_handler_score:
                     max_handler_score = handler_score
-                    handler = managers["command"].handlers[cmd]
+                    handler = handlers[cmd]
         
         if handler != None:
             # If a plugin has a handler for this input, run the handler
             handler(str_in, managers, max_handler_score)
         else:
+            with managers["command"].lock:
+                plugin = managers["command"].plugins.get(cmd_name)
+
             # If there is still no command found, and the input has not been handled, report reason why
-            if cmd_name == "" or cmd_name is None or cmd_name not in managers["command"].plugins.keys():
+            if cmd_name == "" or cmd_name is None or plugin is None:
                 print("Command not found.")
             elif cmd_name in managers["config"].get("plugins").keys() and managers["config"].get("plugins")[cmd_name]["enabled"] == False:
                 print("Command not found (the parent plugin has been disabled).")
 
             # Otherwise, we found a command -- run it!
             else:
-                plugin = managers["command"].plugins[cmd_name]
                 data = plugin.execute(str_in, managers)
 
                 if (type(data) is str and data.startswith("run ")):
@@ -123,7 +138,9 @@ def aria_loop():
         if str_in == "context":
             print("-"*25, "\n", "Current Context: ", managers["context"].current_context, "\n\n")
             print("Context History: ", managers["context"].current_context, "\n", "-"*25, "\n\n")
+            print("Scheduling: ", managers["context"].stats(), "\n", "-"*25, "\n\n")
         else:
+            managers["context"].note_input()
             run_inputs(str_in, managers)
 
         managers["context"].previous_input = str_in
@@ -152,11 +169,25 @@ def run_inputs(str_in, managers):
         parse_input(current_str, managers)
 
 
+def start_background_jobs(managers):
+    """Starts the scheduler and lets each plugin with a schedule method register its background jobs."""
+    managers["scheduler"].start()
+    scheduled = []
+    with managers["command"].lock:
+        plugins = list(managers["command"].plugins.items())
+    for cmd_name, plugin in plugins:
+        # Aliases share their plugin object, so each plugin is scheduled once
+        if plugin not in scheduled and callable(getattr(plugin, "schedule", None)):
+            scheduled.append(plugin)
+            managers["command"].cmd_method(cmd_name, "schedule")
+
+
 def context_loop():
-    """Updates the context tracker once a second."""
+    """Updates the context tracker whenever the context changes, and at least once per (adaptive) checkpoint interval until idle."""
+    managers["context"].start()
     while looping:
-        ContextManager.update_context()
-        time.sleep(1)
+        managers["context"].wait_for_change(timeout = managers["context"].next_timeout())
+        managers["context"].update_context()
 
 lock = threading.Lock()  # A lock for the shared resource
 context_thread = threading.Thread(target=context_loop, name="Context", daemon=True)
@@ -165,20 +196,34 @@ aria_thread = threading.Thread(target=aria_loop, name="Aria", daemon=True)
 
 looping = True
 if __name__ == '__main__':
+    # Setup only runs here so that worker processes (which re-import this module) stay lightweight
+    args = arg_parser.parse_args()
+    managers = init_managers(args)
+
     if args.cmd is not None:
         # Run a command supplied via commandline args
-        refs = [ContextManager, TrackingManager]
-        run_inputs(args.cmd, refs)
+        run_inputs(args.cmd, managers)
 
         if args.close:
             # Close after command execution
             exit()
+    elif args.daemon:
+        # Run background jobs only
+        managers["config"].start_watching()
+        start_background_jobs(managers)
+
+        while looping:
+            time.sleep(1)
     else:
         # Run Aria in interactive mode
         print("Hello,", managers["config"].get("user_name") + "!")
 
+        managers["processes"].start()
+        managers["config"].start_watching()
+        start_background_jobs(managers)
         context_thread.start()
         aria_thread.start()
 
+        # Some context sources receive their events on the main thread
         while looping:
-            time.sleep(1)
+            managers["context"].run_main_thread(1)
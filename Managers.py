@@ -8,6 +8,8 @@ Typical usage example:
     DocumentManager = DocumentManager()
     TrackingManager = TrackingManager()
     CommandManager = CommandManager()
+    ProcessManager = ProcessManager()
+    SchedulerManager = SchedulerManager()
     ContextManager = ContextManager()
 
     managers = {
@@ -15,6 +17,8 @@ Typical usage example:
         "docs": DocumentManager,
         "tracking": TrackingManager,
         "command": CommandManager,
+        "processes": ProcessManager,
+        "scheduler": SchedulerManager,
         "context": ContextManager
     }
 
@@ -22,14 +26,31 @@ Typical usage example:
 """
 
 import subprocess
-import applescript
 import importlib
-import json
+import threading
+import inspect
 import os
+import queue
 import re
-import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from cmds import *
+from config_tools.ConfigStore import ConfigStore, set_path
+from config_tools.ConfigWatcher import ConfigWatcher
+from context_tools.AppSets import AppSetInterner
+from context_tools.BrowserState import BrowserStateProvider, default_browser_backend
+from context_tools.ContextSources import default_context_source
+from context_tools.Neighbors import NeighborIndex
+from context_tools.Processes import ProcessController, ProcessTable
+from context_tools.Scheduling import AdaptiveInterval, JobScheduler, TickCounter
+from context_tools.Scripts import ScriptCache, default_script_backend
+from context_tools.Traces import TraceRecorder
+from context_tools.Transitions import TransitionModel
+from tracking_tools.Views import IntervalView
+
+# Marks an omitted default, so that None can be passed as a default
+_MISSING = object()
 
 class Manager:
     """
@@ -56,6 +77,14 @@ class ConfigManager(Manager):
         self.cfg_version = "0.0.1"
         self.config = {}
 
+        # Held while the config is changed or swapped, and by the store while it writes the config out
+        self.lock = threading.RLock()
+
+        # Changes are journaled immediately and written to aria_config.json in batches
+        self.store = ConfigStore(self.cfg_file_name, lambda: self.config, lock = self.lock)
+        self.watcher = None
+        self.listeners = []
+
     def create_global_config(self, initial_config):
         """
         Creates aria_config.json, overwriting if it already exists in the same location. Updates config dictionary to supplied initial config.
@@ -63,10 +92,8 @@ class ConfigManager(Manager):
         Paramters:
             initial_config: dict - A dictionary of configuration settings.
         """
-        with open(self.cfg_file_name, 'w') as cfg_file:
-            json.dump(initial_config, cfg_file, indent = 4, sort_keys = True)
-
         self.config = initial_config
+        self.store.write(initial_config)
 
     def load_global_config(self):
         """
@@ -75,11 +102,8 @@ class ConfigManager(Manager):
         Returns:
             boolean - True if aria_config.json exists and is read successfully, False otherwise.
         """
-        loaded_config = {}
-        try:
-            with open(self.cfg_file_name, 'r') as cfg_file:
-                loaded_config = json.load(cfg_file)
-        except:
+        loaded_config = self.store.load()
+        if loaded_config is None:
             return False
 
         if loaded_config["cfg_version"] != self.cfg_version:
@@ -97,17 +121,86 @@ class ConfigManager(Manager):
 
     def save_global_config(self):
         """
-        Attempts to saves the config dictionary to aria_config.json.
+        Attempts to saves the config dictionary to aria_config.json immediately, replacing the file atomically.
 
         Returns:
             boolean - True if aria_config.json is successfully written to, False otherwise.
         """
-        try:
-            with open(self.cfg_file_name, 'w') as cfg_file:
-                json.dump(self.config, cfg_file, indent = 4, sort_keys = True)
-        except:
-            return False
-        return True
+        return self.store.write(self.config)
+
+    def flush(self):
+        """Writes any pending config changes to aria_config.json now."""
+        self.store.flush()
+
+    def validate_config(self, config):
+        """
+        Checks that a config dictionary has the settings Aria relies on.
+
+        Parameters:
+            config : dict - The config to check.
+
+        Returns:
+            [str] - A description of each problem found, or an empty list if the config is valid.
+        """
+        if not isinstance(config, dict):
+            return ["the config is not a JSON object"]
+
+        problems = []
+        if config.get("cfg_version") != self.cfg_version:
+            problems.append("cfg_version is " + str(config.get("cfg_version")) + ", expected " + self.cfg_version)
+        for key in ["aria_path", "user_name"]:
+            if not isinstance(config.get(key), str):
+                problems.append(key + " must be a string")
+        if not isinstance(config.get("plugins"), dict):
+            problems.append("plugins must be an object")
+        elif not all(isinstance(plugin, dict) for plugin in config["plugins"].values()):
+            problems.append("each plugin must be an object")
+        return problems
+
+    def add_listener(self, listener):
+        """
+        Registers a function to be told about config changes made by editing aria_config.json.
+
+        Parameters:
+            listener : callable - Called as listener(old_config, new_config) after a new config is swapped in.
+        """
+        self.listeners.append(listener)
+
+    def start_watching(self, interval = 1):
+        """
+        Starts reloading aria_config.json whenever it is edited, without restarting Aria.
+
+        Parameters:
+            interval : float - Seconds between checks for changes.
+        """
+        # Versions written by this ConfigManager are already in memory
+        ignore = lambda stat: stat == self.store.written_stat
+        self.watcher = ConfigWatcher(self.cfg_file_name, self.on_file_change, interval = interval, validate = self.validate_config, ignore = ignore)
+        self.watcher.start()
+
+    def stop_watching(self):
+        """Stops reloading aria_config.json when it is edited."""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def on_file_change(self, new_config):
+        """
+        Swaps in a config read from an edited aria_config.json and notifies listeners. Called on the watcher's thread.
+
+        Parameters:
+            new_config : dict - The parsed, validated config.
+        """
+        # Changes made in Aria but not yet written out still apply on top of the edit
+        with self.lock:
+            self.store.replay_journal(new_config)
+            old_config = self.config
+            self.config = new_config
+        if self.debug:
+            print("Reloaded", self.cfg_file_name + ".")
+
+        for listener in self.listeners:
+            listener(old_config, new_config)
 
     def get_config(self):
         """Returns the entire config dictionary, if a config is loaded, otherwise runs the initial setup process."""
@@ -115,17 +208,20 @@ class ConfigManager(Manager):
             self.initial_setup()
         return self.config
 
-    def get(self, key):
+    def get(self, key, default = _MISSING):
         """
         Returns the value associated with the specified key in the config dictionary.
         
         Parameters:
             key : str - The key to retrieve the associated value of.
+            default : Object - Optional value to return if the key is not set. If omitted, a missing key raises a KeyError.
 
         Returns:
             Object - The json-serializable object stored at the target key.
         """
-        return self.config[key]
+        if default is _MISSING:
+            return self.config[key]
+        return self.config.get(key, default)
 
     def set(self, key, value):
         """
@@ -135,8 +231,20 @@ class ConfigManager(Manager):
             key : str - The key to set the value of.
             value : Object - A json-serializable value to store at the target key.
         """
-        self.config[key] = value
-        self.save_global_config()
+        self.set_path([key], value)
+
+    def set_path(self, keys, value):
+        """
+        Sets a nested value in the config dictionary, e.g. ["plugins", "google", "enabled"], and updates aria_config.json.
+        The change is journaled immediately; aria_config.json itself is rewritten once changes stop arriving, so many changes in a row cost one write.
+
+        Paramters:
+            keys : [str] - The keys leading to the value to set.
+            value : Object - A json-serializable value to store at the target key.
+        """
+        with self.lock:
+            set_path(self.config, keys, value)
+            self.store.record(keys, value)
 
     def initial_setup(self):
         """
@@ -250,6 +358,12 @@ class CommandManager(Manager):
         self.handler_checkers = dict()
         self.debug = debug
 
+        # Held while the plugin dictionaries are changed or searched, since config reloads change them on the watcher's thread
+        self.lock = threading.RLock()
+
+        # Incremented whenever a plugin is loaded or unloaded, so cached lookups of plugins can tell when they are stale
+        self.generation = 0
+
     def get_all_commands(self):
         """
         Loads all command modules enabled in aria_config.json.
@@ -262,47 +376,120 @@ class CommandManager(Manager):
         for f in files:
             if "__" not in f and ".pyc" not in f and ".DS_Store" not in f:
                 cmd_name = f.replace(".py", "")
-                if cmd_name in self.managers["config"].get("plugins").keys():
-                    if self.managers["config"].get("plugins")[cmd_name]:
-                        # Add base Command object
-                        module = importlib.import_module("cmds."+cmd_name)
-                        self.plugins[cmd_name] = module.Command()
-
-                        # Get aliases
-                        aliases = getattr(self.plugins[cmd_name], "aliases", None)
-                        if isinstance(aliases, list):
-                            for alias in aliases:
-                                self.plugins[alias] = self.plugins[cmd_name]
-
-                        # Add invocation methods
-                        cmd_invocation = getattr(self.plugins[cmd_name], "invocation", None)
-                        if callable(cmd_invocation):
-                            self.invocations[cmd_name] = cmd_invocation
-
-                            if isinstance(aliases, list):
-                                for alias in aliases:
-                                    self.invocations[alias] = self.invocations[cmd_name]
-
-                        # Add handler checking methods
-                        cmd_handler_checker = getattr(self.plugins[cmd_name], "handler_checker", None)
-                        cmd_handler = getattr(self.plugins[cmd_name], "handler", None)
-                        if callable(cmd_handler_checker):
-                            self.handler_checkers[cmd_name] = cmd_handler_checker
-
-                            if isinstance(aliases, list):
-                                for alias in aliases:
-                                    self.handler_checkers[alias] = self.handler_checkers[cmd_name]
-
-                        # Add handler methods
-                        if callable(cmd_handler):
-                            self.handlers[cmd_name] = cmd_handler
-
-                            if isinstance(aliases, list):
-                                for alias in aliases:
-                                    self.handlers[alias] = self.handlers[cmd_name]
+                if self.is_enabled(cmd_name, self.managers["config"].get("plugins")):
+                    self.load_command_plugin(cmd_name)
         if self.debug:
             print("Loaded", len(self.plugins), "plugins.")
 
+    def is_enabled(self, cmd_name, plugins):
+        """
+        Checks whether a command plugin is enabled in a plugins dictionary from the config.
+
+        Parameters:
+            cmd_name : str - The name of the command plugin.
+            plugins : dict - The "plugins" dictionary of a config.
+
+        Returns:
+            boolean - True if the plugin is listed and enabled, False otherwise.
+        """
+        return cmd_name in plugins and plugins[cmd_name].get("enabled", True) == True
+
+    def load_command_plugin(self, cmd_name):
+        """
+        Loads a command module and registers its command object, aliases, invocation and handler methods.
+
+        Parameters:
+            cmd_name : str - The name of the command plugin, i.e. its module name in cmds/.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            # Add base Command object
+            module = importlib.import_module("cmds."+cmd_name)
+            self.plugins[cmd_name] = module.Command()
+            self.generation += 1
+
+            # Get aliases
+            aliases = getattr(self.plugins[cmd_name], "aliases", None)
+            if not isinstance(aliases, list):
+                aliases = []
+            for alias in aliases:
+                self.plugins[alias] = self.plugins[cmd_name]
+
+            # Add invocation methods
+            cmd_invocation = getattr(self.plugins[cmd_name], "invocation", None)
+            if callable(cmd_invocation):
+                for name in [cmd_name] + aliases:
+                    self.invocations[name] = cmd_invocation
+
+            # Add handler checking methods
+            cmd_handler_checker = getattr(self.plugins[cmd_name], "handler_checker", None)
+            if callable(cmd_handler_checker):
+                for name in [cmd_name] + aliases:
+                    self.handler_checkers[name] = cmd_handler_checker
+
+            # Add handler methods
+            cmd_handler = getattr(self.plugins[cmd_name], "handler", None)
+            if callable(cmd_handler):
+                for name in [cmd_name] + aliases:
+                    self.handlers[name] = cmd_handler
+
+    def unload_command_plugin(self, cmd_name):
+        """
+        Unregisters a command plugin's command object, aliases, invocation and handler methods.
+
+        Parameters:
+            cmd_name : str - The name of the command plugin.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            plugin = self.plugins.get(cmd_name)
+            if plugin is None:
+                return
+            self.generation += 1
+
+            aliases = getattr(plugin, "aliases", None)
+            if not isinstance(aliases, list):
+                aliases = []
+            for name in [cmd_name] + aliases:
+                if self.plugins.get(name) is plugin:
+                    self.plugins.pop(name)
+                self.invocations.pop(name, None)
+                self.handler_checkers.pop(name, None)
+                self.handlers.pop(name, None)
+
+    def apply_config(self, old_config, new_config):
+        """
+        Loads and unloads only the command plugins whose enablement differs between two configs.
+
+        Parameters:
+            old_config : dict - The previous config.
+            new_config : dict - The config that replaced it.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            old_plugins = old_config.get("plugins", {})
+            new_plugins = new_config.get("plugins", {})
+            for cmd_name in set(old_plugins.keys()) | set(new_plugins.keys()):
+                was_enabled = self.is_enabled(cmd_name, old_plugins)
+                if self.is_enabled(cmd_name, new_plugins) == was_enabled:
+                    continue
+
+                try:
+                    if was_enabled:
+                        self.unload_command_plugin(cmd_name)
+                        print(cmd_name, "has been disabled.")
+                    else:
+                        self.load_command_plugin(cmd_name)
+                        print(cmd_name, "has been enabled.")
+                except ImportError as error:
+                    print("Could not load", cmd_name + ":", error)
+
     def cmd_from_template(self, str_in):
         """
         Creates a new command module using the template method of another command.
@@ -402,6 +589,30 @@ class CommandManager(Manager):
         os.chmod(file_path, mode)
         print("Created shortcut '" + name + ".'")
 
+    def resolve_command(self, str_in):
+        """
+        Finds the command an input is routed to by its invocation checkers or, failing that, by its first word. Handler checkers are not consulted.
+
+        Parameters:
+            str_in : str - A command (and any arguments).
+
+        Returns:
+            str - The command name, which may not be a loaded plugin, or None if no command matches.
+        """
+        with self.lock:
+            invocations = list(self.invocations.items())
+
+        cmd_name = None
+        for (cmd, invocation_checker) in invocations:
+            if invocation_checker(str_in):
+                cmd_name = cmd
+
+        # If no invocation method has been found, try finding a matching command filename
+        if cmd_name == "" or cmd_name is None:
+            first_word = str_in.split(" ")[0]
+            cmd_name = self.get_command_name(first_word.lower())
+        return cmd_name
+
     def get_command_name(self, cmd_name):
         """
         Returns the name of the file associated with a command.
@@ -432,16 +643,8 @@ class CommandManager(Manager):
             if self.managers["config"].get("plugins")[cmd_name]["enabled"] == True:
                 print(cmd_name, "is already enabled.")
                 return False
-            else:
-                self.managers["config"].get("plugins")[cmd_name]["enabled"] = True
-        else:
-            self.managers["config"].get("plugins")[cmd_name] = {
-                "enabled": True
-            }
-        self.managers["config"].save_global_config()
-        module = importlib.import_module("cmds."+cmd_name)
-        aria_path = self.managers["config"].get("aria_path")
-        self.plugins[cmd_name] = module.Command()
+        self.managers["config"].set_path(["plugins", cmd_name, "enabled"], True)
+        self.load_command_plugin(cmd_name)
 
         print(cmd_name, "has been enabled.")
         return True
@@ -460,14 +663,8 @@ class CommandManager(Manager):
             if self.managers["config"].get("plugins")[cmd_name]["enabled"] == False:
                 print(cmd_name, "is already disabled.")
                 return False
-            else:
-                self.managers["config"].get("plugins")[cmd_name]["enabled"] = False
-        else:
-            self.managers["config"].get("plugins")[cmd_name] = {
-                "enabled": False
-            }
-        self.managers["config"].save_global_config()
-        self.plugins.pop(cmd_name)
+        self.managers["config"].set_path(["plugins", cmd_name, "enabled"], False)
+        self.unload_command_plugin(cmd_name)
 
         print(cmd_name, "has been disabled.")
         return True
@@ -477,44 +674,410 @@ class CommandManager(Manager):
             print("'" + method_name + "' rountine not found (Cannot find base command '" + cmd_name + "').")
         else:
             # Attempt to show help information
-            plugin = self.plugins[cmd_name]
+            with self.lock:
+                plugin = self.plugins[cmd_name]
             method = getattr(plugin, method_name, None)
 
             if callable(method):
-                method()
+                if len(inspect.signature(method).parameters) > 0:
+                    method(self.managers)
+                else:
+                    method()
             else:
                 print("'" + method_name + "' rountine not found (Missing '" + method_name + "' method).")
 
 
+class ProcessManager(Manager):
+    """
+    A manager for Aria's view of running processes. Holds a cached, indexed process table that is shared by everything that looks up or closes processes.
+    """
+    def __init__(self, debug = False, ttl = 2, reader = None):
+        """
+        Constructs a ProcessManager object.
+
+        Parameters:
+            debug : boolean - Optional setting to enable verbose feedback.
+            ttl : float - How many seconds a process table snapshot is used for before it is read again.
+            reader : callable - Optional process table reader. Defaults to the best reader for this platform.
+        """
+        self.debug = debug
+        self.process_table = ProcessTable(reader, ttl = ttl)
+        self.process_controller = ProcessController(self.process_table)
+
+    def start(self):
+        """
+        Starts refreshing the process table in the background, so that lookups never wait for a scan.
+
+        Returns:
+            None
+        """
+        self.process_table.start()
+
+    def stop(self):
+        """
+        Stops refreshing the process table in the background.
+
+        Returns:
+            None
+        """
+        self.process_table.stop()
+
+    def pids_for(self, app):
+        """
+        Gets the pids of a running app.
+
+        Parameters:
+            app : str - An executable path, app bundle path or process name (case-insensitive).
+
+        Returns:
+            [int] - The pids of the app's processes.
+        """
+        return self.process_table.pids_for(app)
+
+    def is_running(self, app):
+        """
+        Checks whether an app is running.
+
+        Parameters:
+            app : str - An executable path, app bundle path or process name (case-insensitive).
+
+        Returns:
+            boolean - True if the app has at least one process, False otherwise.
+        """
+        return len(self.pids_for(app)) > 0
+
+    def close_apps(self, apps, force_after = None, exact = False):
+        """
+        Closes a group of apps, signalling all of their processes as a batch.
+
+        Parameters:
+            apps : [str] - Filepaths or process names of the apps to close.
+            force_after : float - Optional number of seconds after which apps that have not exited are killed.
+            exact : boolean - If True, apps must match an executable path, app bundle path or process name rather than any part of a command line.
+
+        Returns:
+            dict - Each app mapped to the list of pids that were signalled.
+        """
+        apps = sorted(apps)
+        for app in apps:
+            print("Closing " + app + "...")
+        return self.process_controller.terminate(apps, force_after = force_after, exact = exact)
+
+
+class SchedulerManager(Manager):
+    """
+    A manager for jobs that Aria runs in the background on intervals, such as monitoring. Due jobs run on a bounded pool of worker threads.
+    """
+    def __init__(self, debug = False, workers = 4, clock = time.monotonic, seed = None):
+        """
+        Constructs a SchedulerManager object.
+
+        Parameters:
+            debug : boolean - Optional setting to enable verbose feedback.
+            workers : int - The maximum number of jobs run at once.
+            clock : callable - Optional function returning the current time in seconds.
+            seed : int - Optional seed for the jitter applied to each job's interval.
+        """
+        self.debug = debug
+        self.workers = workers
+        self.jobs = JobScheduler(clock, seed = seed)
+        self.executor = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread = None
+
+        # Held while jobs are submitted and while the worker pool is created or shut down
+        self._lock = threading.Lock()
+
+    def every(self, name, interval, function, jitter = 0.1, run_now = False):
+        """
+        Runs a function every interval seconds, replacing any job with the same name. Raises ValueError if the interval is not a positive number.
+
+        Parameters:
+            name : str - A unique name for the job, e.g. "uptime:http://example.com".
+            interval : float - Seconds between runs.
+            function : callable - Called with no arguments on each run.
+            jitter : float - The fraction of the interval each run may be moved by at random.
+            run_now : boolean - Whether the first run is due immediately.
+
+        Returns:
+            PeriodicJob - The scheduled job.
+        """
+        job = self.jobs.every(name, interval, function, jitter = jitter, run_now = run_now)
+        self._wake_event.set()
+        return job
+
+    def cancel(self, name):
+        """
+        Stops running a job.
+
+        Returns:
+            boolean - True if a job was cancelled, False if no job has that name.
+        """
+        return self.jobs.cancel(name)
+
+    def start(self):
+        """
+        Starts running jobs in the background.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.executor = ThreadPoolExecutor(max_workers = self.workers, thread_name_prefix = "Scheduler")
+            self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="Scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops running jobs, letting runs in progress finish. Jobs that come due afterwards are not run.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._stop_event.set()
+            if self.executor is not None:
+                self.executor.shutdown(wait = False)
+        self._wake_event.set()
+
+    def run_pending(self):
+        """
+        Runs the jobs that are due, on the worker pool if the scheduler has been started and otherwise on the calling thread.
+
+        Returns:
+            int - The number of jobs started, which is 0 once the scheduler has been stopped.
+        """
+        with self._lock:
+            if self._stop_event.is_set():
+                return 0
+            due = self.jobs.due()
+            inline = self.executor is None
+            for job in due:
+                if self.debug:
+                    print("Running scheduled job", job.name)
+                if not inline:
+                    self.executor.submit(job.run)
+
+        if inline:
+            for job in due:
+                job.run()
+        return len(due)
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            # Cleared before looking for due jobs, so a job added from here on cuts the wait short
+            self._wake_event.clear()
+            self.run_pending()
+            # Sleeps until the next job is due, or until a job is added or the scheduler is stopped
+            self._wake_event.wait(self.jobs.next_delay())
+
+    def stats(self):
+        """
+        Returns:
+            dict - Runs, coalesced runs and failures per job.
+        """
+        return self.jobs.stats()
+
+
 class ContextManager(Manager):
     """
     A manager for Aria's context tracking system. Only one ContextManager should be active at a time.
     """
-    def __init__(self, managers, debug = False):
+    def __init__(self, managers, debug = False, context_source = None, clock = None, browser_backend = None, script_backend = None):
         """
         Constructs a ContextManager object.
 
         Parameters:
             managers : [Manager] - A list of references to all manager objects.
             debug : boolean - Optional setting to enable verbose feedback.
+            context_source : ContextSource - Optional source of context events. Defaults to the best source for this platform.
+            clock : callable - Optional function returning the current datetime, e.g. a simulated clock when replaying a trace. Defaults to datetime.now.
+            browser_backend : BrowserBackend - Optional reader of browser state, e.g. a StubBrowserBackend for testing. Defaults to the best backend for this platform.
+            script_backend : ScriptBackend - Optional compiler and runner of scripts, e.g. a StubScriptBackend for testing. Defaults to the best backend for this platform.
         """
+        self.clock = clock if clock is not None else datetime.now
         self.mins_to_checkpoint = 0.05
+        self.max_mins_to_checkpoint = 0.5
         self.timer_checkpoint = -1
         self.debug = debug
 
+        # Checkpoints back off while the context is stable and tighten again after a change or input
+        self.checkpoint_interval = AdaptiveInterval(self.mins_to_checkpoint * 60, self.max_mins_to_checkpoint * 60)
+        self.checkpoint_ticks = TickCounter(self.mins_to_checkpoint * 60)
+
+        # Polling is suspended after this long without input or context changes (0 to never suspend)
+        self.idle_after = 30 * 60
+        if "config" in managers:
+            self.idle_after = managers["config"].get("context_idle_minutes", 30) * 60
+        self.idle = False
+        self.last_activity = time.monotonic()
+
         item_structure = {
             "start_time" : float,
             "end_time" : float,
             "frequency" : int,
-            "targets" : list,
+            "targets" : frozenset,
         }
 
+        self.app_sets = AppSetInterner()
+        self._raw_apps = None
+
         self.context_tracker = managers["tracking"].init_tracker("context", item_structure)
-        self.current_context = self.context_tracker.new_item([0, 0, 0, []])
+        self.context_tracker.load_data()
+        self.intern_context_items()
+
+        # Context times are seconds since midnight, so rows spanning midnight wrap around the day
+        self.context_history = self.context_tracker.register_view(IntervalView("history", period = 24 * 60 * 60))
+        self.context_neighbors = self.context_tracker.register_view(NeighborIndex("neighbors", self.app_sets))
+        self.transitions = TransitionModel()
+        self.transitions.build(self.context_tracker.items)
+        self.session_started = False
+        self.current_context = self.context_tracker.new_item([0, 0, 0, self.app_sets.intern([])])
         self.current_app = ""
         self.previous_apps = []
         self.previous_input = ""
 
+        # Every script Aria and its plugins run is compiled once and shared through this cache
+        self.scripts = ScriptCache(script_backend if script_backend is not None else default_script_backend())
+
+        self.processes = managers["processes"] if "processes" in managers else ProcessManager(debug = debug)
+        self.context_source = context_source
+        if self.context_source is None:
+            self.context_source = default_context_source(self.processes.process_table, self.scripts)
+        self.context_events = queue.Queue()
+        self.trace_recorder = None
+
+        # Shared by handler checkers so that dispatching one input reads the browser at most once
+        self.browser = BrowserStateProvider(browser_backend if browser_backend is not None else default_browser_backend(self.scripts))
+
+    def start(self):
+        """
+        Starts listening for context change events.
+
+        Returns:
+            None
+        """
+        self.context_source.start(self.on_context_change)
+
+    def stop(self):
+        """
+        Stops listening for context change events.
+
+        Returns:
+            None
+        """
+        self.context_source.stop()
+        if self.trace_recorder is not None:
+            self.trace_recorder.close()
+            self.trace_recorder = None
+
+    def run_main_thread(self, timeout):
+        """
+        Lends the main thread to the context source for up to timeout seconds. The main thread should call this in a loop, as sources may only receive events there.
+
+        Parameters:
+            timeout : float - The number of seconds to run for.
+
+        Returns:
+            None
+        """
+        self.context_source.run_main_thread(timeout)
+
+    def on_context_change(self, front_app, running_apps):
+        """
+        Receives a context change event from the context source. Called on the source's thread.
+
+        Returns:
+            None
+        """
+        self.last_activity = time.monotonic()
+        if self.trace_recorder is not None:
+            self.trace_recorder.record(front_app, running_apps)
+        self.context_events.put((front_app, running_apps))
+
+    def record_trace(self, path):
+        """
+        Starts recording every context change to a trace file, for replaying with context_tools.Traces.
+
+        Parameters:
+            path : str - The trace file to write.
+
+        Returns:
+            None
+        """
+        self.trace_recorder = TraceRecorder(path)
+
+    def note_input(self):
+        """
+        Records user input, leaving idle mode and tightening the polling and checkpoint intervals.
+
+        Returns:
+            None
+        """
+        self.last_activity = time.monotonic()
+        self.checkpoint_interval.reset()
+        if self.idle:
+            self.idle = False
+            self.context_source.resume()
+        else:
+            self.context_source.wake()
+        # Wakes the context loop so the new intervals take effect immediately
+        self.context_events.put(None)
+
+    def next_timeout(self):
+        """
+        Returns how long the context loop should wait for a change before its next checkpoint, entering idle mode if there has been no activity for idle_after seconds.
+
+        Returns:
+            float - The number of seconds to wait, or None to wait until the next input while idle.
+        """
+        if not self.idle and self.idle_after > 0 and time.monotonic() - self.last_activity > self.idle_after:
+            self.idle = True
+            self.context_source.pause()
+            self.context_tracker.save_changes()
+            if self.debug:
+                print("Context polling suspended until the next input.")
+
+        if self.idle:
+            return None
+        return self.checkpoint_interval.current
+
+    def stats(self):
+        """
+        Returns counters comparing the adaptive polling and checkpoint schedules against fixed intervals, browser state reads and script compiles and runs.
+
+        Returns:
+            dict - Polling and checkpoint tick counts, including the number of ticks saved, browser reads and cache hits, and script compile and run counts and times.
+        """
+        return {
+            "idle": self.idle,
+            "polling": self.context_source.stats(),
+            "checkpoints": dict(self.checkpoint_ticks.stats(), interval = self.checkpoint_interval.current),
+            "browser": self.browser.stats(),
+            "scripts": self.scripts.stats(),
+        }
+
+    def wait_for_change(self, timeout = None):
+        """
+        Blocks until the context changes, input is noted or the timeout elapses, discarding all but the latest pending event.
+
+        Parameters:
+            timeout : float - The maximum number of seconds to wait, or None to wait indefinitely.
+
+        Returns:
+            boolean - True if woken by a context change or input, False if the timeout elapsed first.
+        """
+        try:
+            self.context_events.get(timeout = timeout)
+        except queue.Empty:
+            return False
+
+        while not self.context_events.empty():
+            self.context_events.get_nowait()
+        return True
+
     def update_context(self):
         """
         Update all context variables as necessary
@@ -522,8 +1085,8 @@ class ContextManager(Manager):
         Returns:
             None
         """
-        currentApp, listOfApps = self.get_context_from_AS()
-        listOfApps = list(set(listOfApps))
+        currentApp, listOfApps = self.get_context()
+        apps = self.intern_apps(listOfApps)
 
         # Track current app
         if currentApp is not None:
@@ -535,69 +1098,135 @@ class ContextManager(Manager):
                 self.previous_apps.append(self.current_app)
 
         # Track all running apps
-        if len(listOfApps) > 0:
-            now = datetime.now()
+        if len(apps) > 0:
+            now = self.clock()
             current_time = (now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds()
-            self.current_context = self.context_tracker.new_item([current_time, current_time, 0, listOfApps])
+            if apps is not self.current_context.data["targets"]:
+                self.current_context = self.context_tracker.new_item([current_time, current_time, 0, apps])
 
-            # Initialize history
-            if len(self.context_tracker.items) == 0:
+            # Start a new history row for this session
+            if not self.session_started:
+                if len(self.context_tracker.items) > 0:
+                    self.transitions.record(self.context_tracker.items[-1].data["targets"], apps, current_time)
                 self.context_tracker.add_item(self.current_context)
+                self.session_started = True
 
-            # Compare against previous context
+            # Compare against previous context (app sets are interned, so identity is equality)
             prev_context_obj = self.context_tracker.items[-1]
-            if prev_context_obj != None and listOfApps != prev_context_obj.data["targets"]:
+            if prev_context_obj != None and apps is not prev_context_obj.data["targets"]:
                 # Record end time of previous context, open new context
-                prev_context_obj.data["end_time"] = current_time
+                self.context_tracker.update_item(prev_context_obj, {"end_time": current_time})
                 self.context_tracker.add_item(self.current_context)
+                self.transitions.record(prev_context_obj.data["targets"], apps, current_time)
+                self.checkpoint_interval.reset()
                 self.checkpoint()
             
             # Current and previous are equal at this point
-            elif self.timer_checkpoint == -1 or current_time - self.timer_checkpoint > self.mins_to_checkpoint * 60:
+            elif self.timer_checkpoint == -1 or current_time - self.timer_checkpoint >= self.checkpoint_interval.current:
                 #print("Saving context history...")
                 # Update previous end time (in case context doesn't change for a while)
                 if prev_context_obj != None:
-                    prev_context_obj.data["end_time"] = current_time
+                    self.context_tracker.update_item(prev_context_obj, {
+                        "end_time": current_time,
+                        "frequency": prev_context_obj.data["frequency"] + 1
+                    })
+
+                # Export changed context history rows to context tracking csv
+                self.context_tracker.save_changes()
+                self.checkpoint_ticks.tick()
+                self.checkpoint_interval.back_off()
+                self.checkpoint()
 
-                if self.current_context.data["targets"] == self.context_tracker.items[-1].data["targets"]:
-                    self.context_tracker.items[-1].data["frequency"] += 1
+    def intern_apps(self, apps):
+        """
+        Returns the interned app set for a list of apps from the context source.
 
-                # Export context history to context tracking csv
-                self.context_tracker.save_data()
-                self.checkpoint()
-                self.context_tracker.load_data()
+        Parameters:
+            apps : [str] - A list of filepaths of running applications.
+
+        Returns:
+            frozenset - The canonical app set.
+        """
+        # Sources hand back the same list until the context changes, so unchanged ticks cost nothing
+        if apps is not self._raw_apps:
+            self._raw_apps = apps
+            self._interned_apps = self.app_sets.intern(apps)
+        return self._interned_apps
+
+    def intern_context_items(self):
+        """
+        Replaces the app sets of all context tracker items with their interned equivalents.
+
+        Returns:
+            None
+        """
+        for item in self.context_tracker.items:
+            item.data["targets"] = self.app_sets.intern(item.data["targets"])
 
-    def get_context_from_AS(self):
+    def predict_next_context(self, when = None):
         """
-        Runs AppleScript to find currently running applications
+        Predicts the context most likely to follow the current one.
+
+        Parameters:
+            when : float or datetime.datetime or datetime.time - Optional time of day to condition on. Defaults to now.
+
+        Returns:
+            frozenset - The predicted app set, or None if the current context has never been left.
+        """
+        if when is None:
+            when = self.clock()
+        return self.transitions.predict(self.current_context.data["targets"], self.seconds_since_midnight(when))
+
+    def contexts_at(self, when):
+        """
+        Gets the history rows whose contexts were open at a time of day.
+
+        Parameters:
+            when : float or datetime.datetime or datetime.time - The time of day, as seconds since midnight or a datetime/time.
+
+        Returns:
+            [TrackerItem] - The matching context tracker items, ordered by start time.
+        """
+        return self.context_history.at(self.seconds_since_midnight(when))
+
+    def contexts_between(self, start, end):
+        """
+        Gets the history rows whose contexts were open at any point in a window of the day. Windows whose end is before their start wrap past midnight.
+
+        Parameters:
+            start : float or datetime.datetime or datetime.time - The start of the window.
+            end : float or datetime.datetime or datetime.time - The end of the window.
+
+        Returns:
+            [TrackerItem] - The matching context tracker items, ordered by start time.
+        """
+        return self.context_history.overlapping(self.seconds_since_midnight(start), self.seconds_since_midnight(end))
+
+    def seconds_since_midnight(self, when):
+        """
+        Converts a time of day to the seconds since midnight used by context history rows.
+
+        Parameters:
+            when : float or datetime.datetime or datetime.time - The time of day.
+
+        Returns:
+            float - The number of seconds since midnight.
+        """
+        if isinstance(when, (int, float)):
+            return when
+        return when.hour * 3600 + when.minute * 60 + when.second + when.microsecond / 1000000
+
+    def get_context(self):
+        """
+        Gets the latest context observed by the context source.
 
         Returns:
             [str, [str]] - The filepath of the currently focused application and a list of filepaths of all currently running applications.
         """
-        scpt = applescript.AppleScript('''
-            property _frontApp : 0
-            property _frontAppName : 0
-            property _ID : 0
-            property _listOfApps : {}
-            
-            try
-                with timeout of 1 second
-                    tell application "System Events"
-                        set frontApp to first application process whose frontmost is true
-                        set frontAppName to name of frontApp
-                        set currentApp to file of first application process where name is frontAppName
-                        set listOfApps to (file of every process where background only is false)
-                    end tell
-                end timeout
-                return {currentApp, listOfApps}
-            on error
-                -- blah
-            end try
-        ''')
-        data = scpt.run()
-        if data != None:
-            return data
-        return [self.current_app, self.current_context.data["targets"]]
+        currentApp, listOfApps = self.context_source.snapshot()
+        if currentApp is None and len(listOfApps) == 0:
+            return [self.current_app, self.current_context.data["targets"]]
+        return [currentApp, listOfApps]
 
     def checkpoint(self):
         """
@@ -606,7 +1235,7 @@ class ContextManager(Manager):
         Returns:
             None
         """
-        now = datetime.now()
+        now = self.clock()
         current_time = (now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds()
         self.timer_checkpoint = current_time
 
@@ -617,9 +1246,21 @@ class ContextManager(Manager):
         Returns:
             None
         """
-        apps_to_close = [app for app in self.current_context.data["targets"]]
-        for app in apps_to_close:
+        apps = []
+        for app in self.current_context.data["targets"]:
             if app != "/Applications/Visual Studio Code.app" and app != "/System/Library/CoreServices/Finder.app" and app != "/System/Applications/Utilities/Terminal.app":
-                print("Closing " + app + "...")
-                command = ["pkill", "-f", app]
-                subprocess.call(command)
\ No newline at end of file
+                apps.append(app)
+        self.close_apps(apps)
+
+    def close_apps(self, apps, force_after = None):
+        """
+        Closes a group of apps using the shared process table.
+
+        Parameters:
+            apps : [str] - Filepaths of the apps to close.
+            force_after : float - Optional number of seconds after which apps that have not exited are killed.
+
+        Returns:
+            dict - Each app mapped to the list of pids that were signalled.
+        """
+        return self.processes.close_apps(apps, force_after = force_after)
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+Context pipeline benchmark
+
+Replays synthetic or recorded context traces through ContextManager.update_context and the
+context tracker on a simulated clock, with a scripted context source in place of AppleScript,
+and reports rows written, bytes written and CPU time per simulated hour.
+
+Typical usage example:
+    python benchmarks/context_bench.py --apps 50,200,500 --hours 8
+    python benchmarks/context_bench.py --trace context.trace --output context_bench.json
+    python benchmarks/context_bench.py --baseline context_bench.json
+
+Traces can be recorded from a live session with: python Aria.py --record-trace context.trace
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Managers import ContextManager, ProcessManager
+from context_tools.ContextSources import ScriptedContextSource
+from context_tools.Traces import SimulatedClock, TraceReplayer, load_trace, synthetic_trace
+from tracking_tools.TrackingManager import TrackingManager
+from tracker_bench import git_revision
+
+
+def replay(events):
+    """ Replay a trace into a fresh context tracker and return the replayer's report. """
+    with tempfile.TemporaryDirectory() as folder:
+        clock = SimulatedClock()
+        managers = {
+            "tracking": TrackingManager(folder + "/"),
+            # The replay never closes apps, so the process table is never read
+            "processes": ProcessManager(reader = lambda: []),
+        }
+        context_manager = ContextManager(managers, context_source = ScriptedContextSource(), clock = clock)
+        return TraceReplayer(context_manager, clock, events).run()
+
+def print_record(record):
+    print("{:<24} {:>8.1f} h {:>10.0f} rows/h {:>12.0f} bytes/h {:>8.3f} cpu s/h".format(
+        record["trace"],
+        record["simulated_hours"],
+        record["rows_written_per_hour"],
+        record["bytes_written_per_hour"],
+        record["cpu_seconds_per_hour"]), file = sys.stderr)
+
+def compare_to_baseline(results, baseline_path):
+    """ Print the CPU and bytes ratios of each result against a previous run's output. """
+    with open(baseline_path, "r") as baseline_file:
+        baseline = json.load(baseline_file)
+
+    previous = {record["trace"]: record for record in baseline["results"]}
+    print("\nCompared to", baseline_path, "(" + str(baseline.get("revision")) + "):", file = sys.stderr)
+    for record in results:
+        old = previous.get(record["trace"])
+        if old is not None and old["cpu_seconds_per_hour"] > 0 and old["bytes_written_per_hour"] > 0:
+            print("{:<24} cpu {:>7.2f}x bytes {:>7.2f}x".format(
+                record["trace"],
+                record["cpu_seconds_per_hour"] / old["cpu_seconds_per_hour"],
+                record["bytes_written_per_hour"] / old["bytes_written_per_hour"]), file = sys.stderr)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description = "Benchmark Aria's context pipeline by replaying context traces.")
+    arg_parser.add_argument("--apps", type = str, default = "50,200,500", help = "Comma-separated numbers of concurrently running apps for synthetic traces.")
+    arg_parser.add_argument("--hours", type = float, default = 8, help = "Length of synthetic traces in hours.")
+    arg_parser.add_argument("--mean-dwell", type = float, default = 90, help = "Mean seconds between events in synthetic traces.")
+    arg_parser.add_argument("--trace", type = str, action = "append", help = "A recorded trace to replay instead of synthetic ones. May be given more than once.")
+    arg_parser.add_argument("--seed", type = int, default = 0, help = "Seed for synthetic traces.")
+    arg_parser.add_argument("--output", type = str, help = "Write JSON results to this file instead of stdout.")
+    arg_parser.add_argument("--baseline", type = str, help = "A previous JSON output to compare against.")
+    args = arg_parser.parse_args()
+
+    traces = []
+    if args.trace:
+        for path in args.trace:
+            traces.append((os.path.basename(path), load_trace(path)))
+    else:
+        for app_count in [int(count) for count in args.apps.split(",")]:
+            events = synthetic_trace(app_count, hours = args.hours, mean_dwell = args.mean_dwell, seed = args.seed)
+            traces.append(("synthetic-" + str(app_count) + "-apps", events))
+
+    results = []
+    for name, events in traces:
+        record = {"trace": name}
+        record.update(replay(events))
+        results.append(record)
+        print_record(record)
+
+    report = {
+        "benchmark": "context",
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent = 4)
+    else:
+        print(json.dumps(report, indent = 4))
+
+    if args.baseline:
+        compare_to_baseline(results, args.baseline)
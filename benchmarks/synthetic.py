@@ -0,0 +1,127 @@
+"""
+Synthetic tracker data for Aria's benchmarks.
+
+The item structures below mirror the trackers Aria creates at runtime:
+    context - ContextManager's context tracker
+    google  - google.py's search tracker (TrackingManager.init_tracker defaults)
+    jump    - j.py's jump tracker (TrackingManager.init_tracker defaults)
+    exec    - x.py's exec pathway tracker
+    wiki    - wikipedia.py's frequency tracker (TrackingManager.run_frequency_tracker)
+"""
+
+import random
+
+DEFAULT_STRUCTURE = {
+    "start_time" : float,
+    "end_time" : float,
+    "frequency" : float,
+    "targets" : list
+}
+
+SCHEMAS = {
+    "context" : {
+        "start_time" : float,
+        "end_time" : float,
+        "frequency" : int,
+        "targets" : frozenset,
+    },
+    "google" : DEFAULT_STRUCTURE,
+    "jump" : DEFAULT_STRUCTURE,
+    "exec" : {
+        "name" : str,
+        "time" : float,
+        "frequency" : int,
+        "targets" : list,
+    },
+    "wiki" : {
+        "time" : float,
+        "frequency" : int,
+        "target" : str,
+    },
+}
+
+WORDS = [
+    "python", "swift", "apple", "weather", "news", "recipe", "pasta", "music", "guitar", "chords",
+    "stock", "market", "aria", "assistant", "macos", "terminal", "shortcut", "calendar", "mail",
+    "physics", "history", "rome", "jazz", "coffee", "bread", "travel", "flights", "hotel", "map",
+    "translate", "spanish", "french", "learn", "course", "tutorial", "error", "exception", "list",
+]
+
+def app_pool(size):
+    """ Get a list of plausible application paths. """
+    return ["/Applications/App " + str(index) + ".app" for index in range(size)]
+
+def _zipf_choice(rng, population, skew = 1.2):
+    # Heavier use of a few values, like real histories
+    index = int(len(population) * (rng.random() ** (skew * 2)))
+    return population[min(index, len(population) - 1)]
+
+def _time_pair(rng):
+    start = rng.random() * 86400
+    return start, min(86400, start + rng.random() * 3600)
+
+def context_rows(count, rng, num_apps = 60):
+    apps = app_pool(num_apps)
+    # A handful of recurring workflows, each a set of apps, perturbed slightly per row
+    workflows = [rng.sample(apps, rng.randint(5, 15)) for _ in range(max(4, num_apps // 5))]
+    rows = []
+    for _ in range(count):
+        targets = list(_zipf_choice(rng, workflows))
+        if rng.random() < 0.3:
+            targets.append(rng.choice(apps))
+        start, end = _time_pair(rng)
+        rows.append([start, end, rng.randint(0, 40), targets])
+    return rows
+
+def google_rows(count, rng):
+    rows = []
+    for _ in range(count):
+        query = " ".join(_zipf_choice(rng, WORDS) for _ in range(rng.randint(1, 5)))
+        start, end = _time_pair(rng)
+        rows.append([start, end, float(rng.randint(1, 20)), [query]])
+    return rows
+
+def jump_rows(count, rng):
+    folders = ["/Users/user/" + word.title() for word in WORDS]
+    sites = ["https://www." + word + ".com" for word in WORDS]
+    rows = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            destination = _zipf_choice(rng, folders) + "/" + rng.choice(WORDS) + ".txt"
+        else:
+            destination = _zipf_choice(rng, sites)
+        start, end = _time_pair(rng)
+        rows.append([start, end, float(rng.randint(0, 30)), [destination]])
+    return rows
+
+def exec_rows(count, rng):
+    commands = ["google " + word for word in WORDS] + ["j " + word for word in WORDS] + ["app " + word.title() for word in WORDS]
+    rows = []
+    for index in range(count):
+        steps = [_zipf_choice(rng, commands) for _ in range(rng.randint(1, 4))]
+        rows.append(["pathway" + str(index), rng.random() * 86400, rng.randint(1, 20), steps])
+    return rows
+
+def wiki_rows(count, rng):
+    rows = []
+    for _ in range(count):
+        rows.append([rng.random() * 86400, rng.randint(1, 20), " ".join(_zipf_choice(rng, WORDS) for _ in range(rng.randint(1, 3)))])
+    return rows
+
+GENERATORS = {
+    "context" : context_rows,
+    "google" : google_rows,
+    "jump" : jump_rows,
+    "exec" : exec_rows,
+    "wiki" : wiki_rows,
+}
+
+def rows_for(schema, count, seed = 0):
+    """ Generate count synthetic rows for one of the SCHEMAS. """
+    return GENERATORS[schema](count, random.Random(seed))
+
+def populate(tracker, rows):
+    """ Add rows to a tracker as new items. """
+    for row in rows:
+        tracker.add_item(tracker.new_item(row))
+    return tracker
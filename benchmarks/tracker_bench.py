@@ -0,0 +1,218 @@
+"""
+Tracker benchmark suite
+
+Times Tracker operations on synthetic trackers that match Aria's real item structures
+and records the peak memory allocated by each operation.
+
+Typical usage example:
+    python benchmarks/tracker_bench.py --sizes 1000,10000 --output bench.json
+    python benchmarks/tracker_bench.py --sizes 1000,10000,100000,1000000 --schemas context,google
+    python benchmarks/tracker_bench.py --baseline bench.json
+    python benchmarks/tracker_bench.py --schemas context --operations save_data,checkpoint --sizes 1000,100000
+
+Results are written as JSON (one record per schema, size and operation) so that runs from
+different versions can be compared with --baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracking_tools.Trackers import Tracker
+from synthetic import SCHEMAS, WORDS, rows_for, populate
+
+OPERATIONS = [
+    "load_data",
+    "save_data",
+    "checkpoint",
+    "remove_duplicates",
+    "remove_near_duplicates",
+    "get_items_containing",
+    "get_best_match",
+]
+
+# Pairwise operations are skipped above this many rows unless --quadratic-limit is raised
+QUADRATIC_OPERATIONS = ["remove_duplicates", "remove_near_duplicates"]
+
+def equal_column(column):
+    def compare(item_1, item_2):
+        if item_1.data[column] == item_2.data[column]:
+            return 1
+        return 0
+    return compare
+
+def increment_freq(item_1, item_2):
+    item_1.data["frequency"] += 1
+    return item_1
+
+# The compare/merge methods each tracker is deduplicated with at runtime
+DEDUP_METHODS = {
+    "context" : (None, None),
+    "google" : (equal_column("targets"), increment_freq),
+    "jump" : (None, None),
+    "exec" : (equal_column("name"), increment_freq),
+    "wiki" : (equal_column("target"), increment_freq),
+}
+
+SEARCH_COLUMNS = {
+    "context" : ("targets", "App 1"),
+    "google" : ("targets", WORDS[0]),
+    "jump" : ("targets", WORDS[0]),
+    "exec" : ("targets", "google"),
+    "wiki" : ("target", WORDS[0]),
+}
+
+
+def make_tracker(schema, folder, rows = None):
+    tracker = Tracker(schema, folder + "/" + schema + "_tracking.csv", SCHEMAS[schema])
+    if rows is not None:
+        populate(tracker, rows)
+    return tracker
+
+def prepare(operation, schema, rows, folder):
+    """ Build the tracker for an operation and return a zero-argument callable that runs it. """
+    if operation == "load_data":
+        make_tracker(schema, folder, rows).save_data()
+        tracker = make_tracker(schema, folder)
+        return tracker.load_data
+
+    tracker = make_tracker(schema, folder, rows)
+    compare_method, merge_method = DEDUP_METHODS[schema]
+    column, value = SEARCH_COLUMNS[schema]
+
+    if operation == "save_data":
+        return tracker.save_data
+    if operation == "checkpoint":
+        # A context checkpoint: the open row's end time changes and a new row is added
+        tracker.save_data()
+        def checkpoint():
+            tracker.update_item(tracker.items[-1], {tracker.cols[1]: tracker.items[-1].data[tracker.cols[1]] + 1})
+            tracker.add_item(tracker.new_item(rows[0]))
+            tracker.save_changes()
+        # The first incremental save locates the existing rows; time the ones after it
+        checkpoint()
+        return checkpoint
+    if operation == "remove_duplicates":
+        return lambda: tracker.remove_duplicates(merge_method = merge_method)
+    if operation == "remove_near_duplicates":
+        return lambda: tracker.remove_near_duplicates(compare_method = compare_method, merge_method = merge_method)
+    if operation == "get_items_containing":
+        return lambda: tracker.get_items_containing(column, value)
+    if operation == "get_best_match":
+        target = tracker.new_item(rows[len(rows) // 2])
+        return lambda: tracker.get_best_match(target, tracker.items)
+    raise ValueError("Unknown operation: " + operation)
+
+def measure(operation, schema, rows, folder, track_memory = True):
+    """ Run one operation, returning its wall time in seconds and peak allocation in bytes. """
+    run = prepare(operation, schema, rows, folder)
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+
+    peak_bytes = None
+    if track_memory:
+        # tracemalloc slows everything down, so memory is measured in a separate run
+        run = prepare(operation, schema, rows, folder)
+        tracemalloc.start()
+        run()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak_bytes
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd = os.path.dirname(os.path.abspath(__file__)), stderr = subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(sizes, schemas, operations, quadratic_limit, track_memory = True, seed = 0):
+    results = []
+    for schema in schemas:
+        for size in sizes:
+            rows = rows_for(schema, size, seed)
+            for operation in operations:
+                record = {"schema": schema, "rows": size, "operation": operation}
+                if operation in QUADRATIC_OPERATIONS and size > quadratic_limit:
+                    record["skipped"] = "pairwise operation above --quadratic-limit (" + str(quadratic_limit) + " rows)"
+                else:
+                    with tempfile.TemporaryDirectory() as folder:
+                        record["seconds"], record["peak_bytes"] = measure(operation, schema, rows, folder, track_memory)
+                results.append(record)
+                print_record(record)
+    return results
+
+def print_record(record):
+    label = "{:<8} {:>8} {:<24}".format(record["schema"], record["rows"], record["operation"])
+    if "skipped" in record:
+        print(label, "skipped", file = sys.stderr)
+    else:
+        memory = ""
+        if record["peak_bytes"] is not None:
+            memory = "{:>10.1f} MiB".format(record["peak_bytes"] / 2 ** 20)
+        print(label, "{:>10.4f} s".format(record["seconds"]), memory, file = sys.stderr)
+
+def compare_to_baseline(results, baseline_path):
+    """ Print the time ratio of each result against a previous run's output. """
+    with open(baseline_path, "r") as baseline_file:
+        baseline = json.load(baseline_file)
+
+    previous = {}
+    for record in baseline["results"]:
+        if "seconds" in record:
+            previous[(record["schema"], record["rows"], record["operation"])] = record["seconds"]
+
+    print("\nCompared to", baseline_path, "(" + str(baseline.get("revision")) + "):", file = sys.stderr)
+    for record in results:
+        key = (record["schema"], record["rows"], record["operation"])
+        if "seconds" in record and key in previous and previous[key] > 0:
+            print("{:<8} {:>8} {:<24} {:>7.2f}x".format(*key, record["seconds"] / previous[key]), file = sys.stderr)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description = "Benchmark Aria's tracker operations.")
+    arg_parser.add_argument("--sizes", type = str, default = "1000,10000", help = "Comma-separated tracker sizes, e.g. 1000,10000,100000,1000000.")
+    arg_parser.add_argument("--schemas", type = str, default = ",".join(SCHEMAS.keys()), help = "Comma-separated schemas to benchmark.")
+    arg_parser.add_argument("--operations", type = str, default = ",".join(OPERATIONS), help = "Comma-separated operations to benchmark.")
+    arg_parser.add_argument("--quadratic-limit", type = int, default = 2000, help = "Largest size to run pairwise (O(n^2)) operations on.")
+    arg_parser.add_argument("--no-memory", action = "store_true", help = "Skip peak memory measurement.")
+    arg_parser.add_argument("--seed", type = int, default = 0, help = "Seed for synthetic data.")
+    arg_parser.add_argument("--output", type = str, help = "Write JSON results to this file instead of stdout.")
+    arg_parser.add_argument("--baseline", type = str, help = "A previous JSON output to compare against.")
+    args = arg_parser.parse_args()
+
+    results = run_suite(
+        [int(size) for size in args.sizes.split(",")],
+        args.schemas.split(","),
+        args.operations.split(","),
+        args.quadratic_limit,
+        track_memory = not args.no_memory,
+        seed = args.seed
+    )
+
+    report = {
+        "benchmark": "trackers",
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent = 4)
+    else:
+        print(json.dumps(report, indent = 4))
+
+    if args.baseline:
+        compare_to_baseline(results, args.baseline)
@@ -4,17 +4,12 @@ Back
 Last Updated: Version 0.0.1
 """
 
-import applescript
-
 
 class Command:
-    def __init__(self):
-        self.aliases = ["prev", "previous"]
-
-    def execute(self, str_in, managers):
-        scpt = applescript.AppleScript('''
+    SCRIPT = '''
+        on run {appPath}
             try
-                tell application "''' + managers["context"].current_app + '''"
+                tell application appPath
                     activate
                     delay 0.1
                     tell application "System Events" to keystroke "[" using command down
@@ -22,8 +17,14 @@ class Command:
             on error
                 -- blah
             end try
-        ''')
-        scpt.run()
+        end run
+    '''
+
+    def __init__(self):
+        self.aliases = ["prev", "previous"]
+
+    def execute(self, str_in, managers):
+        managers["context"].scripts.run(self.SCRIPT, managers["context"].current_app)
 
     def get_template(self, new_cmd_name):
         print("Enter base command and args: ")
@@ -15,33 +15,42 @@ class Command:
     def execute(self, str_in, managers):
         target_names = str_in[2:].split(" ")
 
-        context_tracker = managers["context"].context_tracker
-        current_context = managers["context"].current_context
+        # "c @10:30" (optionally followed by app names) jumps to a context open at that time of day
+        when = None
+        if target_names[0].startswith("@"):
+            time_str = target_names.pop(0)[1:]
+            try:
+                when = datetime.strptime(time_str, "%H:%M").time()
+            except ValueError:
+                print("Enter a time of day as @HH:MM, e.g. c @10:30 (got @" + time_str + ").")
+                return
+            target_names = [name for name in target_names if name != ""]
 
-        now = datetime.now()
-        current_time = (now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds()
+        context_neighbors = managers["context"].context_neighbors
+        current_apps = managers["context"].current_context.data["targets"]
 
         print("Finding context match...")
-        candidates = context_tracker.get_entries_containing(target_names)
-        target_context = context_tracker.entry_obj(current_time, current_time, 1, target_names)
+        candidates = context_neighbors.containing(target_names)
+        if when is not None:
+            candidates &= set(item.data["targets"] for item in managers["context"].contexts_at(when))
+            if len(candidates) == 0:
+                print("No context found at " + when.strftime("%H:%M") + ".")
+                return
 
-        best_candidate = context_tracker.get_best_match(target_context, candidates, 0)
-
-        if best_candidate == None:
-            best_candidate = context_tracker.entry_obj(current_time, current_time, 0, target_names)
-            context_tracker.add_entry(best_candidate)
+        # Prefer the context the user has spent the most time in
+        best_apps = managers["context"].app_sets.intern(target_names)
+        if len(candidates) > 0:
+            best_apps = max(candidates, key = lambda app_set: context_neighbors.weights[app_set])
 
         # Close running apps
-        apps_to_close = [app for app in current_context["targets"] if app not in best_candidate["targets"]]
-        for app in apps_to_close:
+        apps_to_close = []
+        for app in current_apps - best_apps:
             if app != "/Applications/Visual Studio Code.app" and app != "/System/Library/CoreServices/Finder.app" and app != "/System/Applications/Utilities/Terminal.app":
-                print("Closing " + app + "...")
-                command = ["pkill", "-f", app]
-                subprocess.call(command)
+                apps_to_close.append(app)
+        managers["context"].close_apps(apps_to_close)
         
         # Run apps
-        apps_to_open = [app for app in best_candidate["targets"] if app not in current_context["targets"]]
-        for app in apps_to_open:
+        for app in sorted(best_apps - current_apps):
             print("Opening " + app + "...")
             command = ["open", app]
             subprocess.call(command)
@@ -4,45 +4,55 @@ Close
 Last Updated: Version 0.0.1
 """
 
-import applescript
-import subprocess
-
 
 class Command:
+    CLOSE_WINDOW = '''
+        on run {appPath}
+            try
+                tell application appPath
+                    close front window
+                end tell
+            on error
+                -- blah
+            end try
+        end run
+    '''
+
+    # Tabs are Safari terminology, which only compiles in a tell block naming Safari
+    CLOSE_SAFARI_TAB = '''
+        on run {appPath}
+            try
+                tell application "Safari"
+                    close current tab of the front window
+                end tell
+            on error
+                -- blah
+            end try
+        end run
+    '''
+
     def __init__(self):
         pass
 
     def execute(self, str_in, managers):
-        optional = ""
-
         if str_in.endswith(" tab") or str_in.endswith( "window"):
+            script = self.CLOSE_WINDOW
             if str_in.endswith(" tab"):
                 if "Safari" in managers["context"].current_app:
-                    optional = "current tab of the "
+                    script = self.CLOSE_SAFARI_TAB
 
                 str_in = str_in[:str_in.index(" tab")]
 
             elif str_in.endswith( "window"):
                 str_in = str_in[:str_in.index(" window")]
 
-            scpt = applescript.AppleScript('''try
-                tell application "''' + managers["context"].current_app + '''"
-                    close ''' + optional + '''front window
-                end tell
-                return tabURL
-            on error
-                -- blah
-            end try
-            ''')
-            scpt.run()
+            managers["context"].scripts.run(script, managers["context"].current_app)
 
             if managers["context"].current_app != managers["context"].previous_apps[-1]:
                 managers["context"].previous_apps.append(managers["context"].current_app)
         else:
             query = str_in[6:]
-            command = ['pkill', '-ix']
-            command.insert(len(command), query)
-            subprocess.call(command)
+            managers["processes"].close_apps([query], exact = True)
 
     def get_template(self, new_cmd_name):
         print("Enter base command and args: ")
@@ -4,43 +4,37 @@ Conc - close all applications belonging to the current context
 Last Updated: February 22, 2022
 """
 
-import subprocess
-
 
 class Command:
-    def __init__(self, *args, **kwargs):
-        self.aria_path = args[0]
-
-    def execute(self, str_in, refs):
-        ConM = refs[0]
+    def __init__(self):
+        pass
 
-        current_context = ConM.current_context
-        context_data = ConM.context_tracker.entries
+    def execute(self, str_in, managers):
+        current_apps = managers["context"].current_context.data["targets"]
+        context_neighbors = managers["context"].context_neighbors
 
         print("Finding context match...")
 
         max_score = 0
-        best_candidates = []
-        for context_candidate in context_data:
-            # Award points for context delta
-            score = 100 - ConM.context_tracker.entry_delta(context_candidate, current_context)
+        best_candidates = frozenset()
+        for candidate_apps, similarity in context_neighbors.nearest(current_apps, k = 25):
+            # Award points for context similarity
+            score = 100 * similarity
 
             # Award points for having some job to do (otherwise why would the user enter this command?)
-            num_apps_diff = max(0, len(context_candidate["targets"]) - len(current_context["targets"]))
+            num_apps_diff = max(0, len(candidate_apps) - len(current_apps))
             score += -(num_apps_diff-3) * (num_apps_diff-3) + num_apps_diff + 16
 
             if score > max_score:
                 max_score = score
-                best_candidates = context_candidate["targets"]
+                best_candidates = candidate_apps
 
-        best_candidates = [app for app in best_candidates if app in current_context["targets"]]
-        
-        # Run apps
-        for app in best_candidates:
+        # Close apps
+        apps_to_close = []
+        for app in best_candidates & current_apps:
             if app != "/System/Library/CoreServices/Finder.app" and app != "/System/Applications/Utilities/Terminal.app":
-                print("Closing " + app + "...")
-                command = ["pkill", "-f", app]
-                subprocess.call(command)
+                apps_to_close.append(app)
+        managers["context"].close_apps(apps_to_close)
 
     def get_template(self, new_cmd_name):
         # TODO: Fix this or remove it
@@ -5,39 +5,53 @@ Last Updated: February 22, 2022
 """
 
 import subprocess
+from datetime import datetime, timedelta
 
 
 class Command:
-    def __init__(self, *args, **kwargs):
-        self.aria_path = args[0]
+    def __init__(self):
+        pass
 
-    def execute(self, str_in, refs):
-        ConM = refs[0]
+    def execute(self, str_in, managers):
+        current_apps = managers["context"].current_context.data["targets"]
+        context_neighbors = managers["context"].context_neighbors
 
-        current_context = ConM.current_context
-        context_data = ConM.context_tracker.entries
+        # "conx -g" pre-warms the apps: they are launched in the background without taking focus
+        pre_warm = "-g" in str_in.split(" ")[1:]
 
         print("Finding context match...")
-        max_score = 0
-        best_candidates = []
-        for context_candidate in context_data:
-            # Award points for context delta
-            score = 100 - ConM.context_tracker.entry_delta(context_candidate, current_context)
-
-            # Award points for having some job to do (otherwise why would the user enter this command?)
-            num_apps_diff = max(0, len(context_candidate["targets"]) - len(current_context["targets"]))
-            score += -(num_apps_diff-3) * (num_apps_diff-3) + num_apps_diff + 16
-
-            if score > max_score:
-                max_score = score
-                best_candidates = context_candidate["targets"]
-
-        best_candidates = [app for app in best_candidates if app not in current_context["targets"]]
-        
+
+        # The context that usually follows this one at this time of day, if it has anything to open
+        best_candidates = managers["context"].predict_next_context()
+        if best_candidates is None or len(best_candidates - current_apps) == 0:
+            # Contexts the user has had open around this time of day before
+            now = datetime.now()
+            habitual = set(item.data["targets"] for item in managers["context"].contexts_between(now - timedelta(minutes = 15), now + timedelta(minutes = 15)))
+
+            max_score = 0
+            best_candidates = frozenset()
+            for candidate_apps, similarity in context_neighbors.nearest(current_apps, k = 25, exclude = current_apps):
+                # Award points for context similarity
+                score = 100 * similarity
+
+                # Award points for having some job to do (otherwise why would the user enter this command?)
+                num_apps_diff = max(0, len(candidate_apps) - len(current_apps))
+                score += -(num_apps_diff-3) * (num_apps_diff-3) + num_apps_diff + 16
+
+                # Award points for habit
+                if candidate_apps in habitual:
+                    score += 10
+
+                if score > max_score:
+                    max_score = score
+                    best_candidates = candidate_apps
+
         # Run apps
-        for app in best_candidates:
+        for app in sorted(best_candidates - current_apps):
             print("Opening " + app + "...")
             command = ["open", app]
+            if pre_warm:
+                command = ["open", "-g", "-j", app]
             subprocess.call(command)
 
     def get_template(self, new_cmd_name):
@@ -5,13 +5,14 @@ Last Updated: Version 0.0.1
 """
 
 from datetime import datetime, timedelta
-import applescript
 import webbrowser
+from tracking_tools.SearchHistory import SearchHistory
+from tracking_tools.Views import AggregateView, TopKView
 
 
 class Command:
     def __init__(self):
-        pass
+        self.history = None
 
     def execute(self, str_in, managers):
         url = "https://www.google.com/search?q="
@@ -24,94 +25,56 @@ class Command:
         self.track_searches(managers["tracking"], query)
 
 
+    def get_history(self, TrackingManager):
+        if self.history is None:
+            # Kept for the whole session, so each search only touches the entries it affects
+            self.history = SearchHistory(TrackingManager.init_tracker("google"))
+            self.register_views(self.history.tracker)
+        elif self.history.tracker.changed_on_disk():
+            self.history.load()
+        return self.history
+
     def track_searches(self, TrackingManager, query):
-        google_tracker = TrackingManager.init_tracker("google")
-        google_tracker.load_data()
+        history = self.get_history(TrackingManager)
 
         now = datetime.now()
         current_time = (now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds()
+        history.record(query, current_time)
 
-        relevant_searches = google_tracker.get_items_containing("targets", query)
-        target_search = google_tracker.new_item([current_time, current_time, 1, [query]])
-        best_candidate = google_tracker.get_best_match(target_search, relevant_searches, ignored_cols = ["start_time", "end_time"])
-        
-        if relevant_searches == [] or best_candidate.data["targets"] != query:
-            # Not an exact match, so add new article
-            google_tracker.add_item(target_search)
-
-        def check_targets(item_1, item_2):
-            score = 0
-            if item_1.data["targets"] == item_2.data["targets"]:
-                score = 1
-
-            return score
-
-        def increment_freq(item_1, item_2):
-            now = datetime.now()
-            current_time = (now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds()
-            item_1.data["frequency"] += 1
-            item_1.data["start_time"] = current_time
-            item_1.data["end_time"] = current_time
-            return item_1
-
-        google_tracker.remove_near_duplicates(compare_method = check_targets, merge_method = increment_freq)
+    def register_views(self, google_tracker):
+        """ Register the aggregate views used by report() on the google tracker. """
+        def query_words(item):
+            return item.data["targets"][0].split(" ")
 
-        # Increment queries more general than the search term with matching words
-        for item in google_tracker.items:
-            for word in target_search.data["targets"]:
-                if item.data["targets"] != [word] and (item.data["targets"][0]+" " in word or " "+item.data["targets"][0] in word):
-                    item.data["frequency"] += 1
+        google_tracker.register_view(TopKView("searches", group_by = lambda item: item.data["targets"][0], weight = "frequency"))
+        google_tracker.register_view(TopKView("terms", group_by = query_words, weight = "frequency"))
+        google_tracker.register_view(AggregateView("search_time", value = "start_time", weight = "frequency"))
+        google_tracker.register_view(AggregateView("query_length", value = lambda item: len(query_words(item)), weight = "frequency"))
 
-        google_tracker.save_data()
-
-    def report(self, TrackingManager):
-        google_tracker = TrackingManager.init_tracker("google")
-        google_tracker.load_data()
+    def report(self, managers):
+        google_tracker = self.get_history(managers["tracking"]).tracker
 
         print("\n--Common Searches--")
         print("Your 10 most common (exact) searches:")
-        common_searches = google_tracker.get_entries(sort=lambda item: -item["frequency"])
-
-        for index, search in enumerate(common_searches):
-            print("[" + str(search.data["frequency"]) + " times]", search.data["targets"][0])
-            if index > 9:
-                break
+        for search, frequency in google_tracker.get_view("searches").top(10):
+            print("[" + str(frequency) + " times]", search)
 
         print("\nFrequent search terms")
-        terms = {}
-        for search in google_tracker.entries:
-            for word in search["targets"][0].split(" "):
-                if word in terms:
-                    terms[word] += search.data["frequency"]
-                else:
-                    terms[word] = search.data["frequency"]
-
-        common_terms = sorted(terms.items(), key=lambda item: -item[1])
-        for index, term in enumerate(common_terms):
-            print("[" + str(term[1]) + " times]", term[0])
-            if index > 9:
-                break
+        for term, frequency in google_tracker.get_view("terms").top(10):
+            print("[" + str(frequency) + " times]", term)
 
 
         print("\n\n--Averages--")
-        num_searches = 0
-        times = []
-        query_lengths = []
-
-        for search in google_tracker.entries:
-            num_searches += int(search.data["frequency"])
-            times.append(float(search.data["start_time"]) * int(search.data["frequency"]))
-            query_lengths.append(len(search.data["targets"][0].split(" ")) * int(search.data["frequency"]))
-        
-        average_search_time = sum(times) / num_searches
-        print("Average search time:", timedelta(seconds=average_search_time))
-
-        average_query_length = sum(query_lengths) / num_searches
-        print("Average query length:", average_query_length)
+        average_search_time = google_tracker.get_view("search_time").mean()
+        if average_search_time is None:
+            print("No searches have been tracked yet.")
+        else:
+            print("Average search time:", timedelta(seconds=average_search_time))
+            print("Average query length:", google_tracker.get_view("query_length").mean())
 
 
-        print("\n\n--Search History--")
-        for search in google_tracker.entries:
+        print("\n\n--Recent Searches--")
+        for search in google_tracker.items[-10:]:
             start_time = search.data["start_time"]
             end_time = search.data["end_time"]
             frequency = search.data["frequency"]
@@ -126,16 +89,7 @@ class Command:
             if "http" in str_in or ".com" in str_in or ".net" in str_in or ".io" in str_in:
                 return 5
 
-            scpt = applescript.AppleScript('''try
-                tell application "Safari"
-                    set tabURL to URL of current tab of the front window
-                end tell
-                return tabURL
-            on error
-                -- blah
-            end try
-            ''')
-            tabURL = scpt.run()
+            tabURL = managers["context"].browser.front_url()
             if tabURL is not None:
                 if "google" in tabURL:
                     return 2
@@ -5,58 +5,101 @@ Last Updated: Version 0.0.1
 """
 
 import subprocess
-from datetime import datetime
+import time
+from tracking_tools.Frecency import FrecencyIndex
 
 
 class Command:
     def __init__(self):
         self.aliases = ["jump", "goto"]
+        self.frecency = None
+        self.frecency_tracker = None
 
     def execute(self, str_in, managers):
-        jump_tracker = managers["tracking"].init_tracker("jump")
-        jump_tracker.load_data()
+        frecency = self.get_frecency(managers)
 
         target_destinations = str_in[2:].split(" ")
-        candidates = jump_tracker.get_items_containing("targets", target_destinations)
-
-        now = datetime.now()
-        current_time = (now - now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds()
-        target_jump = jump_tracker.new_item([current_time, current_time, 1, target_destinations])
-
-        max_freq = 0
-        for item in jump_tracker.items:
-            if item.data["frequency"] > max_freq:
-                max_freq = item.data["frequency"]
+        best_destination = frecency.top(target_destinations)
 
-        def weigh_freq(item_1, item_2):
-            score = jump_tracker.default_compare_method(item_1, item_2)
-            if score < 0.8:
-                score -= (item_2.data["frequency"]) / max_freq
-            return score
-
-        best_candidate = jump_tracker.get_best_match(target_jump, candidates, 0.3, ignored_cols = ["frequency"], compare_method = weigh_freq)
-
-        if best_candidate == None:
-            best_candidate = jump_tracker.new_item([current_time, current_time, 0, target_destinations])
-            jump_tracker.add_item(best_candidate)
+        destinations = target_destinations
+        if best_destination is not None:
+            destinations = [best_destination]
 
         # Run apps
-        for dest in best_candidate.data["targets"]:
+        for dest in destinations:
             print("Jumping to " + dest + "...")
             command = ["open", dest]
             completion = subprocess.call(command)
 
             if completion == 0:
-                # If successful, update the CSV with new frequencies
-                best_candidate.data["start_time"] += (current_time - best_candidate.data["start_time"]) * 0.01
-                best_candidate.data["end_time"] += (current_time - best_candidate.data["end_time"]) * 0.01
-                best_candidate.data["frequency"] += 1
+                frecency.visit(dest)
+            elif dest in frecency:
+                print("Found broken jump point, removing.")
+                frecency.remove(dest)
             else:
-                if (best_candidate.data["frequency"] != 0):
-                    print("Found broken jump point, removing.")
-                jump_tracker.items.remove(best_candidate)
-        
-        jump_tracker.save_data()
+                continue
+            self.save_destination(dest)
+
+    def get_frecency(self, managers):
+        """ Load the jump frecency index, once per session. """
+        if self.frecency is not None:
+            return self.frecency
+
+        item_structure = {
+            "destination" : str,
+            "score" : float,
+            "visits" : int,
+            "last_visit" : float,
+        }
+
+        self.frecency = FrecencyIndex()
+        self.frecency_tracker = managers["tracking"].tracker("jump_frecency", item_structure = item_structure)
+        self.frecency_tracker.load_data()
+
+        if len(self.frecency_tracker.items) == 0:
+            self.import_jump_tracker(managers)
+        else:
+            # Rows are appended as destinations change, so later rows supersede earlier ones
+            for item in self.frecency_tracker.items:
+                if item.data["visits"] == 0:
+                    self.frecency.remove(item.data["destination"])
+                else:
+                    self.frecency.set(item.data["destination"], item.data["score"], item.data["visits"], item.data["last_visit"])
+
+            if len(self.frecency_tracker.items) > 2 * len(self.frecency) + 100:
+                self.compact()
+
+        self.frecency_tracker.clear_items()
+        return self.frecency
+
+    def import_jump_tracker(self, managers):
+        """ Seed the frecency index from the original jump tracker's frequencies. """
+        jump_tracker = managers["tracking"].init_tracker("jump")
+        jump_tracker.load_data()
+
+        now = time.time()
+        for item in jump_tracker.items:
+            for dest in item.data["targets"]:
+                if item.data["frequency"] > 0 and dest != "":
+                    self.frecency.visit(dest, now, item.data["frequency"])
+
+        if len(self.frecency) > 0:
+            self.compact()
+
+    def save_destination(self, dest):
+        """ Append a destination's current score (or its removal) to the frecency file. """
+        if dest in self.frecency:
+            row = [dest, self.frecency.scores[dest], self.frecency.visits[dest], self.frecency.last_visits[dest]]
+        else:
+            row = [dest, 0, 0, 0]
+        self.frecency_tracker.append_data([self.frecency_tracker.new_item(row)])
+
+    def compact(self):
+        """ Rewrite the frecency file with one row per destination. """
+        self.frecency_tracker.clear_items()
+        for dest in self.frecency.scores:
+            self.frecency_tracker.add_item(self.frecency_tracker.new_item([dest, self.frecency.scores[dest], self.frecency.visits[dest], self.frecency.last_visits[dest]]))
+        self.frecency_tracker.save_data()
 
     def handler_checker(self, str_in, managers):
         if "Finder" in managers["context"].current_app:
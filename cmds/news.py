@@ -8,10 +8,12 @@ import webbrowser
 import random
 import pdfkit
 from datetime import datetime
+from net_tools.Exports import ExportPipeline, default_pdf_merger
 
 
 class Command:
     def __init__(self):
+        self.export_urls = []
         self.sources = [
             "https://www.nytimes.com",
             "https://www.huffpost.com",
@@ -55,6 +57,7 @@ class Command:
         if "export" in cmd_args:
             export = True
             cmd_args.remove("export")
+            self.export_urls = []
 
         if "latest" in cmd_args:
             if len(cmd_args) == 2 and cmd_args[1] == "all":
@@ -112,15 +115,30 @@ class Command:
                     for topic in topics:
                         self.open_url(url+topic, 2, export, managers)
 
+        if export:
+            self.export(self.export_urls, managers)
+
     def open_url(self, url, tabmode, export, managers):
         if export:
-            now = datetime.now()
-            filename = "NEWS-"+now.strftime("%B-%d-%Y")
-            file_path = managers["config"].get("aria_path")+"/docs/"+filename+".pdf"
-            pdfkit.from_url(url, file_path)
+            # Collected and rendered together by export()
+            self.export_urls.append(url)
         else:
             webbrowser.open(url, new=tabmode)
 
+    def export(self, urls, managers, render = None):
+        """ Export pages to PDFs in Aria's docs folder, one per source plus a merged NEWS-<date>.pdf. """
+        pipeline = ExportPipeline(
+            managers["config"].get("aria_path")+"/docs/",
+            render if render is not None else pdfkit.from_url,
+            workers = managers["config"].get("news_export_workers", 8),
+            merge = default_pdf_merger(),
+        )
+        prefix = "NEWS-"+datetime.now().strftime("%B-%d-%Y")
+        file_paths = pipeline.export(urls, prefix)
+        for file_path in file_paths:
+            print("Exported", file_path)
+        return file_paths
+
     def handler_checker(self, str_in, managers):
         if str_in.endswith("news"):
             return 3
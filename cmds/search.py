@@ -1,42 +1,52 @@
 """
-Jump
+Search
 
 Last Updated: March 10, 2021
 """
 
-import os
-import csv
-import datetime
-import requests
-from bs4 import BeautifulSoup
-from pathlib import Path
+import webbrowser
+from net_tools.SearchForms import SearchTemplateCache, fill_template
 
 
 class Command:
     def __init__(self, *args, **kwargs):
-        self.aria_path = args[0]
-
-    def execute(self, str_in, context):
-        print("Finding search link...")
+        self.cache = None
 
+    def execute(self, str_in, managers):
         strs = str_in.split()
-        site = strs[1]
-
-        search_url = self.find_search_url(site)
-        print(search_url)
-
-    def find_search_url(self, base_site):
-        html_text = requests.get(base_site).text
-        soup = BeautifulSoup(html_text, 'html.parser')
+        if len(strs) < 2:
+            print("Enter a site and a query, e.g. search wikipedia.org grace hopper")
+            return
 
-        print(html_text)
-
-        input_fields = soup.find_all('form')
-
-        for field in input_fields:
-            print(field.action)
-
-        return 'hi'
+        site = strs[1]
+        if "://" not in site:
+            site = "https://" + site
+        query = " ".join(strs[2:])
+
+        try:
+            search_url = self.find_search_url(site, managers)
+        except OSError as error:
+            print("Could not load " + site + ":", error)
+            return
+
+        if search_url is None:
+            print("Could not find a search form on " + site + ".")
+        elif query == "":
+            print(search_url)
+        else:
+            # Open url in new tab (1=window, 2=tab)
+            webbrowser.open(fill_template(search_url, query), new=2)
+
+    def find_search_url(self, base_site, managers):
+        if self.cache is None:
+            # Kept for the whole session; the file lets later sessions skip fetching known sites
+            cache_path = managers["config"].get("aria_path") + "/data/search_forms.json"
+            ttl = managers["config"].get("search_form_cache_days", 30) * 24 * 60 * 60
+            self.cache = SearchTemplateCache(cache_path, ttl = ttl)
+
+        if self.cache.get(base_site) is None:
+            print("Finding search link...")
+        return self.cache.find(base_site)
 
     def get_template(self, new_cmd_name):
         # TODO: Fix this or remove it
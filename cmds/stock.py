@@ -4,7 +4,6 @@ Stocks
 Last Updated: Version 0.0.1
 """
 
-import applescript
 import webbrowser
 
 
@@ -25,22 +24,12 @@ class Command:
             webbrowser.open(url+stock, new=2)
 
     def handler_checker(self, str_in, managers):
-        scpt = applescript.AppleScript('''try
-                    tell application "Safari"
-                        set tabURL to URL of current tab of the front window
-                    end tell
-                    return tabURL
-                on error
-                    -- blah
-                end try
-        ''')
-        tabURL = scpt.run()
-
         score = 0
         if "Stocks" in managers["context"].current_app:
             score = 2
 
         if "Safari" in managers["context"].current_app:
+            tabURL = managers["context"].browser.front_url()
             if tabURL is not None and "finance.yahoo" in tabURL:
                 score = 4
 
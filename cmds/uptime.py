@@ -1,66 +1,167 @@
 """
-Update
+Uptime
 
 Last Updated: February 24, 2022
 """
 
-import subprocess
-import webbrowser
-from datetime import datetime, timedelta
-import urllib.request
+from net_tools.Monitoring import UptimeMonitor, UPTIME_SUMMARY_STRUCTURE
+from net_tools.Uptime import UptimeChecker, UPTIME_STRUCTURE, record_results, register_uptime_views
 
 
 class Command:
     def __init__(self, *args, **kwargs):
-        pass
+        self.checker = None
+        self.tracker = None
+        self.monitor = None
 
-    def execute(self, str_in, refs):
-        query = str_in[7:]
-        if "http://" not in query:
-            query = "http://" + query
+    def execute(self, str_in, managers):
+        args = [arg for arg in str_in[7:].split(" ") if arg != ""]
+        if len(args) > 0 and args[0] == "monitor":
+            self.add_monitors(args[1:], managers)
+            return
+        elif len(args) > 0 and args[0] == "unmonitor":
+            self.remove_monitors(args[1:], managers)
+            return
+        elif len(args) > 0 and args[0] == "monitors":
+            self.report_monitors(managers)
+            return
 
-        status = 0
-        try:
-            status = urllib.request.urlopen(query).getcode()
-        except Exception as e:
-            pass
-
-        if status == 200:
-            print(query, "is UP")
-        else:
-            print(query, "is DOWN")
-
-        # Track uptime
-        def tracking_method(site, target_site, current_score):
-            uptime_freq = int(site["frequency"])
-            num_decimal_places = 0
-            total_freq = 2
-
-            if site["targets"][0] == query and site["frequency"] != 1:
-                num_decimal_places = len(str(site["frequency"]).split(".")[1])
-                total_freq = int(round(site["frequency"] % 1, num_decimal_places) * 10 ** num_decimal_places) + 1
-
-            if site["targets"][0] == query:
-                # Exact match
-                if status == 200:
-                    uptime_freq += 1
-                percent = uptime_freq / total_freq * 100
-                print("The site has been up " + str(percent) + "% of the time.\n")
-                tracking_method.first_check = 0
-
-            if status != 200:
-                target_site["frequency"] = 0.1
-
-            if tracking_method.first_check == 1:
+        urls = self.parse_urls(args)
+
+        if len(urls) == 0:
+            print("Enter one or more sites to check, e.g. uptime example.com example.org")
+            return
+
+        uptime_tracker = self.get_tracker(managers)
+        results = self.get_checker(managers).check_all(urls)
+        record_results(uptime_tracker, results)
+
+        availability = uptime_tracker.get_view("availability")
+        latency = uptime_tracker.get_view("latency")
+        for result in results:
+            if result.up:
+                print(result.url, "is UP (" + str(result.status) + ", " + str(round(result.latency * 1000)) + " ms)")
+            else:
+                print(result.url, "is DOWN (" + (result.error or str(result.status)) + ")")
+
+            checks = availability.count(result.url)
+            if checks == 1:
                 print("This site has not been checked before.\n")
-                tracking_method.first_check = 0
+            else:
+                message = "The site has been up " + str(round(availability.mean(result.url) * 100, 1)) + "% of " + str(checks) + " checks"
+                if latency.mean(result.url) is not None:
+                    message += ", averaging " + str(round(latency.mean(result.url) * 1000)) + " ms"
+                print(message + ".\n")
+
+    def parse_urls(self, args):
+        urls = []
+        for query in args:
+            if "://" not in query:
+                query = "http://" + query
+            urls.append(query)
+        return urls
+
+    def get_checker(self, managers):
+        if self.checker is None:
+            # Kept for the whole session, so repeated checks reuse open connections
+            self.checker = UptimeChecker(timeout = managers["config"].get("uptime_timeout", 5))
+        return self.checker
+
+    def get_tracker(self, managers):
+        if self.tracker is None:
+            # Kept for the whole session, so each check appends its rows instead of reloading the history
+            self.tracker = managers["tracking"].init_tracker("uptime_checks", UPTIME_STRUCTURE)
+            register_uptime_views(self.tracker)
+            self.tracker.load_data()
+        elif self.tracker.changed_on_disk():
+            self.tracker.load_data()
+        return self.tracker
+
+    def schedule(self, managers):
+        """ Start background checks of the sites listed under uptime_monitors in the config. """
+        monitors = managers["config"].get("uptime_monitors", {})
+        if len(monitors) == 0:
+            return
+
+        for url, value in monitors.items():
+            interval = self.parse_interval(value)
+            if interval is None:
+                print("Not monitoring", url + ": its interval in uptime_monitors must be a positive number of seconds, not", repr(value))
+                continue
+            self.start_monitor(url, interval, managers)
+
+    def parse_interval(self, value):
+        """ Get a number of seconds from a config value or argument, or None if it is not a positive number. """
+        if isinstance(value, bool):
+            return None
+        try:
+            interval = float(value)
+        except (TypeError, ValueError):
+            return None
+        return interval if interval > 0 else None
+
+    def get_monitor(self, managers):
+        if self.monitor is None:
+            uptime_tracker = managers["tracking"].init_tracker("uptime_summaries", UPTIME_SUMMARY_STRUCTURE)
+            self.monitor = UptimeMonitor(self.get_checker(managers), uptime_tracker)
+
+            flush_seconds = self.parse_interval(managers["config"].get("uptime_flush_seconds", 300))
+            if flush_seconds is None:
+                print("uptime_flush_seconds must be a positive number of seconds; using 300.")
+                flush_seconds = 300
+            # Summaries are saved in batches, so checking many sites often costs one write per flush
+            managers["scheduler"].every("uptime:flush", flush_seconds, self.monitor.flush)
+        return self.monitor
+
+    def start_monitor(self, url, interval, managers):
+        monitor = self.get_monitor(managers)
+        monitor.add(url)
+        managers["scheduler"].every("uptime:" + url, interval, lambda: monitor.check(url), run_now = True)
+
+    def add_monitors(self, args, managers):
+        interval = 60
+        if "every" in args:
+            index = args.index("every")
+            interval = self.parse_interval(args[index + 1]) if index + 1 < len(args) else None
+            if interval is None:
+                print("Enter the seconds between checks after every, e.g. uptime monitor example.com every 60")
+                return
+            args = args[:index] + args[index + 2:]
+
+        if len(args) == 0:
+            print("Enter one or more sites to monitor, e.g. uptime monitor example.com every 60")
+            return
+
+        monitors = dict(managers["config"].get("uptime_monitors", {}))
+        for url in self.parse_urls(args):
+            monitors[url] = interval
+            self.start_monitor(url, interval, managers)
+            print("Monitoring", url, "every", interval, "seconds.")
+        managers["config"].set("uptime_monitors", monitors)
+
+    def remove_monitors(self, args, managers):
+        monitors = dict(managers["config"].get("uptime_monitors", {}))
+        for url in self.parse_urls(args):
+            monitors.pop(url, None)
+            managers["scheduler"].cancel("uptime:" + url)
+            if self.monitor is not None:
+                self.monitor.remove(url)
+            print("Stopped monitoring", url + ".")
+        managers["config"].set("uptime_monitors", monitors)
 
-            updated_freq = float(str(uptime_freq) + "." + str(total_freq))
-            site["frequency"] = updated_freq
-            tracking_method.first_iter = 0
-            return current_score
+    def report_monitors(self, managers):
+        monitors = managers["config"].get("uptime_monitors", {})
+        if len(monitors) == 0:
+            print("No sites are being monitored. Start with: uptime monitor example.com every 60")
+            return
 
-        tracking_method.first_check = 1
+        for url, interval in monitors.items():
+            summary = None if self.monitor is None else self.monitor.summary(url)
+            if summary is None or summary["checks"] == 0:
+                print(url, "(every " + str(interval) + " s): not checked yet")
+                continue
 
-        TrackM = refs[1]
-        TrackM.run_basic_tracker("uptime", query, tracking_method)
\ No newline at end of file
+            message = url + " (every " + str(interval) + " s): up " + str(round(summary["availability"] * 100, 1)) + "% of the last " + str(summary["checks"]) + " checks"
+            if summary["latency_p50"] is not None:
+                message += ", p50 " + str(round(summary["latency_p50"] * 1000)) + " ms, p95 " + str(round(summary["latency_p95"] * 1000)) + " ms"
+            print(message)
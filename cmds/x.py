@@ -4,53 +4,184 @@ x
 Last Updated: Version 0.0.1
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+# Inputs that parse_input handles itself rather than routing to a plugin
+META_PREFIXES = ("make ", "enable plugin ", "disable plugin ", "report ", "help ")
+
+
+class PlanStep:
+    """ One command of an execution plan, with its plugin looked up in advance. """
+    def __init__(self, text, cmd_name, plugin, concurrent):
+        self.text = text
+        self.cmd_name = cmd_name
+        self.plugin = plugin
+        self.concurrent = concurrent
+
+
+class ExecutionPlan:
+    """
+    An exec pathway compiled into steps. Consecutive steps marked with a leading * are
+    independent of each other and run concurrently; other steps run one at a time, in order.
+    Plugins are not assumed to be thread-safe, so concurrent steps of the same plugin still run
+    one after another.
+    """
+    def __init__(self, name, targets, steps, generation):
+        self.name = name
+        self.targets = list(targets)
+        self.steps = steps
+        self.generation = generation
+
+        # Group the steps into batches, each either one ordered step or a run of concurrent steps
+        self.batches = []
+        for step in steps:
+            if step.concurrent and len(self.batches) > 0 and self.batches[-1][0].concurrent:
+                self.batches[-1].append(step)
+            else:
+                self.batches.append([step])
+
+    @staticmethod
+    def compile(name, targets, command_manager):
+        """
+        Compile a pathway's targets, or return None if a step can only be routed at run time (e.g. by a handler checker).
+        """
+        steps = []
+        for target in targets:
+            text = target.strip()
+            concurrent = text.startswith("*")
+            if concurrent:
+                text = text[1:].strip()
+
+            if text == "q" or text.startswith(META_PREFIXES):
+                return None
+            cmd_name = command_manager.resolve_command(text)
+            with command_manager.lock:
+                plugin = command_manager.plugins.get(cmd_name)
+            if plugin is None:
+                return None
+            steps.append(PlanStep(text, cmd_name, plugin, concurrent))
+        return ExecutionPlan(name, targets, steps, command_manager.generation)
+
+    def run(self, managers):
+        """
+        Run each step's plugin directly, skipping the routing done by parse_input.
+
+        Returns:
+            [str] - Commands returned by steps as "run ..." feedback, to be run afterwards.
+        """
+        feedback = []
+        for batch in self.batches:
+            # Steps sharing a plugin instance (and so its trackers) run in order on one worker
+            groups = {}
+            for step in batch:
+                groups.setdefault(id(step.plugin), []).append(step)
+
+            if len(groups) == 1:
+                results = self.run_steps(batch, managers)
+            else:
+                with ThreadPoolExecutor(max_workers = len(groups)) as executor:
+                    futures = [executor.submit(self.run_steps, steps, managers) for steps in groups.values()]
+                    step_results = {}
+                    for steps, future in zip(groups.values(), futures):
+                        for step, data in zip(steps, future.result()):
+                            step_results[id(step)] = data
+                results = [step_results[id(step)] for step in batch]
+
+            for data in results:
+                if type(data) is str and data.startswith("run "):
+                    feedback.append(data[4:])
+        return feedback
+
+    @staticmethod
+    def run_steps(steps, managers):
+        """ Run steps one at a time, returning their results in order. """
+        return [step.plugin.execute(step.text, managers) for step in steps]
+
+
 class Command:
     def __init__(self, ):
         self.force_context = False
         self.exec_tracker = None
-
-    def execute(self, str_in, managers):
-        item_structure = {
-            "name" : str,
-            "time" : float,
-            "frequency" : int,
-            "targets" : list,
-        }
-
-        self.exec_tracker = managers["tracking"].tracker(
-            "exec",
-            item_structure = item_structure,
-            data_source = self.parse_target,
-            merge_method = self.increment_freq
-        )
+        self.pathways = {}
+        self.plans = {}
+
+    def load_pathways(self, managers):
+        """ Load the exec tracker once per session, or again if it was changed by something else. """
+        if self.exec_tracker is None:
+            item_structure = {
+                "name" : str,
+                "time" : float,
+                "frequency" : int,
+                "targets" : list,
+            }
+
+            self.exec_tracker = managers["tracking"].tracker(
+                "exec",
+                item_structure = item_structure,
+                data_source = self.parse_target,
+                merge_method = self.increment_freq
+            )
+        elif not self.exec_tracker.changed_on_disk():
+            return
 
         self.exec_tracker.load_data()
+        self.pathways = {}
+        self.plans = {}
+        for item in self.exec_tracker.items:
+            self.pathways.setdefault(item.data["name"], item)
+
+    def find_pathway(self, name, targets):
+        """ Get the pathway with a name, or else the pathway with exactly the given targets. """
+        if name in self.pathways:
+            return self.pathways[name]
+        for item in self.pathways.values():
+            if item.data["targets"] == targets:
+                return item
+        return None
+
+    def get_plan(self, pathway, managers):
+        """ Get the cached plan for a pathway, compiling it if the pathway or the loaded plugins changed since it was compiled. """
+        name = pathway.data["name"]
+        plan = self.plans.get(name)
+        if plan is None or plan.targets != pathway.data["targets"] or plan.generation != managers["command"].generation:
+            plan = ExecutionPlan.compile(name, pathway.data["targets"], managers["command"])
+            self.plans[name] = plan
+        return plan
 
-        targets = str_in[2:].split(" ")
+    def execute(self, str_in, managers):
+        self.force_context = False
+        self.load_pathways(managers)
         data = self.parse_target(str_in)
-
-        candidates = self.exec_tracker.get_items_containing("targets", targets)
-        candidates += self.exec_tracker.get_items_containing("name", data[0])
-
-        target = self.exec_tracker.new_item(data)
-        best_candidate = self.exec_tracker.get_best_match(target, candidates, 0, compare_method = self.compare_method)
-
-        if best_candidate == None:
-            best_candidate = target
-            print("New exec pathway:", best_candidate.data["name"], "->", best_candidate.data["targets"])
-            self.exec_tracker.add_item(best_candidate)
+        name, targets = data[0], data[3]
+
+        pathway = self.find_pathway(name, targets)
+        if pathway is None:
+            pathway = self.exec_tracker.new_item(data)
+            print("New exec pathway:", pathway.data["name"], "->", pathway.data["targets"])
+            self.exec_tracker.add_item(pathway)
+            self.pathways[name] = pathway
+            self.exec_tracker.save_changes()
+        elif " --name=" in str_in and targets != pathway.data["targets"]:
+            # Redefining a named pathway replaces its steps, which invalidates its plan
+            self.exec_tracker.update_item(pathway, {"targets": targets})
+            print("Updated exec pathway:", pathway.data["name"], "->", pathway.data["targets"])
+            self.exec_tracker.save_changes()
         else:
-            print("Existing exec pathway:", best_candidate.data["name"], "->", best_candidate.data["targets"])
-        
-        self.exec_tracker.save_data()
+            print("Existing exec pathway:", pathway.data["name"], "->", pathway.data["targets"])
 
         if self.force_context:
             managers["context"].blank_context()
 
-        return_cmd = "run"
-        return return_cmd + " " + best_candidate.data["targets"].replace("|", " && ")
+        plan = self.get_plan(pathway, managers)
+        if plan is None:
+            # Some step needs the full routing path, so let parse_input run the pathway
+            targets = [target.strip().lstrip("*").strip() for target in pathway.data["targets"]]
+            return "run " + " && ".join(targets)
+
+        feedback = plan.run(managers)
+        if len(feedback) > 0:
+            return "run " + " && ".join(feedback)
 
     def increment_freq(self, item_1, item_2):
         item_1.data["frequency"] += 1
@@ -107,4 +238,4 @@ class Command:
         return template
 
     def get_help(self):
-        return "x [cmd 1] & [cmd 2] & ... --name=[name] -fc"
+        return "x [cmd 1] & [cmd 2] & ... --name=[name] -fc (prefix commands with * to run them concurrently)"
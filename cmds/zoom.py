@@ -4,10 +4,22 @@ Zoom
 Last Updated: Version 0.0.1
 """
 
-import applescript
-
 
 class Command:
+    SCRIPT = '''
+        on run {appPath, direction}
+            try
+                tell application appPath
+                    activate
+                    delay 0.1
+                    tell application "System Events" to keystroke direction using command down
+                end tell
+            on error
+                -- blah
+            end try
+        end run
+    '''
+
     def __init__(self):
         self.aliases = ["z"]
 
@@ -19,18 +31,7 @@ class Command:
             print("yuh")
             direction = "0"
 
-        scpt = applescript.AppleScript('''
-            try
-                tell application "''' + managers["context"].current_app + '''"
-                    activate
-                    delay 0.1
-                    tell application "System Events" to keystroke "''' + direction + '''" using command down
-                end tell
-            on error
-                -- blah
-            end try
-        ''')
-        scpt.run()
+        managers["context"].scripts.run(self.SCRIPT, managers["context"].current_app, direction)
 
     def get_template(self, new_cmd_name):
         print("Enter base command and args: ")
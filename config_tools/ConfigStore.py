@@ -0,0 +1,182 @@
+"""
+Crash-safe, batched persistence for Aria's config file.
+
+Every change is appended to a small journal file straight away, and the full config is rewritten
+once changes stop arriving for a short delay. The config file is always replaced atomically
+(written to a temporary file and renamed), so a crash can never leave it truncated, and changes
+still in the journal are replayed the next time the config is loaded.
+
+Typical usage example:
+    store = ConfigStore("aria_config.json", lambda: config)
+    config = store.load()
+    config["user_name"] = "Ada"
+    store.record(["user_name"], "Ada")
+"""
+
+import atexit
+import json
+import os
+import stat
+import tempfile
+import threading
+
+# The mode a new config file gets from open(), read once since os.umask can only be read by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class ConfigStore:
+    """
+    A debounced, atomic writer for a JSON config file with an append-only change journal.
+    """
+    def __init__(self, path, get_config, delay = 0.5, fsync = False, lock = None):
+        """
+        Parameters:
+            path : str - The config file.
+            get_config : callable - Returns the config dictionary to write.
+            delay : float - Seconds without changes to wait before rewriting the config file.
+            fsync : boolean - Whether to flush writes through to the disk before renaming.
+            lock : threading.RLock - Optional lock held by everything that changes the config, so that it is never written mid-change. Defaults to a lock of the store's own.
+        """
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.get_config = get_config
+        self.delay = delay
+        self.fsync = fsync
+        self.writes = 0
+        self.pending = 0
+        self.written_stat = None
+
+        self._lock = lock if lock is not None else threading.RLock()
+        self._timer = None
+        atexit.register(self.flush)
+
+    def load(self):
+        """
+        Reads the config file and replays any journaled changes that were not yet written to it.
+
+        Returns:
+            dict - The config, or None if the config file does not exist or cannot be read.
+        """
+        try:
+            with open(self.path, "r") as cfg_file:
+                config = json.load(cfg_file)
+        except (OSError, ValueError):
+            return None
+
+        if self.replay_journal(config) > 0:
+            self.write(config)
+        return config
+
+    def replay_journal(self, config):
+        """
+        Applies the journaled changes to a config dictionary.
+
+        Returns:
+            int - The number of changes applied.
+        """
+        replayed = 0
+        with self._lock:
+            try:
+                with open(self.journal_path, "r") as journal_file:
+                    for line in journal_file:
+                        try:
+                            change = json.loads(line)
+                        except ValueError:
+                            # A change cut off by a crash mid-append was never acknowledged
+                            break
+                        set_path(config, change["path"], change["value"])
+                        replayed += 1
+            except OSError:
+                pass
+        return replayed
+
+    def record(self, path, value):
+        """
+        Journals a change and schedules a rewrite of the config file.
+
+        Parameters:
+            path : [str] - The keys leading to the changed value, e.g. ["plugins", "google", "enabled"].
+            value : Object - The new json-serializable value.
+        """
+        with self._lock:
+            with open(self.journal_path, "a") as journal_file:
+                journal_file.write(json.dumps({"path": path, "value": value}) + "\n")
+                if self.fsync:
+                    journal_file.flush()
+                    os.fsync(journal_file.fileno())
+            self.pending += 1
+
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Writes any journaled changes to the config file now."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self.pending > 0:
+                self.write(self.get_config())
+
+    def write(self, config):
+        """
+        Atomically replaces the config file and clears the journal.
+
+        Returns:
+            boolean - True if the config file was written, False otherwise.
+        """
+        with self._lock:
+            # Serialized up front, so the config is read in one go while the lock keeps it from changing
+            try:
+                text = json.dumps(config, indent = 4, sort_keys = True)
+            except (TypeError, ValueError):
+                return False
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            temp_path = None
+            try:
+                fd, temp_path = tempfile.mkstemp(prefix = ".aria_config-", dir = directory)
+                # mkstemp creates the file readable by its owner only, and os.replace would carry that over
+                try:
+                    os.chmod(temp_path, stat.S_IMODE(os.stat(self.path).st_mode))
+                except FileNotFoundError:
+                    os.chmod(temp_path, 0o666 & ~_UMASK)
+                with os.fdopen(fd, "w") as temp_file:
+                    temp_file.write(text)
+                    if self.fsync:
+                        temp_file.flush()
+                        os.fsync(temp_file.fileno())
+                os.replace(temp_path, self.path)
+                temp_path = None
+                written = os.stat(self.path)
+                self.written_stat = (written.st_mtime_ns, written.st_size)
+            except OSError:
+                return False
+            finally:
+                # Only left over if the config file was not replaced
+                if temp_path is not None:
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+
+            try:
+                os.remove(self.journal_path)
+            except OSError:
+                pass
+            self.pending = 0
+            self.writes += 1
+            return True
+
+
+def set_path(config, path, value):
+    """Sets a value in nested dictionaries, creating intermediate dictionaries as needed."""
+    for key in path[:-1]:
+        if not isinstance(config.get(key), dict):
+            config[key] = {}
+        config = config[key]
+    config[path[-1]] = value
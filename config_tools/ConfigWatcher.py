@@ -0,0 +1,92 @@
+"""
+Watches Aria's config file for edits made outside Aria and hands each new version, parsed and
+validated on the watcher's own thread, to a callback.
+
+Typical usage example:
+    watcher = ConfigWatcher("aria_config.json", lambda config: print(config["user_name"]))
+    watcher.start()
+"""
+
+import json
+import os
+import threading
+
+
+class ConfigWatcher:
+    """
+    Polls a JSON config file's modification time and size, and reports valid new versions.
+    """
+    def __init__(self, path, on_change, interval = 1, validate = None, ignore = None):
+        """
+        Parameters:
+            path : str - The config file to watch.
+            on_change : callable - Called as on_change(config) with each new, valid config.
+            interval : float - Seconds between checks.
+            validate : callable - Optional check called as validate(config), returning a list of problems (empty if the config is valid).
+            ignore : callable - Optional check called as ignore(stat) with a (mtime_ns, size) pair, returning True for versions that should not be reported, e.g. ones Aria wrote itself.
+        """
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.validate = validate
+        self.ignore = ignore
+        self.reloads = 0
+        self.rejected = 0
+
+        self._last_stat = self._stat()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def start(self):
+        """Starts watching on a background thread."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch, name="ConfigWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops watching."""
+        self._stop_event.set()
+
+    def _watch(self):
+        while not self._stop_event.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """
+        Checks the config file once, reporting it if it has changed and is valid.
+
+        Returns:
+            boolean - True if a new config was reported, False otherwise.
+        """
+        stat = self._stat()
+        if stat is None or stat == self._last_stat:
+            return False
+        self._last_stat = stat
+        if self.ignore is not None and self.ignore(stat):
+            return False
+
+        try:
+            with open(self.path, "r") as cfg_file:
+                config = json.load(cfg_file)
+        except (OSError, ValueError) as error:
+            # Probably caught mid-edit; the finished edit will change the stat again
+            print("Ignoring unreadable config change:", error)
+            self.rejected += 1
+            return False
+
+        problems = [] if self.validate is None else self.validate(config)
+        if len(problems) > 0:
+            print("Ignoring invalid config change:", "; ".join(problems))
+            self.rejected += 1
+            return False
+
+        self.reloads += 1
+        self.on_change(config)
+        return True
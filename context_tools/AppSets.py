@@ -0,0 +1,84 @@
+"""
+Interned app sets for context snapshots.
+
+Every distinct set of running apps is stored once, as a frozenset, so that equal contexts are
+the same object and can be compared by identity. Each app is also given a bit index, so that
+a set can be used as an integer bitset when many sets need comparing.
+
+Typical usage example:
+    app_sets = AppSetInterner()
+    context_1 = app_sets.intern(["/Applications/Safari.app", "/Applications/Mail.app"])
+    context_2 = app_sets.intern(["/Applications/Mail.app", "/Applications/Safari.app"])
+    context_1 is context_2  # True
+"""
+
+
+def jaccard(set_1, set_2):
+    """Returns the Jaccard similarity (0-1) of two sets."""
+    if len(set_1) == 0 and len(set_2) == 0:
+        return 1
+    return len(set_1 & set_2) / len(set_1 | set_2)
+
+
+class AppSetInterner:
+    """
+    A table of canonical app sets.
+    """
+    def __init__(self):
+        self.sets = {}
+        self.app_ids = {}
+        self.apps = []
+        self._bits = {}
+
+    def __len__(self):
+        return len(self.sets)
+
+    def intern(self, apps):
+        """
+        Returns the canonical frozenset for a collection of apps.
+
+        Parameters:
+            apps : iterable - App filepaths, in any order and possibly repeated.
+
+        Returns:
+            frozenset - The canonical set, identical (is) to any previous result for the same apps.
+        """
+        key = apps if isinstance(apps, frozenset) else frozenset(apps)
+        canonical = self.sets.get(key)
+        if canonical is None:
+            canonical = key
+            self.sets[key] = key
+            for app in key:
+                self.app_id(app)
+        return canonical
+
+    def app_id(self, app):
+        """Returns the bit index assigned to an app, assigning the next one if necessary."""
+        app_id = self.app_ids.get(app)
+        if app_id is None:
+            app_id = len(self.apps)
+            self.app_ids[app] = app_id
+            self.apps.append(app)
+        return app_id
+
+    def bits(self, app_set):
+        """Returns an app set as an integer with one bit set per app."""
+        app_set = self.intern(app_set)
+        mask = self._bits.get(app_set)
+        if mask is None:
+            mask = 0
+            for app in app_set:
+                mask |= 1 << self.app_ids[app]
+            self._bits[app_set] = mask
+        return mask
+
+    def from_bits(self, mask):
+        """Returns the canonical app set for an integer bitset."""
+        apps = []
+        app_id = 0
+        while mask:
+            if mask & 1:
+                apps.append(self.apps[app_id])
+            mask >>= 1
+            app_id += 1
+        return self.intern(apps)
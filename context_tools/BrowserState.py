@@ -0,0 +1,131 @@
+"""
+Browser state shared by the command plugins that inspect the front browser tab. The URL of the
+front tab is read at most once per input (and at most once per TTL), however many handler
+checkers ask for it.
+
+Typical usage example:
+    browser = BrowserStateProvider(default_browser_backend(scripts))
+    browser.begin_input()
+    if "google" in (browser.front_url() or ""):
+        print("On Google")
+"""
+
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class BrowserBackend(ABC):
+    """
+    An abstract reader of browser state.
+    """
+    @abstractmethod
+    def read_front_url(self):
+        """
+        Reads the URL of the front browser tab.
+
+        Returns:
+            str - The URL, or None if there is no browser window or it cannot be read.
+        """
+
+
+class AppleScriptBrowserBackend(BrowserBackend):
+    """
+    Reads the front Safari tab on macOS through a ScriptCache, so the script is compiled once.
+    """
+    SCRIPT = '''
+        try
+            tell application "Safari"
+                set tabURL to URL of current tab of the front window
+            end tell
+            return tabURL
+        on error
+            -- blah
+        end try
+    '''
+
+    def __init__(self, scripts):
+        """
+        Parameters:
+            scripts : ScriptCache - The cache to run the script through.
+        """
+        self.scripts = scripts
+
+    def read_front_url(self):
+        return self.scripts.run(self.SCRIPT)
+
+
+class StubBrowserBackend(BrowserBackend):
+    """
+    A browser backend that reports a URL set by hand, for tests and platforms without Safari.
+    """
+    def __init__(self, url = None):
+        self.url = url
+
+    def read_front_url(self):
+        return self.url
+
+
+class BrowserStateProvider:
+    """
+    Caches browser state for the duration of one input, or for ttl seconds, whichever is shorter.
+    """
+    def __init__(self, backend, ttl = 2, clock = time.monotonic):
+        """
+        Parameters:
+            backend : BrowserBackend - The reader of browser state.
+            ttl : float - The maximum number of seconds a read is reused for.
+            clock : callable - Returns the current time in seconds.
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.clock = clock
+        self.reads = 0
+        self.hits = 0
+
+        self._lock = threading.Lock()
+        self._url = None
+        self._read_at = None
+
+    def begin_input(self):
+        """Discards cached state, so that the next request reads the browser again."""
+        with self._lock:
+            self._read_at = None
+
+    def front_url(self):
+        """
+        Returns the URL of the front browser tab, reading the backend only if the cached URL is stale.
+
+        Returns:
+            str - The URL, or None if it could not be read.
+        """
+        with self._lock:
+            now = self.clock()
+            if self._read_at is not None and now - self._read_at < self.ttl:
+                self.hits += 1
+                return self._url
+
+            self._url = self.backend.read_front_url()
+            self._read_at = now
+            self.reads += 1
+            return self._url
+
+    def stats(self):
+        """
+        Returns:
+            dict - The number of backend reads and of requests answered from the cache.
+        """
+        return {"reads": self.reads, "hits": self.hits}
+
+
+def default_browser_backend(scripts):
+    """
+    Returns the best available browser backend for this platform.
+
+    Parameters:
+        scripts : ScriptCache - The cache to run scripts through.
+    """
+    if sys.platform == "darwin":
+        return AppleScriptBrowserBackend(scripts)
+    return StubBrowserBackend()
@@ -0,0 +1,387 @@
+"""
+Context sources report the focused application and the set of running applications to the
+ContextManager. Sources push an event to their listener only when the context changes, so the
+context thread can sleep until something happens.
+
+Typical usage example:
+    source = default_context_source()
+    source.start(lambda front_app, running_apps: print(front_app, running_apps))
+"""
+
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from context_tools.Processes import ProcessTable, ProcReader
+from context_tools.Scheduling import AdaptiveInterval, TickCounter
+from context_tools.Scripts import AppleScriptBackend, ScriptCache
+
+
+class ContextSource:
+    """
+    An abstract source of context events.
+    """
+    def __init__(self):
+        self.listener = None
+        self.front_app = None
+        self.running_apps = []
+
+    def start(self, listener):
+        """
+        Begins delivering context change events.
+
+        Parameters:
+            listener : callable - Called as listener(front_app, running_apps) whenever the context changes.
+        """
+        self.listener = listener
+
+    def stop(self):
+        """Stops delivering context change events."""
+        self.listener = None
+
+    def snapshot(self):
+        """
+        Returns the most recently observed context.
+
+        Returns:
+            [str, [str]] - The filepath of the focused application (or None if unknown) and a list of filepaths of all running applications.
+        """
+        return [self.front_app, self.running_apps]
+
+    def emit(self, front_app, running_apps):
+        """
+        Records an observed context, notifying the listener if it differs from the previous one.
+
+        Returns:
+            boolean - True if the context changed, False otherwise.
+        """
+        if front_app == self.front_app and set(running_apps) == set(self.running_apps):
+            return False
+
+        self.front_app = front_app
+        self.running_apps = list(running_apps)
+        if self.listener is not None:
+            self.listener(self.front_app, self.running_apps)
+        return True
+
+    def pause(self):
+        """Suspends reading the backend, for sources that read it on a schedule."""
+        pass
+
+    def resume(self):
+        """Resumes reading the backend after pause()."""
+        pass
+
+    def wake(self):
+        """Asks the source to read the backend again soon, e.g. after user input."""
+        pass
+
+    def stats(self):
+        """
+        Returns:
+            dict - Counters describing how often the backend has been read.
+        """
+        return {}
+
+    def run_main_thread(self, timeout):
+        """
+        Lends the main thread to the source for up to timeout seconds, for backends that deliver events on it.
+
+        Parameters:
+            timeout : float - The number of seconds to run for.
+        """
+        time.sleep(timeout)
+
+
+class PollingContextSource(ContextSource, ABC):
+    """
+    A context source for backends without change notifications. The backend is read on the
+    source's own thread, and only changes are passed on. The polling interval doubles while
+    the context stays the same, up to max_interval, and drops back after a change or wake().
+    """
+    def __init__(self, interval = 1, max_interval = 30):
+        super().__init__()
+        self.interval = AdaptiveInterval(interval, max_interval)
+        self.ticks = TickCounter(interval)
+        self.paused = False
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread = None
+
+    @abstractmethod
+    def read(self):
+        """
+        Reads the current context from the backend.
+
+        Returns:
+            [str, [str]] - The focused application and running applications, or None if unavailable.
+        """
+
+    def start(self, listener):
+        super().start(listener)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._poll, name="ContextSource", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        super().stop()
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+        self.wake()
+
+    def wake(self):
+        self.interval.reset()
+        self._wake_event.set()
+
+    def stats(self):
+        stats = self.ticks.stats()
+        stats["interval"] = self.interval.current
+        stats["paused"] = self.paused
+        return stats
+
+    def _poll(self):
+        while not self._stop_event.is_set():
+            if not self.paused:
+                data = self.read()
+                self.ticks.tick()
+                if data is not None and self.emit(*data):
+                    self.interval.reset()
+                else:
+                    self.interval.back_off()
+
+            # Sleeps until the next poll, or indefinitely while paused, unless woken or stopped
+            self._wake_event.wait(None if self.paused else self.interval.current)
+            self._wake_event.clear()
+
+
+class AppleScriptContextSource(PollingContextSource):
+    """
+    Reads the context from System Events on macOS. The script is compiled once, by a shared ScriptCache if one is given.
+    """
+    SCRIPT = '''
+        try
+            with timeout of 1 second
+                tell application "System Events"
+                    set frontApp to first application process whose frontmost is true
+                    set frontAppName to name of frontApp
+                    set currentApp to file of first application process where name is frontAppName
+                    set listOfApps to (file of every process where background only is false)
+                end tell
+            end timeout
+            return {currentApp, listOfApps}
+        on error
+            -- blah
+        end try
+    '''
+
+    def __init__(self, interval = 1, max_interval = 30, scripts = None):
+        super().__init__(interval, max_interval)
+        self.scripts = scripts
+        if self.scripts is None:
+            self.scripts = ScriptCache(AppleScriptBackend())
+
+    def read(self):
+        data = self.scripts.run(self.SCRIPT)
+        if data is None:
+            return None
+        return [data[0], list(set(data[1]))]
+
+
+class WorkspaceContextSource(ContextSource):
+    """
+    Listens for NSWorkspace application notifications on macOS, so the context is only read
+    when an app is activated, launched or terminated. Requires PyObjC; the notifications are
+    delivered on the main thread, so it must call run_main_thread() in a loop.
+    """
+    ACTIVATED = "NSWorkspaceDidActivateApplicationNotification"
+    LAUNCHED = "NSWorkspaceDidLaunchApplicationNotification"
+    TERMINATED = "NSWorkspaceDidTerminateApplicationNotification"
+    APPLICATION_KEY = "NSWorkspaceApplicationKey"
+    # NSApplicationActivationPolicyRegular: apps with a Dock icon, i.e. not background only
+    REGULAR_POLICY = 0
+
+    def __init__(self, workspace = None):
+        """
+        Parameters:
+            workspace : NSWorkspace - Optional workspace to observe. Defaults to the shared workspace.
+        """
+        super().__init__()
+        self.foundation = None
+        if workspace is None:
+            import AppKit
+            import Foundation
+            self.foundation = Foundation
+            workspace = AppKit.NSWorkspace.sharedWorkspace()
+        self.workspace = workspace
+        self.notifications = 0
+        self.reads = 0
+        self._observers = []
+        self._lock = threading.Lock()
+
+    def start(self, listener):
+        super().start(listener)
+        center = self.workspace.notificationCenter()
+        for name, handler in ((self.ACTIVATED, self.on_activated), (self.LAUNCHED, self.on_launched), (self.TERMINATED, self.on_launched)):
+            self._observers.append(center.addObserverForName_object_queue_usingBlock_(name, None, None, handler))
+
+        front_app = self.app_path(self.workspace.frontmostApplication())
+        with self._lock:
+            self.emit(front_app, self.read_running_apps())
+
+    def stop(self):
+        super().stop()
+        center = self.workspace.notificationCenter()
+        for observer in self._observers:
+            center.removeObserver_(observer)
+        self._observers = []
+
+    def stats(self):
+        return {"notifications": self.notifications, "reads": self.reads}
+
+    def run_main_thread(self, timeout):
+        if self.foundation is not None:
+            run_loop = self.foundation.NSRunLoop.currentRunLoop()
+            limit = self.foundation.NSDate.dateWithTimeIntervalSinceNow_(timeout)
+            # Returns False at once when the run loop has nothing to wait on
+            if run_loop.runMode_beforeDate_(self.foundation.NSDefaultRunLoopMode, limit):
+                return
+        time.sleep(timeout)
+
+    def on_activated(self, notification):
+        """Records the newly focused app. Called on the main thread."""
+        self.notifications += 1
+        front_app = self.app_path(notification.userInfo()[self.APPLICATION_KEY])
+        with self._lock:
+            running_apps = self.running_apps
+            if front_app is not None and front_app not in running_apps:
+                # Activated before its launch notification arrived
+                running_apps = self.read_running_apps()
+            self.emit(front_app, running_apps)
+
+    def on_launched(self, notification):
+        """Reads the running apps again after an app launches or terminates. Called on the main thread."""
+        self.notifications += 1
+        with self._lock:
+            self.emit(self.front_app, self.read_running_apps())
+
+    def read_running_apps(self):
+        """
+        Returns:
+            [str] - The filepaths of the running apps that are not background only.
+        """
+        self.reads += 1
+        running_apps = set()
+        for app in self.workspace.runningApplications():
+            if app.activationPolicy() == self.REGULAR_POLICY and not app.isTerminated():
+                path = self.app_path(app)
+                if path is not None:
+                    running_apps.add(path)
+        return sorted(running_apps)
+
+    def app_path(self, app):
+        """
+        Returns:
+            str - The filepath of an NSRunningApplication's bundle (or executable), or None if unknown.
+        """
+        if app is None:
+            return None
+        url = app.bundleURL() or app.executableURL()
+        if url is None:
+            return None
+        return str(url.path())
+
+
+class ProcContextSource(PollingContextSource):
+    """
+    A Linux stand-in that treats the current user's processes as running apps. Processes are
+    read from a ProcessTable, which can be shared with other users of the process list.
+    """
+    def __init__(self, interval = 1, max_interval = 30, process_table = None):
+        super().__init__(interval, max_interval)
+        self.process_table = process_table
+        if self.process_table is None:
+            self.process_table = ProcessTable(ProcReader(), ttl = interval)
+        self.uid = os.getuid()
+
+    def read(self):
+        try:
+            processes = self.process_table.processes()
+        except OSError:
+            return None
+
+        running_apps = set(process.executable for process in processes if process.uid == self.uid and process.executable is not None)
+        return [self.front_app, sorted(running_apps)]
+
+
+class ScriptedContextSource(ContextSource):
+    """
+    Emits a scripted sequence of contexts, for tests and replays.
+    """
+    def __init__(self, events = None, speed = 1):
+        """
+        Parameters:
+            events : [(float, str, [str])] - (delay in seconds, focused app, running apps) tuples.
+            speed : float - Delays are divided by this factor when played on a thread.
+        """
+        super().__init__()
+        self.events = list(events or [])
+        self.speed = speed
+        self.position = 0
+        self._stop_event = threading.Event()
+
+    def step(self):
+        """
+        Emits the next scripted context immediately.
+
+        Returns:
+            boolean - False once the script is exhausted, True otherwise.
+        """
+        if self.position >= len(self.events):
+            return False
+        _, front_app, running_apps = self.events[self.position]
+        self.position += 1
+        self.emit(front_app, running_apps)
+        return True
+
+    def play(self):
+        """Emits all remaining scripted contexts on a thread, honoring their delays."""
+        def run():
+            while self.position < len(self.events) and not self._stop_event.is_set():
+                delay = self.events[self.position][0] / self.speed
+                if self._stop_event.wait(delay):
+                    break
+                self.step()
+
+        self._stop_event.clear()
+        threading.Thread(target=run, name="ScriptedContextSource", daemon=True).start()
+
+    def stop(self):
+        super().stop()
+        self._stop_event.set()
+
+
+def default_context_source(process_table = None, scripts = None):
+    """
+    Returns the best available context source for this platform.
+
+    Parameters:
+        process_table : ProcessTable - Optional shared process table for sources that read the process list.
+        scripts : ScriptCache - Optional shared script cache for sources that run scripts.
+    """
+    if sys.platform == "darwin":
+        try:
+            return WorkspaceContextSource()
+        except ImportError:
+            # Without PyObjC there are no notifications, so System Events is polled instead
+            return AppleScriptContextSource(scripts = scripts)
+    if os.path.isdir("/proc"):
+        return ProcContextSource(process_table = process_table)
+    return ScriptedContextSource()
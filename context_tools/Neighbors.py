@@ -0,0 +1,187 @@
+"""
+A nearest-neighbour index over the distinct app sets in the context history.
+
+App sets are bucketed by MinHash locality-sensitive hashing, so a query only compares itself
+against sets that share a bucket with it, then ranks those by exact Jaccard similarity using
+integer bitsets. It is registered as a view on the context tracker, so it is kept up to date
+as history rows are added and updated.
+
+Typical usage example:
+    index = context_tracker.register_view(NeighborIndex("neighbors", app_sets))
+    for app_set, similarity in index.nearest(current_apps, k = 5):
+        print(sorted(app_set), similarity)
+"""
+
+import random
+
+
+def popcount(mask):
+    """Returns the number of set bits in an integer."""
+    return bin(mask).count("1")
+
+
+class NeighborIndex:
+    """
+    MinHash LSH over interned app sets, with exact Jaccard re-ranking.
+    """
+    # A Mersenne prime larger than any app id, for the universal hash functions
+    PRIME = (1 << 61) - 1
+
+    def __init__(self, name, app_sets, bands = 16, rows_per_band = 2, weight = "frequency", seed = 0):
+        """
+        Parameters:
+            name : str - The name the view is registered under.
+            app_sets : AppSetInterner - The interner that history app sets come from.
+            bands : int - The number of LSH bands. More bands find more distant neighbours.
+            rows_per_band : int - The number of MinHash values per band. More rows make buckets more selective.
+            weight : str - The column summed per app set as its weight, e.g. "frequency".
+            seed : int - Seed for the hash functions.
+        """
+        self.name = name
+        self.app_sets = app_sets
+        self.bands = bands
+        self.rows_per_band = rows_per_band
+        self.weight = weight
+
+        rng = random.Random(seed)
+        self._hashes = [(rng.randrange(1, self.PRIME), rng.randrange(self.PRIME)) for _ in range(bands * rows_per_band)]
+        self._app_hashes = []
+        self.clear()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def clear(self):
+        """Reset the index to its empty state."""
+        self.rows = {}
+        self.weights = {}
+        self.postings = {}
+        self._buckets = [{} for _ in range(self.bands)]
+        self._band_keys = {}
+
+    def add(self, item):
+        """Count a history row towards its app set, indexing the set if it is new."""
+        app_set = self.app_sets.intern(item.data["targets"])
+        if app_set in self.rows:
+            self.rows[app_set] += 1
+            self.weights[app_set] += item.data[self.weight]
+            return
+
+        self.rows[app_set] = 1
+        self.weights[app_set] = item.data[self.weight]
+        band_keys = self.band_keys(app_set)
+        self._band_keys[app_set] = band_keys
+        for band, key in enumerate(band_keys):
+            self._buckets[band].setdefault(key, set()).add(app_set)
+        for app in app_set:
+            self.postings.setdefault(app, set()).add(app_set)
+
+    def add_all(self, items):
+        """Count many history rows."""
+        for item in items:
+            self.add(item)
+
+    def remove(self, item):
+        """Retract a history row, dropping its app set once no rows have it."""
+        app_set = self.app_sets.intern(item.data["targets"])
+        if app_set not in self.rows:
+            return
+
+        self.rows[app_set] -= 1
+        self.weights[app_set] -= item.data[self.weight]
+        if self.rows[app_set] > 0:
+            return
+
+        del self.rows[app_set]
+        del self.weights[app_set]
+        for band, key in enumerate(self._band_keys.pop(app_set)):
+            bucket = self._buckets[band][key]
+            bucket.discard(app_set)
+            if len(bucket) == 0:
+                del self._buckets[band][key]
+        for app in app_set:
+            self.postings[app].discard(app_set)
+            if len(self.postings[app]) == 0:
+                del self.postings[app]
+
+    def signature(self, app_set):
+        """Get the MinHash signature of an app set."""
+        if len(app_set) == 0:
+            return [self.PRIME] * len(self._hashes)
+        return [min(values) for values in zip(*(self._hashes_for(app) for app in app_set))]
+
+    def band_keys(self, app_set):
+        """Get the LSH bucket key of an app set in each band."""
+        signature = self.signature(app_set)
+        rows = self.rows_per_band
+        return [tuple(signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def _hashes_for(self, app):
+        app_id = self.app_sets.app_id(app)
+        while len(self._app_hashes) <= app_id:
+            new_id = len(self._app_hashes)
+            self._app_hashes.append([(a * new_id + b) % self.PRIME for a, b in self._hashes])
+        return self._app_hashes[app_id]
+
+    def similarity(self, app_set_1, app_set_2):
+        """Get the Jaccard similarity of two app sets using their bitsets."""
+        bits_1 = self.app_sets.bits(app_set_1)
+        bits_2 = self.app_sets.bits(app_set_2)
+        union = popcount(bits_1 | bits_2)
+        if union == 0:
+            return 1
+        return popcount(bits_1 & bits_2) / union
+
+    def candidates(self, app_set):
+        """Get the indexed app sets sharing at least one LSH bucket with an app set."""
+        band_keys = self._band_keys.get(app_set)
+        if band_keys is None:
+            band_keys = self.band_keys(app_set)
+
+        found = set()
+        for band, key in enumerate(band_keys):
+            found.update(self._buckets[band].get(key, ()))
+        return found
+
+    def nearest(self, app_set, k = 10, exclude = None):
+        """
+        Get the indexed app sets most similar to an app set.
+
+        Parameters:
+            app_set : frozenset - The app set to query with.
+            k : int - The maximum number of neighbours to return.
+            exclude : frozenset - Optional app set to leave out of the results, e.g. the query itself.
+
+        Returns:
+            [(frozenset, float)] - Up to k (app set, Jaccard similarity) pairs, most similar first.
+        """
+        app_set = self.app_sets.intern(app_set)
+        candidates = self.candidates(app_set)
+        candidates.discard(exclude)
+        if len(candidates) == 0:
+            # No collisions; sets sharing an app are still better than nothing
+            for app in app_set:
+                candidates.update(self.postings.get(app, ()))
+            candidates.discard(exclude)
+
+        ranked = [(candidate, self.similarity(app_set, candidate)) for candidate in candidates]
+        ranked.sort(key = lambda pair: (-pair[1], -self.weights[pair[0]]))
+        return ranked[:k]
+
+    def containing(self, names):
+        """Get the indexed app sets that have, for every name, an app whose filepath contains it."""
+        found = None
+        for name in names:
+            sets = set()
+            for app, app_sets in self.postings.items():
+                if name in app:
+                    sets.update(app_sets)
+            found = sets if found is None else found & sets
+            if len(found) == 0:
+                break
+        if found is None:
+            return set(self.rows)
+        return found
@@ -0,0 +1,423 @@
+"""
+Process control for closing apps. The process table is cached and indexed, every target is
+looked up in (or matched in a single pass over) the same snapshot, and the matching processes
+are signalled as a batch.
+
+Typical usage example:
+    table = ProcessTable(ttl = 2)
+    controller = ProcessController(table)
+    controller.terminate(["/Applications/Safari.app", "/Applications/Mail.app"], force_after = 3)
+"""
+
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+from collections import namedtuple
+
+
+# start_time tells apart processes that reused a pid; it is only ever compared for equality
+Process = namedtuple("Process", ["pid", "uid", "executable", "argv0", "command", "start_time"], defaults = [None])
+
+# The bundle part of a macOS executable path, e.g. /Applications/Safari.app
+BUNDLE_PATTERN = re.compile(r"^(.*?\.app)(?=/|$)")
+
+
+class ProcReader:
+    """
+    Reads the process table from /proc. Processes are cached by pid and start time, so repeated
+    reads cost one directory listing and one stat line per process, plus a full look up of the
+    processes that are new since the previous read.
+    """
+    def __init__(self, proc_path = "/proc"):
+        self.proc_path = proc_path
+        self._processes = {}
+
+    def __call__(self):
+        processes = {}
+        for name in os.listdir(self.proc_path):
+            if not name.isdigit():
+                continue
+            pid = int(name)
+            start_time = self.start_time(pid)
+            if start_time is None:
+                continue
+
+            # A reused pid has a different start time, so it is never mistaken for the cached process
+            process = self._processes.get((pid, start_time))
+            if process is None:
+                process = self.read(pid, start_time)
+            if process is not None:
+                processes[(pid, start_time)] = process
+        self._processes = processes
+        return list(processes.values())
+
+    def start_time(self, pid):
+        """
+        Returns:
+            int - When a process started, in clock ticks after boot, or None if it has exited.
+        """
+        try:
+            with open(self.proc_path + "/" + str(pid) + "/stat", "rb") as stat_file:
+                stat = stat_file.read()
+        except OSError:
+            return None
+
+        # The process name can contain spaces and parentheses, so fields are counted from the last ")"
+        fields = stat[stat.rfind(b")") + 2:].split()
+        if len(fields) < 20 or not fields[19].isdigit():
+            return None
+        return int(fields[19])
+
+    def read(self, pid, start_time = None):
+        """
+        Reads a process's current identity, bypassing the cache.
+
+        Returns:
+            Process - The process, or None if it has exited.
+        """
+        path = self.proc_path + "/" + str(pid)
+        if start_time is None:
+            start_time = self.start_time(pid)
+            if start_time is None:
+                return None
+        try:
+            uid = os.stat(path).st_uid
+            with open(path + "/cmdline", "rb") as cmdline_file:
+                cmdline = cmdline_file.read()
+        except OSError:
+            # The process exited while the table was being read
+            return None
+
+        try:
+            executable = os.readlink(path + "/exe")
+        except OSError:
+            # Kernel threads and other users' processes have no readable executable
+            executable = None
+        args = cmdline.rstrip(b"\0").decode("utf-8", "replace").split("\0")
+        return Process(pid, uid, executable, args[0], " ".join(args), start_time)
+
+
+class PsReader:
+    """
+    Reads the process table with a single ps call, for platforms without /proc (e.g. macOS).
+    """
+    def __call__(self):
+        return self._ps(["-axww"])
+
+    def read(self, pid):
+        """
+        Reads a process's current identity.
+
+        Returns:
+            Process - The process, or None if it has exited.
+        """
+        processes = self._ps(["-ww", "-p", str(pid)])
+        return processes[0] if len(processes) > 0 else None
+
+    def _ps(self, args):
+        # lstart is always five fields, e.g. "Mon Oct 19 10:00:00 2026"
+        output = subprocess.run(["ps"] + args + ["-o", "pid=,uid=,lstart=,command="], capture_output = True, text = True).stdout
+        processes = []
+        for line in output.splitlines():
+            fields = line.split(None, 7)
+            if len(fields) == 8 and fields[0].isdigit() and fields[1].isdigit():
+                # ps cannot separate an executable path containing spaces from its arguments, except for app bundles
+                command = fields[7]
+                executable = command.split(" ")[0]
+                bundle = BUNDLE_PATTERN.match(command)
+                if bundle is not None:
+                    executable = command[:command.find(" ", bundle.end())] if " " in command[bundle.end():] else command
+                processes.append(Process(int(fields[0]), int(fields[1]), executable, executable, command, " ".join(fields[2:7])))
+        return processes
+
+
+def default_process_reader():
+    """Returns the best process table reader for this platform."""
+    if os.path.isdir("/proc/self"):
+        return ProcReader()
+    return PsReader()
+
+
+class ProcessSnapshot:
+    """
+    One reading of the process table, indexed by pid and by the keys of ProcessTable.keys_for.
+    """
+    def __init__(self, processes, index):
+        self.processes = processes
+        self.index = index
+        self.by_pid = dict((process.pid, process) for process in processes)
+
+    def get(self, pid):
+        """Returns the process with a pid, or None if it was not running when the snapshot was read."""
+        return self.by_pid.get(pid)
+
+    def pids_for(self, key):
+        """
+        Returns the pids of processes matching an executable path, app bundle path or (case-insensitive) process name.
+
+        Returns:
+            [int] - The matching pids, or an empty list.
+        """
+        pids = self.index.get(key)
+        if pids is None:
+            pids = self.index.get(key.lower(), [])
+        return pids
+
+
+class ProcessTable:
+    """
+    A cached snapshot of the process table, indexed by executable path, app bundle and process
+    name. Snapshots older than ttl seconds are re-read on demand, or on a background thread
+    after start().
+    """
+    def __init__(self, reader = None, ttl = 2):
+        """
+        Parameters:
+            reader : callable - Returns the current processes as a list of Process tuples. Defaults to the best reader for this platform.
+            ttl : float - How many seconds a snapshot is used for before it is read again.
+        """
+        self.reader = reader
+        if self.reader is None:
+            self.reader = default_process_reader()
+        self.ttl = ttl
+        self.refreshes = 0
+        self.hits = 0
+
+        # Replaced as a whole on refresh, so readers on other threads always see a consistent snapshot
+        self._snapshot = (None, ProcessSnapshot([], {}))
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """Reads the process table and rebuilds the index."""
+        with self._lock:
+            processes = self.reader()
+            index = {}
+            for process in processes:
+                for key in self.keys_for(process):
+                    index.setdefault(key, []).append(process.pid)
+            self._snapshot = (time.monotonic(), ProcessSnapshot(processes, index))
+            self.refreshes += 1
+
+    def invalidate(self):
+        """Marks the snapshot as stale, e.g. after signalling processes."""
+        self._snapshot = (None, self._snapshot[1])
+
+    def keys_for(self, process):
+        """Returns the index keys of a process: its executable, app bundle and lowercase names."""
+        keys = set()
+        for path in (process.executable, process.argv0):
+            if not path:
+                continue
+            keys.add(path)
+            keys.add(os.path.basename(path).lower())
+            bundle = BUNDLE_PATTERN.match(path)
+            if bundle is not None:
+                keys.add(bundle.group(1))
+                keys.add(os.path.basename(bundle.group(1))[:-len(".app")].lower())
+        return keys
+
+    def _current(self):
+        snapshot = self._snapshot
+        if snapshot[0] is None or time.monotonic() - snapshot[0] > self.ttl:
+            self.refresh()
+            return self._snapshot
+        self.hits += 1
+        return snapshot
+
+    def snapshot(self):
+        """Returns the current snapshot, so that several lookups can use the same reading of the process table."""
+        return self._current()[1]
+
+    def processes(self):
+        """Returns the processes in the current snapshot."""
+        return self.snapshot().processes
+
+    def pids_for(self, key):
+        """
+        Returns the pids of processes matching an executable path, app bundle path or (case-insensitive) process name.
+
+        Returns:
+            [int] - The matching pids, or an empty list.
+        """
+        return self.snapshot().pids_for(key)
+
+    def identify(self, pid):
+        """
+        Reads a process's current identity from the system, bypassing the snapshot.
+
+        Returns:
+            Process - The process, or None if it has exited.
+        """
+        read = getattr(self.reader, "read", None)
+        if read is not None:
+            return read(pid)
+        # Readers that can only read the whole table are read in full
+        for process in self.reader():
+            if process.pid == pid:
+                return process
+        return None
+
+    def is_same(self, process):
+        """Returns True if a process from a snapshot is still running as the same program, i.e. its pid was not reused and it did not exec another one."""
+        current = self.identify(process.pid)
+        if current is None or (current.uid, current.start_time) != (process.uid, process.start_time):
+            return False
+        # Without a readable executable, fall back to the command line
+        if process.executable is None:
+            return current.command == process.command
+        return current.executable == process.executable
+
+    def start(self):
+        """Refreshes the snapshot on a background thread every ttl seconds."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name="ProcessTable", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops background refreshing."""
+        self._stop_event.set()
+
+    def _refresh_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except OSError:
+                pass
+            # Refreshing twice per ttl keeps on-demand lookups from ever finding the snapshot stale
+            self._stop_event.wait(self.ttl / 2)
+
+
+class ProcessController:
+    """
+    Finds and signals the processes belonging to apps, like pkill -f but for many apps at once.
+    """
+    def __init__(self, process_table = None, poll_interval = 0.05):
+        """
+        Parameters:
+            process_table : ProcessTable - The process table to find processes in. Defaults to a new table.
+            poll_interval : float - How often, in seconds, to check whether signalled processes have exited.
+        """
+        self.process_table = process_table
+        if self.process_table is None:
+            self.process_table = ProcessTable()
+        self.poll_interval = poll_interval
+
+    def find(self, targets, exact = False, snapshot = None):
+        """
+        Finds the processes of every target in one snapshot of the process table.
+
+        Parameters:
+            targets : [str] - App filepaths, process names or any substrings of command lines to look for.
+            exact : boolean - If True, only match executable paths, app bundle paths and process names, like pkill -x.
+            snapshot : ProcessSnapshot - Optional snapshot to search. Defaults to the process table's current snapshot.
+
+        Returns:
+            dict - Each target mapped to the list of pids it matches.
+        """
+        if snapshot is None:
+            snapshot = self.process_table.snapshot()
+        own_pid = os.getpid()
+        matches = {}
+        unresolved = []
+        for target in targets:
+            # Executable paths, app bundles and process names are index hits
+            matches[target] = [pid for pid in snapshot.pids_for(target) if pid != own_pid]
+            if len(matches[target]) == 0:
+                unresolved.append(target)
+        if len(unresolved) == 0 or exact:
+            return matches
+
+        # Anything else is matched against command lines like pkill -f, in one pass for all targets
+        # using one alternation, longest first so that nested paths match the specific target
+        pattern = re.compile("|".join(re.escape(target) for target in sorted(unresolved, key = len, reverse = True)))
+        for process in snapshot.processes:
+            if process.pid == own_pid:
+                continue
+            match = pattern.search(process.command)
+            if match is not None:
+                matches[match.group(0)].append(process.pid)
+        return matches
+
+    def send(self, pids, sig, processes = None):
+        """
+        Sends a signal to each of a set of processes.
+
+        Parameters:
+            pids : set - The pids to signal.
+            sig : int - The signal to send.
+            processes : dict - Optional pids mapped to the Process each is expected to be. Each identity is read again just before signalling, and pids that were reused or now run another program are skipped.
+
+        Returns:
+            set - The pids that were signalled, i.e. excluding those that had already exited, changed identity or could not be signalled.
+        """
+        signalled = set()
+        for pid in pids:
+            if processes is not None and not self.process_table.is_same(processes[pid]):
+                continue
+            try:
+                os.kill(pid, sig)
+                signalled.add(pid)
+            except (ProcessLookupError, PermissionError):
+                pass
+        return signalled
+
+    def alive(self, pid):
+        """Returns True if a process still exists."""
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def wait(self, pids, timeout):
+        """
+        Waits for a set of processes to exit, polling all of them together.
+
+        Parameters:
+            pids : set - The pids to wait for.
+            timeout : float - The longest to wait in seconds.
+
+        Returns:
+            set - The pids still running when the timeout elapsed.
+        """
+        remaining = set(pids)
+        deadline = time.monotonic() + timeout
+        while len(remaining) > 0:
+            remaining = set(pid for pid in remaining if self.alive(pid))
+            if len(remaining) == 0 or time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+        return remaining
+
+    def terminate(self, targets, force_after = None, exact = False):
+        """
+        Asks the processes of all targets to exit, optionally forcing those that do not.
+
+        Parameters:
+            targets : [str] - App filepaths (or any substrings of command lines) to close.
+            force_after : float - Optional number of seconds to wait before sending SIGKILL to processes that are still running. If None, processes are only sent SIGTERM.
+            exact : boolean - If True, only match executable paths, app bundle paths and process names.
+
+        Returns:
+            dict - Each target mapped to the list of pids that were signalled.
+        """
+        snapshot = self.process_table.snapshot()
+        matches = self.find(targets, exact = exact, snapshot = snapshot)
+        pids = set(pid for target_pids in matches.values() for pid in target_pids)
+
+        # The snapshot can be up to ttl seconds old, so only processes that still match it are signalled
+        processes = dict((pid, snapshot.get(pid)) for pid in pids)
+        signalled = self.send(pids, signal.SIGTERM, processes)
+        self.process_table.invalidate()
+
+        if force_after is not None and len(signalled) > 0:
+            self.send(self.wait(signalled, force_after), signal.SIGKILL, processes)
+
+        return {target: [pid for pid in target_pids if pid in signalled] for target, target_pids in matches.items()}
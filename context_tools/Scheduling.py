@@ -0,0 +1,217 @@
+"""
+Scheduling helpers for the context system and Aria's background jobs.
+
+Typical usage example:
+    interval = AdaptiveInterval(1, 30)
+    while True:
+        if something_changed():
+            interval.reset()
+        else:
+            interval.back_off()
+        time.sleep(interval.current)
+
+    jobs = JobScheduler()
+    jobs.every("backup", 60, backup)
+    while True:
+        for job in jobs.due():
+            job.run()
+        time.sleep(jobs.next_delay())
+"""
+
+import heapq
+import random
+import threading
+import time
+
+
+class AdaptiveInterval:
+    """
+    An interval that grows while nothing changes and snaps back to its minimum after a change.
+    """
+    def __init__(self, minimum, maximum, factor = 2):
+        """
+        Parameters:
+            minimum : float - The interval in seconds right after a change.
+            maximum : float - The longest the interval may grow to.
+            factor : float - How much the interval grows each time nothing has changed.
+        """
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.factor = factor
+        self.current = minimum
+
+    def reset(self):
+        """Returns the interval to its minimum."""
+        self.current = self.minimum
+
+    def back_off(self):
+        """Grows the interval, up to its maximum."""
+        self.current = min(self.maximum, self.current * self.factor)
+
+
+class TickCounter:
+    """
+    Counts ticks actually run against the ticks a fixed-interval loop would have run.
+    """
+    def __init__(self, baseline_interval):
+        """
+        Parameters:
+            baseline_interval : float - The fixed interval in seconds to compare against.
+        """
+        self.baseline_interval = baseline_interval
+        self.ticks = 0
+        self.started_at = time.monotonic()
+
+    def tick(self):
+        self.ticks += 1
+
+    def stats(self):
+        """
+        Returns:
+            dict - Ticks run, ticks a fixed-interval loop would have run, and the difference.
+        """
+        baseline_ticks = int((time.monotonic() - self.started_at) / self.baseline_interval)
+        return {
+            "ticks": self.ticks,
+            "baseline_ticks": baseline_ticks,
+            "ticks_saved": max(0, baseline_ticks - self.ticks),
+        }
+
+
+class PeriodicJob:
+    """
+    A function run every interval seconds by a JobScheduler.
+    """
+    def __init__(self, name, interval, function, jitter = 0.1):
+        """
+        Parameters:
+            name : str - A unique name for the job.
+            interval : float - Seconds between runs.
+            function : callable - Called with no arguments on each run.
+            jitter : float - The fraction of the interval each run may be moved by at random, so jobs with equal intervals spread out.
+        """
+        self.name = name
+        self.interval = interval
+        self.function = function
+        self.jitter = jitter
+        self.next_run = 0
+        self.running = False
+        self.cancelled = False
+        self.runs = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def run(self):
+        """Runs the job once. Exceptions are counted and printed rather than raised."""
+        try:
+            self.function()
+        except Exception as error:
+            self.failures += 1
+            print("Scheduled job '" + self.name + "' failed:", error)
+        finally:
+            self.runs += 1
+            self.running = False
+
+
+class JobScheduler:
+    """
+    Decides when PeriodicJobs are due. Runs that would overlap a run still in progress, or that
+    were missed while the scheduler was busy or asleep, are coalesced into the next single run.
+    """
+    def __init__(self, clock = time.monotonic, seed = None):
+        """
+        Parameters:
+            clock : callable - Returns the current time in seconds.
+            seed : int - Optional seed for the jitter.
+        """
+        self.clock = clock
+        self.random = random.Random(seed)
+        self.jobs = {}
+        self._queue = []
+        self._lock = threading.Lock()
+
+    def every(self, name, interval, function, jitter = 0.1, run_now = False):
+        """
+        Schedules a function, replacing any job with the same name. Raises ValueError if the interval is not a positive number or the jitter is not in [0, 1).
+
+        Parameters:
+            run_now : boolean - Whether the first run is due immediately rather than after one (jittered) interval.
+
+        Returns:
+            PeriodicJob - The scheduled job.
+        """
+        # A job due again immediately after each run would keep due() from ever returning
+        if isinstance(interval, bool) or not isinstance(interval, (int, float)) or not interval > 0:
+            raise ValueError("interval must be a positive number of seconds, not " + repr(interval))
+        if not 0 <= jitter < 1:
+            raise ValueError("jitter must be at least 0 and less than 1, not " + repr(jitter))
+
+        job = PeriodicJob(name, interval, function, jitter)
+        with self._lock:
+            if name in self.jobs:
+                self.jobs[name].cancelled = True
+            self.jobs[name] = job
+            job.next_run = self.clock() if run_now else self._after(self.clock(), job)
+            heapq.heappush(self._queue, (job.next_run, id(job), job))
+        return job
+
+    def cancel(self, name):
+        """
+        Returns:
+            boolean - True if a job was cancelled, False if no job has that name.
+        """
+        with self._lock:
+            job = self.jobs.pop(name, None)
+            if job is None:
+                return False
+            job.cancelled = True
+            return True
+
+    def _after(self, now, job):
+        return now + job.interval * (1 + self.random.uniform(-job.jitter, job.jitter))
+
+    def due(self):
+        """
+        Takes the jobs that are due and schedules their next runs.
+
+        Returns:
+            [PeriodicJob] - The jobs to run now, marked as running. A job whose previous run has not finished is skipped.
+        """
+        now = self.clock()
+        ready = []
+        with self._lock:
+            while len(self._queue) > 0 and self._queue[0][0] <= now:
+                _, _, job = heapq.heappop(self._queue)
+                if job.cancelled:
+                    continue
+
+                if job.running:
+                    job.coalesced += 1
+                else:
+                    job.running = True
+                    ready.append(job)
+
+                # The next run is counted from now, so a backlog of missed runs becomes a single run
+                job.next_run = self._after(now, job)
+                heapq.heappush(self._queue, (job.next_run, id(job), job))
+        return ready
+
+    def next_delay(self):
+        """
+        Returns:
+            float - Seconds until the next job is due, or None if no jobs are scheduled.
+        """
+        with self._lock:
+            while len(self._queue) > 0 and self._queue[0][2].cancelled:
+                heapq.heappop(self._queue)
+            if len(self._queue) == 0:
+                return None
+            return max(0, self._queue[0][0] - self.clock())
+
+    def stats(self):
+        """
+        Returns:
+            dict - Runs, coalesced runs and failures per job.
+        """
+        with self._lock:
+            return {name: {"interval": job.interval, "runs": job.runs, "coalesced": job.coalesced, "failures": job.failures} for name, job in self.jobs.items()}
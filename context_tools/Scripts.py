@@ -0,0 +1,148 @@
+"""
+A cache of compiled scripts. Each distinct script source is compiled once, and values that vary
+between runs (such as the focused app) are passed to the script's run handler as arguments
+instead of being pasted into its source.
+
+Typical usage example:
+    scripts = ScriptCache(default_script_backend())
+    scripts.run('''
+        on run {appPath}
+            tell application appPath to activate
+        end run
+    ''', "/Applications/Safari.app")
+"""
+
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class ScriptBackend(ABC):
+    """
+    An abstract compiler and runner of scripts.
+    """
+    @abstractmethod
+    def compile(self, source):
+        """
+        Compiles a script.
+
+        Returns:
+            Object - The compiled script, passed back to run().
+        """
+
+    @abstractmethod
+    def run(self, script, *args):
+        """
+        Runs a compiled script's run handler with the given arguments.
+
+        Returns:
+            Object - The script's result.
+        """
+
+
+class AppleScriptBackend(ScriptBackend):
+    """
+    Compiles and runs AppleScript on macOS.
+    """
+    def __init__(self):
+        import applescript
+        self.applescript = applescript
+
+    def compile(self, source):
+        return self.applescript.AppleScript(source)
+
+    def run(self, script, *args):
+        return script.run(*args)
+
+
+class StubScriptBackend(ScriptBackend):
+    """
+    A script backend that records runs instead of executing them, for tests and platforms without AppleScript.
+    """
+    def __init__(self, results = None):
+        """
+        Parameters:
+            results : dict - Optional results to return, keyed by script source. Other scripts return None.
+        """
+        self.results = results or {}
+        self.calls = []
+
+    def compile(self, source):
+        return source
+
+    def run(self, script, *args):
+        self.calls.append((script, args))
+        return self.results.get(script)
+
+
+class ScriptCache:
+    """
+    Compiles each distinct script source once and runs it with arguments, timing both.
+    """
+    def __init__(self, backend):
+        """
+        Parameters:
+            backend : ScriptBackend - The compiler and runner of scripts.
+        """
+        self.backend = backend
+        self.compiled = {}
+        self.compiles = 0
+        self.runs = 0
+        self.compile_seconds = 0
+        self.run_seconds = 0
+
+        self._lock = threading.Lock()
+
+    def get(self, source):
+        """
+        Returns:
+            Object - The compiled script for a source, compiling it if this is its first use.
+        """
+        with self._lock:
+            script = self.compiled.get(source)
+            if script is None:
+                start = time.perf_counter()
+                script = self.backend.compile(source)
+                self.compile_seconds += time.perf_counter() - start
+                self.compiles += 1
+                self.compiled[source] = script
+            return script
+
+    def run(self, source, *args):
+        """
+        Runs a script, passing any arguments to its run handler (on run {...}).
+
+        Returns:
+            Object - The script's result.
+        """
+        script = self.get(source)
+        start = time.perf_counter()
+        try:
+            return self.backend.run(script, *args)
+        finally:
+            with self._lock:
+                self.run_seconds += time.perf_counter() - start
+                self.runs += 1
+
+    def stats(self):
+        """
+        Returns:
+            dict - The number of distinct scripts, compiles and runs, and the seconds spent in each.
+        """
+        return {
+            "scripts": len(self.compiled),
+            "compiles": self.compiles,
+            "compile_seconds": self.compile_seconds,
+            "runs": self.runs,
+            "run_seconds": self.run_seconds,
+        }
+
+
+def default_script_backend():
+    """
+    Returns the best available script backend for this platform.
+    """
+    if sys.platform == "darwin":
+        return AppleScriptBackend()
+    return StubScriptBackend()
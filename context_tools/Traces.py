@@ -0,0 +1,200 @@
+"""
+Recording and replaying context traces, so that the context pipeline can be exercised and
+benchmarked without a live desktop.
+
+A trace is a JSON lines file. The first line is a header, and each following line is one
+observed context: [seconds since the trace started, focused app, running apps].
+
+Typical usage example:
+    recorder = TraceRecorder("context.trace")
+    recorder.record("/Applications/Safari.app", ["/Applications/Safari.app"])
+
+    clock = SimulatedClock()
+    context_manager = ContextManager(managers, context_source = ScriptedContextSource(), clock = clock)
+    report = TraceReplayer(context_manager, clock, load_trace("context.trace")).run()
+"""
+
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+TRACE_VERSION = 1
+
+
+class TraceRecorder:
+    """
+    Appends observed contexts to a trace file.
+    """
+    def __init__(self, path, clock = time.monotonic):
+        """
+        Parameters:
+            path : str - The trace file to write. An existing file is overwritten.
+            clock : callable - Returns the current time in seconds.
+        """
+        self.path = path
+        self.clock = clock
+        self.started = clock()
+        self.events = 0
+        self.trace_file = open(path, "w", encoding="utf-8")
+        self.trace_file.write(json.dumps({"trace": TRACE_VERSION, "started": datetime.now().isoformat()}) + "\n")
+
+    def record(self, front_app, running_apps):
+        """Appends a context to the trace."""
+        self.trace_file.write(json.dumps([round(self.clock() - self.started, 3), front_app, sorted(running_apps)]) + "\n")
+        self.trace_file.flush()
+        self.events += 1
+
+    def close(self):
+        self.trace_file.close()
+
+
+def load_trace(path):
+    """
+    Reads a trace file.
+
+    Returns:
+        [(float, str, [str])] - (seconds since the trace started, focused app, running apps) tuples.
+    """
+    events = []
+    with open(path, "r", encoding="utf-8") as trace_file:
+        for line in trace_file:
+            entry = json.loads(line)
+            if isinstance(entry, dict):
+                if entry.get("trace") != TRACE_VERSION:
+                    raise ValueError("Unsupported trace version: " + str(entry.get("trace")))
+                continue
+            events.append((entry[0], entry[1], entry[2]))
+    return events
+
+
+def trace_delays(events):
+    """Converts trace events to the (delay, focused app, running apps) tuples that ScriptedContextSource plays."""
+    delays = []
+    previous = 0
+    for when, front_app, running_apps in events:
+        delays.append((when - previous, front_app, running_apps))
+        previous = when
+    return delays
+
+
+def synthetic_trace(app_count, hours = 8, mean_dwell = 90, churn = 0.2, seed = 0):
+    """
+    Generates a trace with a steady number of running apps.
+
+    Parameters:
+        app_count : int - The number of apps running at any time, e.g. 50, 200 or 500.
+        hours : float - The length of the trace.
+        mean_dwell : float - The mean number of seconds between events.
+        churn : float - The fraction of events that quit one app and launch another; the rest only switch focus.
+        seed : int - Seed for the generator.
+
+    Returns:
+        [(float, str, [str])] - Trace events, as returned by load_trace.
+    """
+    rng = random.Random(seed)
+    pool = ["/Applications/App " + str(index) + ".app" for index in range(app_count * 2)]
+    running = pool[:app_count]
+    stopped = pool[app_count:]
+    front_app = running[0]
+
+    events = [(0, front_app, sorted(running))]
+    when = 0
+    end = hours * 3600
+    while True:
+        when += rng.expovariate(1 / mean_dwell)
+        if when >= end:
+            break
+
+        if rng.random() < churn:
+            quit_index = rng.randrange(len(running))
+            launch_index = rng.randrange(len(stopped))
+            running[quit_index], stopped[launch_index] = stopped[launch_index], running[quit_index]
+            front_app = running[quit_index]
+        else:
+            front_app = rng.choice(running)
+        events.append((round(when, 3), front_app, sorted(running)))
+    return events
+
+
+class SimulatedClock:
+    """
+    A clock for ContextManager that only moves when told to.
+    """
+    def __init__(self, start = None):
+        self.start = start if start is not None else datetime(2000, 1, 3, 9, 0)
+        self.elapsed = 0
+
+    def __call__(self):
+        return self.start + timedelta(seconds = self.elapsed)
+
+    def set(self, elapsed):
+        """Moves the clock to a number of seconds after its start."""
+        self.elapsed = elapsed
+
+
+class TraceReplayer:
+    """
+    Drives a ContextManager through a trace as fast as possible, running the same checkpoints the
+    context loop would have run between events, on a simulated clock.
+    """
+    def __init__(self, context_manager, clock, events):
+        """
+        Parameters:
+            context_manager : ContextManager - A context manager constructed with a ScriptedContextSource and the simulated clock.
+            clock : SimulatedClock - The context manager's clock.
+            events : [(float, str, [str])] - Trace events, as returned by load_trace or synthetic_trace.
+        """
+        self.context_manager = context_manager
+        self.clock = clock
+        self.events = events
+
+    def run(self):
+        """
+        Replays the trace.
+
+        Returns:
+            dict - Simulated hours, events, context updates, rows and bytes written to the context tracker, and CPU seconds, in total and per simulated hour.
+        """
+        context_manager = self.context_manager
+        context_source = context_manager.context_source
+        tracker = context_manager.context_tracker
+
+        # A trace has no user input, so idle detection would only measure the replay's own speed
+        context_manager.idle_after = 0
+        rows_before = tracker.rows_written
+        bytes_before = tracker.bytes_written
+        updates = 0
+
+        cpu_start = time.process_time()
+        elapsed = 0
+        for when, front_app, running_apps in self.events:
+            # The context loop wakes once per checkpoint interval while nothing changes
+            while True:
+                timeout = context_manager.next_timeout()
+                if timeout is None or elapsed + timeout >= when:
+                    break
+                elapsed += timeout
+                self.clock.set(elapsed)
+                context_manager.update_context()
+                updates += 1
+
+            elapsed = when
+            self.clock.set(elapsed)
+            context_source.emit(front_app, running_apps)
+            context_manager.update_context()
+            updates += 1
+        cpu_seconds = time.process_time() - cpu_start
+
+        hours = max(elapsed, 1) / 3600
+        report = {
+            "simulated_hours": hours,
+            "events": len(self.events),
+            "updates": updates,
+            "rows_written": tracker.rows_written - rows_before,
+            "bytes_written": tracker.bytes_written - bytes_before,
+            "cpu_seconds": cpu_seconds,
+        }
+        for key in ("updates", "rows_written", "bytes_written", "cpu_seconds"):
+            report[key + "_per_hour"] = report[key] / hours
+        return report
@@ -0,0 +1,119 @@
+"""
+A model of which context tends to follow which, by time of day.
+
+Counts of context switches (from app set -> to app set) are kept per time-of-day bucket and
+overall. The most frequent successor of each context is kept up to date as switches are
+recorded, so predicting the next context is a dictionary lookup.
+
+Typical usage example:
+    model = TransitionModel()
+    model.record(app_set_1, app_set_2, when = 9 * 3600)
+    model.predict(app_set_1, when = 9.5 * 3600)  # app_set_2
+"""
+
+
+class TransitionModel:
+    """
+    Incrementally maintained context transition counts.
+    """
+    def __init__(self, bucket_seconds = 2 * 60 * 60, period = 24 * 60 * 60):
+        """
+        Parameters:
+            bucket_seconds : float - The width of each time-of-day bucket.
+            period : float - The length of the day that times are measured within.
+        """
+        self.bucket_seconds = bucket_seconds
+        self.period = period
+        self.counts = {}
+        self.best = {}
+        self.total = 0
+
+    def __len__(self):
+        return self.total
+
+    def bucket(self, when):
+        """Returns the time-of-day bucket of a time in seconds since midnight, or None for no time."""
+        if when is None:
+            return None
+        return int((when % self.period) // self.bucket_seconds)
+
+    def build(self, items):
+        """
+        Records the switches between consecutive context history rows.
+
+        Parameters:
+            items : [TrackerItem] - Context tracker items in the order they were recorded.
+
+        Returns:
+            None
+        """
+        previous = None
+        for item in items:
+            if previous is not None:
+                self.record(previous.data["targets"], item.data["targets"], item.data["start_time"])
+            previous = item
+
+    def record(self, from_apps, to_apps, when = None):
+        """
+        Records a switch from one context to another.
+
+        Parameters:
+            from_apps : frozenset - The app set switched away from.
+            to_apps : frozenset - The app set switched to.
+            when : float - The time of the switch in seconds since midnight.
+        """
+        if from_apps == to_apps:
+            return
+
+        self.total += 1
+        for key in ((None, from_apps), (self.bucket(when), from_apps)):
+            successors = self.counts.get(key)
+            if successors is None:
+                successors = {}
+                self.counts[key] = successors
+            count = successors.get(to_apps, 0) + 1
+            successors[to_apps] = count
+
+            # Counts only grow, so the best successor can only be overtaken by this one
+            best = self.best.get(key)
+            if best is None or count > best[1]:
+                self.best[key] = (to_apps, count)
+            elif best[0] == to_apps:
+                self.best[key] = (to_apps, count)
+
+            if when is None:
+                break
+
+    def predict(self, from_apps, when = None):
+        """
+        Returns the most likely next context.
+
+        Parameters:
+            from_apps : frozenset - The current app set.
+            when : float - Optional current time in seconds since midnight. Transitions from the same time of day are preferred.
+
+        Returns:
+            frozenset - The most frequent successor app set, or None if the context has never been left.
+        """
+        best = None
+        if when is not None:
+            best = self.best.get((self.bucket(when), from_apps))
+        if best is None:
+            best = self.best.get((None, from_apps))
+        if best is None:
+            return None
+        return best[0]
+
+    def successors(self, from_apps, when = None):
+        """
+        Returns the recorded successors of a context with their counts, most frequent first.
+
+        Parameters:
+            from_apps : frozenset - The app set to look up.
+            when : float - Optional time in seconds since midnight to restrict counts to its time-of-day bucket.
+
+        Returns:
+            [(frozenset, int)] - Successor app sets and how often each followed from_apps.
+        """
+        key = (None if when is None else self.bucket(when), from_apps)
+        return sorted(self.counts.get(key, {}).items(), key = lambda successor: -successor[1])
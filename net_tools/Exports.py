@@ -0,0 +1,132 @@
+"""
+Exporting web pages to files in parallel. Pages are rendered on a bounded pool of worker threads,
+recently rendered pages are reused, and the results can be merged into one file.
+
+Typical usage example:
+    pipeline = ExportPipeline("docs/", pdfkit.from_url, merge = default_pdf_merger())
+    for file_path in pipeline.export(["https://www.bbc.co.uk", "https://www.reuters.com"], "NEWS-May-04-2021"):
+        print(file_path)
+"""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PyPDF2 import PdfMerger
+except ImportError:
+    PdfMerger = None
+
+
+class ExportPipeline:
+    """
+    Renders pages to PDF on a bounded pool of worker threads, one file per URL, and optionally merges them.
+
+    A page rendered less than ttl seconds ago is not rendered again, so repeated exports of the
+    same sources reuse the existing files.
+    """
+    def __init__(self, folder, render, workers = 4, ttl = 15 * 60, merge = None, clock = time.time):
+        """
+        Parameters:
+            folder : str - The folder to write PDFs to.
+            render : callable - Called as render(url, file_path) to write one page, e.g. pdfkit.from_url.
+            workers : int - The maximum number of pages rendered at once.
+            ttl : float - Seconds for which a rendered page is reused.
+            merge : callable - Optional function called as merge(file_paths, file_path) to combine the pages into one file.
+            clock : callable - Returns the current time in seconds.
+        """
+        self.folder = folder
+        self.render = render
+        self.workers = workers
+        self.ttl = ttl
+        self.merge = merge
+        self.clock = clock
+        self.renders = 0
+        self.reused = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def file_path(self, url, prefix):
+        """ Get the output file for a URL, e.g. NEWS-May-04-2021-www.bbc.co.uk.pdf. """
+        name = re.sub(r"[^A-Za-z0-9.]+", "-", re.sub(r"^\w+://", "", url)).strip("-")
+        return os.path.join(self.folder, prefix + "-" + name + ".pdf")
+
+    def is_fresh(self, file_path):
+        try:
+            return self.clock() - os.path.getmtime(file_path) < self.ttl
+        except OSError:
+            return False
+
+    def export_one(self, url, file_path):
+        if self.is_fresh(file_path):
+            with self._lock:
+                self.reused += 1
+            return file_path
+
+        # Renders to a temporary file so that a failed render never leaves a partial PDF to be reused
+        temp_path = file_path + ".part"
+        try:
+            self.render(url, temp_path)
+            os.replace(temp_path, file_path)
+        except Exception as error:
+            print("Could not export " + url + ":", error)
+            with self._lock:
+                self.failures += 1
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+
+        with self._lock:
+            self.renders += 1
+        return file_path
+
+    def export(self, urls, prefix):
+        """
+        Renders each URL to its own file, in parallel. URLs that map to the same file (e.g. http:// and https:// of one page) are rendered once.
+
+        Parameters:
+            urls : [str] - The pages to export.
+            prefix : str - The start of each output filename, e.g. NEWS-May-04-2021.
+
+        Returns:
+            [str] - The exported files, in the order of urls, skipping pages that failed to render. If a merge function was given and more than one page was exported, the merged file is last.
+        """
+        # Keyed by output file, so no two workers ever render into the same file
+        targets = {}
+        for url in urls:
+            targets.setdefault(self.file_path(url, prefix), url)
+        if len(targets) == 0:
+            return []
+        os.makedirs(self.folder, exist_ok = True)
+
+        with ThreadPoolExecutor(max_workers = max(1, min(self.workers, len(targets)))) as executor:
+            futures = [executor.submit(self.export_one, url, file_path) for file_path, url in targets.items()]
+            file_paths = [future.result() for future in futures]
+        file_paths = [file_path for file_path in file_paths if file_path is not None]
+
+        if self.merge is not None and len(file_paths) > 1:
+            merged_path = os.path.join(self.folder, prefix + ".pdf")
+            try:
+                self.merge(file_paths, merged_path)
+                file_paths.append(merged_path)
+            except Exception as error:
+                print("Could not merge exported pages:", error)
+        return file_paths
+
+
+def merge_pdfs(file_paths, merged_path):
+    """ Merge PDFs into one file with PyPDF2. """
+    merger = PdfMerger()
+    for file_path in file_paths:
+        merger.append(file_path)
+    merger.write(merged_path)
+    merger.close()
+
+
+def default_pdf_merger():
+    """Returns merge_pdfs if PyPDF2 is installed, otherwise None, so exports skip merging."""
+    if PdfMerger is None:
+        return None
+    return merge_pdfs
@@ -0,0 +1,209 @@
+"""
+Continuous uptime monitoring. Each monitored site keeps its recent checks in a fixed-size ring
+buffer and its latencies in a histogram, and per-site summaries are written to a tracker in
+batches rather than one row per check.
+
+Typical usage example:
+    monitor = UptimeMonitor(UptimeChecker(), tracking_manager.init_tracker("uptime_summaries", UPTIME_SUMMARY_STRUCTURE))
+    monitor.add("http://example.com")
+    monitor.check("http://example.com")
+    monitor.flush()
+"""
+
+import atexit
+import bisect
+import threading
+from collections import deque
+
+
+# One row per site per flush; latencies are in seconds
+UPTIME_SUMMARY_STRUCTURE = {
+    "start_time" : float,
+    "end_time" : float,
+    "url" : str,
+    "checks" : int,
+    "up" : int,
+    "latency" : float,
+    "latency_p95" : float,
+}
+
+# Upper bounds of the latency histogram's buckets, in seconds; a final bucket holds anything slower
+LATENCY_BOUNDS = [0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10]
+
+
+class LatencyHistogram:
+    """
+    Counts latencies in fixed buckets, so percentiles cost the same however many checks were made.
+    """
+    def __init__(self, bounds = LATENCY_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0
+        self.max = 0
+
+    def add(self, latency):
+        self.counts[bisect.bisect_left(self.bounds, latency)] += 1
+        self.total += 1
+        self.sum += latency
+        self.max = max(self.max, latency)
+
+    def mean(self):
+        """ Get the mean latency, or None if nothing has been counted. """
+        if self.total == 0:
+            return None
+        return self.sum / self.total
+
+    def percentile(self, fraction):
+        """ Get the upper bound of the bucket holding the given fraction (e.g. 0.95) of latencies, or None if nothing has been counted. """
+        if self.total == 0:
+            return None
+
+        needed = fraction * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= needed and count > 0:
+                if index < len(self.bounds):
+                    return min(self.bounds[index], self.max)
+                break
+        return self.max
+
+
+class SiteRecord:
+    """ The monitoring state of one site. """
+    def __init__(self, url, buffer_size):
+        self.url = url
+        self.recent = deque(maxlen = buffer_size)
+        self.latencies = LatencyHistogram()
+        self.removed = False
+
+        # Checks since the last flush
+        self.window_start = None
+        self.window_end = None
+        self.window_checks = 0
+        self.window_up = 0
+        self.window_latencies = LatencyHistogram()
+
+    def availability(self):
+        """ Get the fraction of recent checks that found the site up, or None if it has not been checked. """
+        if len(self.recent) == 0:
+            return None
+        return sum(1 for result in self.recent if result.up) / len(self.recent)
+
+
+class UptimeMonitor:
+    """
+    Checks registered sites on demand, typically from scheduled jobs, and batches their summaries into a tracker.
+    """
+    def __init__(self, checker, tracker, buffer_size = 120):
+        """
+        Parameters:
+            checker : UptimeChecker - The checker to run checks with.
+            tracker : Tracker - A tracker with the UPTIME_SUMMARY_STRUCTURE item structure.
+            buffer_size : int - The number of recent checks kept per site.
+        """
+        self.checker = checker
+        self.tracker = tracker
+        self.buffer_size = buffer_size
+        self.sites = {}
+        self.flushes = 0
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def add(self, url):
+        """ Start monitoring a site. """
+        with self._lock:
+            if url in self.sites:
+                self.sites[url].removed = False
+            else:
+                self.sites[url] = SiteRecord(url, self.buffer_size)
+
+    def remove(self, url):
+        """ Stop monitoring a site, keeping its unsaved summary until the next flush. """
+        with self._lock:
+            site = self.sites.get(url)
+            if site is not None and site.window_checks == 0:
+                del self.sites[url]
+            elif site is not None:
+                site.removed = True
+
+    def check(self, url):
+        """ Check a site and record the result. """
+        result = self.checker.check(url)
+        self.record(result)
+        return result
+
+    def record(self, result):
+        """ Record a check result for a monitored site. """
+        with self._lock:
+            site = self.sites.get(result.url)
+            if site is None:
+                return
+
+            site.recent.append(result)
+            if site.window_start is None:
+                site.window_start = result.time
+            site.window_end = result.time
+            site.window_checks += 1
+            if result.up:
+                site.window_up += 1
+                site.latencies.add(result.latency)
+                site.window_latencies.add(result.latency)
+
+    def flush(self):
+        """
+        Write one summary row per site checked since the last flush, saving the tracker once.
+
+        Returns:
+            int - The number of rows written.
+        """
+        with self._lock:
+            rows = 0
+            for url, site in list(self.sites.items()):
+                if site.window_checks > 0:
+                    latency = site.window_latencies.mean()
+                    latency_p95 = site.window_latencies.percentile(0.95)
+                    self.tracker.add_item(self.tracker.new_item([
+                        site.window_start,
+                        site.window_end,
+                        url,
+                        site.window_checks,
+                        site.window_up,
+                        latency if latency is not None else 0,
+                        latency_p95 if latency_p95 is not None else 0,
+                    ]))
+                    rows += 1
+
+                    site.window_start = None
+                    site.window_checks = 0
+                    site.window_up = 0
+                    site.window_latencies = LatencyHistogram()
+
+                if site.removed:
+                    del self.sites[url]
+
+            if rows > 0:
+                self.tracker.save_changes()
+                self.flushes += 1
+            return rows
+
+    def summary(self, url):
+        """
+        Get a site's monitoring summary.
+
+        Returns:
+            dict - The recent availability (0 to 1), number of recent checks, last status, and median, 95th percentile and mean latency in seconds, or None if the site is not monitored.
+        """
+        with self._lock:
+            site = self.sites.get(url)
+            if site is None:
+                return None
+            return {
+                "availability": site.availability(),
+                "checks": len(site.recent),
+                "status": site.recent[-1].status if len(site.recent) > 0 else None,
+                "latency_p50": site.latencies.percentile(0.5),
+                "latency_p95": site.latencies.percentile(0.95),
+                "latency_mean": site.latencies.mean(),
+            }
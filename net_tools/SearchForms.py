@@ -0,0 +1,223 @@
+"""
+Discovering a site's search URL from its search form. The page is streamed and parsed as it
+arrives, and reading stops at the first suitable form. Discovered URL templates are kept in a
+per-domain JSON cache, so each site is only fetched again once its entry expires.
+
+Typical usage example:
+    cache = SearchTemplateCache("data/search_forms.json")
+    template = cache.find("https://example.com")
+    print(fill_template(template, "rice recipes"))
+"""
+
+import codecs
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from html.parser import HTMLParser
+from urllib.parse import quote_plus, urlencode, urljoin, urlsplit
+
+QUERY_PLACEHOLDER = "{query}"
+
+# Input names that usually hold a search query, preferred when a form has several text inputs
+QUERY_NAMES = ["q", "query", "search", "s", "k", "keywords", "searchtext", "text", "term", "p"]
+TEXT_TYPES = ["text", "search", ""]
+
+
+class SearchFormParser(HTMLParser):
+    """
+    Finds the first form that looks like a search form: submitted with GET, with a named text
+    or search input, and no password or email inputs.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs = True)
+        self.form = None
+        self.result = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.result is not None:
+            return
+        attrs = dict((name, value or "") for name, value in attrs)
+
+        if tag == "form":
+            self.form = {
+                "action": attrs.get("action", ""),
+                "method": attrs.get("method", "get").lower(),
+                "search_role": attrs.get("role", "").lower() == "search",
+                "fields": [],
+                "rejected": False,
+            }
+        elif tag == "input" and self.form is not None:
+            input_type = attrs.get("type", "").lower()
+            name = attrs.get("name", "")
+            if input_type in ("password", "email") or name.lower() in ("email", "password"):
+                self.form["rejected"] = True
+            elif name != "" and input_type in TEXT_TYPES:
+                self.form["fields"].append(("query", name, input_type == "search"))
+            elif name != "" and input_type == "hidden":
+                self.form["fields"].append(("hidden", name, attrs.get("value", "")))
+
+    def handle_endtag(self, tag):
+        if tag != "form" or self.form is None or self.result is not None:
+            return
+
+        form = self.form
+        self.form = None
+        query_fields = [field for field in form["fields"] if field[0] == "query"]
+        if form["rejected"] or form["method"] != "get" or len(query_fields) == 0:
+            return
+
+        # Prefer an input marked as a search box, then a conventional query name, then the first text input
+        query_name = query_fields[0][1]
+        for _, name, is_search in query_fields:
+            if is_search:
+                query_name = name
+                break
+        else:
+            for _, name, _ in query_fields:
+                if name.lower() in QUERY_NAMES:
+                    query_name = name
+                    break
+
+        hidden = [(name, value) for kind, name, value in form["fields"] if kind == "hidden"]
+        self.result = (form["action"], query_name, hidden)
+
+
+def build_template(page_url, action, query_name, hidden):
+    """
+    Builds a search URL template from a form, with {query} where the search terms go.
+
+    Parameters:
+        page_url : str - The URL of the page the form was found on, which relative actions are resolved against.
+        action : str - The form's action attribute.
+        query_name : str - The name of the form's query input.
+        hidden : [(str, str)] - The form's hidden inputs, submitted with every search.
+    """
+    url = urljoin(page_url, action).split("#")[0]
+    params = urlencode(hidden)
+    if params != "":
+        params += "&"
+    params += quote_plus(query_name) + "=" + QUERY_PLACEHOLDER
+    return url + ("&" if "?" in url else "?") + params
+
+
+def fill_template(template, query):
+    """ Fill a search URL template with a query. """
+    return template.replace(QUERY_PLACEHOLDER, quote_plus(query))
+
+
+def discover_search_template(url, timeout = 5, chunk_size = 8192, max_bytes = 2 * 1024 * 1024):
+    """
+    Fetches a page, parsing it as it streams in, until a search form is found.
+
+    Parameters:
+        url : str - The page to look for a search form on.
+        timeout : float - Seconds to wait when connecting and for each read.
+        chunk_size : int - Bytes read and parsed at a time.
+        max_bytes : int - The most bytes read before giving up.
+
+    Returns:
+        (str, int) - The search URL template, or None if the page has no search form, and the number of bytes read.
+    """
+    request = urllib.request.Request(url, headers = {"User-Agent": "Mozilla/5.0 (compatible; Aria)"})
+    parser = SearchFormParser()
+    bytes_read = 0
+    with urllib.request.urlopen(request, timeout = timeout) as response:
+        page_url = response.geturl()
+        charset = response.headers.get_content_charset() or "utf-8"
+        try:
+            decoder = codecs.getincrementaldecoder(charset)(errors = "replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors = "replace")
+
+        while parser.result is None and bytes_read < max_bytes:
+            chunk = response.read(chunk_size)
+            if not chunk:
+                break
+            bytes_read += len(chunk)
+            parser.feed(decoder.decode(chunk))
+
+    if parser.result is None:
+        return None, bytes_read
+    return build_template(page_url, *parser.result), bytes_read
+
+
+class SearchTemplateCache:
+    """
+    A JSON file of discovered search URL templates keyed by domain. Sites without a search form
+    are cached too, so they are not fetched again before their entry expires.
+    """
+    def __init__(self, path, ttl = 30 * 24 * 60 * 60, discover = discover_search_template, clock = time.time):
+        """
+        Parameters:
+            path : str - The cache file.
+            ttl : float - Seconds before an entry is discovered again.
+            discover : callable - Called as discover(url) to find a template, returning (template or None, bytes read).
+            clock : callable - Returns the current time in seconds.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.discover = discover
+        self.clock = clock
+        self.fetches = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        self.entries = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as cache_file:
+                entries = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def save(self):
+        """ Atomically replace the cache file. """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok = True)
+        fd, temp_path = tempfile.mkstemp(prefix = ".search_forms-", dir = directory)
+        try:
+            with os.fdopen(fd, "w") as temp_file:
+                json.dump(self.entries, temp_file, indent = 4, sort_keys = True)
+            os.replace(temp_path, self.path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def domain(url):
+        return urlsplit(url).netloc.lower()
+
+    def get(self, url):
+        """
+        Returns:
+            dict - The fresh cache entry for a URL's domain ({"template": str or None, "discovered": float}), or None if there is none.
+        """
+        with self._lock:
+            entry = self.entries.get(self.domain(url))
+            if entry is None or self.clock() - entry.get("discovered", 0) >= self.ttl:
+                return None
+            return entry
+
+    def find(self, url):
+        """
+        Gets the search URL template for a site, discovering it if it is not cached or has expired.
+
+        Returns:
+            str - The template, or None if the site has no search form.
+        """
+        entry = self.get(url)
+        if entry is not None:
+            self.hits += 1
+            return entry["template"]
+
+        template, _ = self.discover(url)
+        self.fetches += 1
+        with self._lock:
+            self.entries[self.domain(url)] = {"template": template, "discovered": self.clock()}
+            self.save()
+        return template
@@ -0,0 +1,191 @@
+"""
+Concurrent uptime checks. Connections are pooled per host and kept alive between checks, every
+request has a timeout, and results are recorded in a tracker whose views report availability
+and latency per URL.
+
+Typical usage example:
+    checker = UptimeChecker(timeout = 5)
+    for result in checker.check_all(["http://example.com", "http://example.org"]):
+        print(result.url, result.up, result.latency)
+"""
+
+import http.client
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from tracking_tools.Views import AggregateView
+
+
+CheckResult = namedtuple("CheckResult", ["url", "time", "status", "up", "latency", "error"])
+
+# One row per check; latency is in seconds, and status is 0 when no response was received
+UPTIME_STRUCTURE = {
+    "time" : float,
+    "url" : str,
+    "status" : int,
+    "up" : bool,
+    "latency" : float,
+}
+
+
+class ConnectionPool:
+    """
+    Keeps idle HTTP connections per (scheme, host, port) so repeated checks of a host reuse them.
+    """
+    def __init__(self, timeout = 5, max_idle = 4):
+        """
+        Parameters:
+            timeout : float - Seconds to wait when connecting and for each read.
+            max_idle : int - The maximum number of idle connections kept per host.
+        """
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.created = 0
+        self.reused = 0
+
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, scheme, host, port):
+        """ Get an idle connection to a host, or open a new one. """
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.reused += 1
+                return idle.pop()
+            self.created += 1
+
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout = self.timeout)
+        return http.client.HTTPConnection(host, port, timeout = self.timeout)
+
+    def release(self, scheme, host, port, connection):
+        """ Return a connection whose last response was read in full, so it can be reused. """
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        """ Close all idle connections. """
+        with self._lock:
+            for idle in self._idle.values():
+                for connection in idle:
+                    connection.close()
+            self._idle = {}
+
+
+class UptimeChecker:
+    """
+    Checks URLs concurrently through a shared ConnectionPool.
+
+    A URL is up if it answers with a status below 400. Redirects are not followed, so a
+    redirecting site counts as up without checking where it redirects to.
+    """
+    def __init__(self, timeout = 5, workers = 8, pool = None, clock = time.time):
+        """
+        Parameters:
+            timeout : float - Seconds to wait when connecting and for each read.
+            workers : int - The maximum number of checks run at once.
+            pool : ConnectionPool - Optional pool to share between checkers.
+            clock : callable - Returns the current time in seconds, recorded with each check.
+        """
+        self.workers = workers
+        self.pool = pool if pool is not None else ConnectionPool(timeout = timeout)
+        self.clock = clock
+
+    def check(self, url):
+        """
+        Checks one URL.
+
+        Returns:
+            CheckResult - The check's time, status, whether the URL is up, latency in seconds and any error.
+        """
+        when = self.clock()
+        try:
+            scheme, host, port, path = self.parse_url(url)
+        except ValueError as error:
+            return CheckResult(url, when, 0, False, 0, str(error))
+
+        start = time.perf_counter()
+        # A pooled connection may have been closed by the server while idle, so one retry uses a fresh connection
+        for attempt in range(2):
+            connection = self.pool.acquire(scheme, host, port)
+            try:
+                connection.request("GET", path, headers = {"Connection": "keep-alive", "User-Agent": "Aria uptime"})
+                response = connection.getresponse()
+                response.read()
+            except (OSError, ValueError, http.client.HTTPException) as error:
+                connection.close()
+                if attempt == 0 and isinstance(error, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+                    start = time.perf_counter()
+                    continue
+                return CheckResult(url, when, 0, False, time.perf_counter() - start, str(error) or type(error).__name__)
+
+            latency = time.perf_counter() - start
+            if response.will_close:
+                connection.close()
+            else:
+                self.pool.release(scheme, host, port, connection)
+            return CheckResult(url, when, response.status, response.status < 400, latency, None)
+
+    @staticmethod
+    def parse_url(url):
+        """
+        Splits a URL into the parts needed to request it, raising ValueError if it cannot be checked.
+
+        Returns:
+            (str, str, int, str) - The scheme, host, port and path (with any query).
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        if scheme not in ("http", "https"):
+            raise ValueError("unsupported scheme " + scheme)
+        if not parts.hostname:
+            raise ValueError("no host in " + url)
+        # Raises ValueError for ports that are not numbers or are out of range
+        port = parts.port or (443 if scheme == "https" else 80)
+
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        return scheme, parts.hostname, port, path
+
+    def check_all(self, urls):
+        """
+        Checks many URLs at once. A check that fails unexpectedly marks its URL as down rather than ending the batch.
+
+        Returns:
+            [CheckResult] - One result per URL, in the order given.
+        """
+        if len(urls) == 0:
+            return []
+        with ThreadPoolExecutor(max_workers = max(1, min(self.workers, len(urls)))) as executor:
+            return list(executor.map(self._check_safely, urls))
+
+    def _check_safely(self, url):
+        try:
+            return self.check(url)
+        except (TypeError, ValueError, http.client.HTTPException) as error:
+            return CheckResult(url, self.clock(), 0, False, 0, str(error) or type(error).__name__)
+
+
+def register_uptime_views(tracker):
+    """ Register the views that report availability and latency per URL on an uptime tracker. """
+    tracker.register_view(AggregateView("availability", value = lambda item: 1 if item.data["up"] else 0, group_by = "url"))
+    # Failed checks have no meaningful latency, so they are left out of its mean
+    tracker.register_view(AggregateView("latency", value = "latency", group_by = lambda item: [item.data["url"]] if item.data["up"] else []))
+
+
+def record_results(tracker, results):
+    """ Add check results to an uptime tracker and save them. """
+    for result in results:
+        tracker.add_item(tracker.new_item([result.time, result.url, result.status, result.up, result.latency]))
+    tracker.save_changes()
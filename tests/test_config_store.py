@@ -0,0 +1,77 @@
+import json
+import os
+import stat
+import tempfile
+import time
+import unittest
+
+from config_tools.ConfigStore import ConfigStore, set_path
+
+
+class ConfigStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "aria_config.json")
+        self.config = {"user_name": "Ada", "plugins": {}}
+        self.store = ConfigStore(self.path, lambda: self.config, delay = 0.05)
+
+    def tearDown(self):
+        self.store.flush()
+        self.folder.cleanup()
+
+    def read_file(self):
+        with open(self.path) as cfg_file:
+            return json.load(cfg_file)
+
+    def change(self, path, value):
+        set_path(self.config, path, value)
+        self.store.record(path, value)
+
+    def test_journal_is_replayed_on_load(self):
+        self.store.write(self.config)
+        self.store.delay = 60
+        self.change(["plugins", "google", "enabled"], False)
+        self.change(["user_name"], "Grace")
+
+        # As after a crash: the journal holds changes the config file does not
+        self.assertEqual(self.read_file()["user_name"], "Ada")
+        config = ConfigStore(self.path, dict).load()
+        self.assertEqual(config, {"user_name": "Grace", "plugins": {"google": {"enabled": False}}})
+        self.assertEqual(self.read_file(), config)
+        self.assertFalse(os.path.exists(self.store.journal_path))
+
+    def test_truncated_journal_line_is_ignored(self):
+        self.store.write(self.config)
+        with open(self.store.journal_path, "w") as journal_file:
+            journal_file.write(json.dumps({"path": ["user_name"], "value": "Grace"}) + "\n")
+            journal_file.write('{"path": ["plugins", "x"], "val')
+
+        config = ConfigStore(self.path, dict).load()
+        self.assertEqual(config, {"user_name": "Grace", "plugins": {}})
+
+    def test_changes_are_coalesced_into_one_write(self):
+        for index in range(20):
+            self.change(["count"], index)
+        self.assertEqual(self.store.writes, 0)
+
+        deadline = time.monotonic() + 5
+        while self.store.writes == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.store.writes, 1)
+        self.assertEqual(self.read_file()["count"], 19)
+        self.assertEqual(self.store.pending, 0)
+
+    def test_write_keeps_file_mode(self):
+        self.store.write(self.config)
+        os.chmod(self.path, 0o644)
+        self.store.write(self.config)
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o644)
+
+    def test_unserializable_config_leaves_no_files(self):
+        self.store.write(self.config)
+        self.assertFalse(self.store.write({"bad": object()}))
+        self.assertEqual(os.listdir(self.folder.name), ["aria_config.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,245 @@
+import importlib.util
+import tempfile
+import unittest
+from unittest import mock
+
+from Managers import ContextManager, ProcessManager
+from context_tools.ContextSources import AppleScriptContextSource, ScriptedContextSource, WorkspaceContextSource, default_context_source
+from context_tools.Scripts import ScriptCache, StubScriptBackend
+from context_tools.Traces import SimulatedClock
+from tracking_tools.TrackingManager import TrackingManager
+
+SAFARI = "/Applications/Safari.app"
+MAIL = "/Applications/Mail.app"
+NOTES = "/System/Applications/Notes.app"
+TERMINAL = "/System/Applications/Utilities/Terminal.app"
+
+
+class FakeURL:
+    def __init__(self, path):
+        self._path = path
+
+    def path(self):
+        return self._path
+
+
+class FakeApp:
+    """ Stands in for an NSRunningApplication. """
+    def __init__(self, path, policy = 0):
+        self._path = path
+        self.policy = policy
+        self.terminated = False
+
+    def bundleURL(self):
+        return FakeURL(self._path)
+
+    def executableURL(self):
+        return None
+
+    def activationPolicy(self):
+        return self.policy
+
+    def isTerminated(self):
+        return self.terminated
+
+
+class FakeNotification:
+    def __init__(self, app):
+        self.app = app
+
+    def userInfo(self):
+        return {WorkspaceContextSource.APPLICATION_KEY: self.app}
+
+
+class FakeWorkspace:
+    """ Stands in for NSWorkspace and its notification center. """
+    def __init__(self, apps, front):
+        self.apps = list(apps)
+        self.front = front
+        self.observers = {}
+
+    def notificationCenter(self):
+        return self
+
+    def frontmostApplication(self):
+        return self.front
+
+    def runningApplications(self):
+        return list(self.apps)
+
+    def addObserverForName_object_queue_usingBlock_(self, name, sender, queue, block):
+        token = (name, len(self.observers))
+        self.observers[token] = block
+        return token
+
+    def removeObserver_(self, token):
+        del self.observers[token]
+
+    def post(self, name, app):
+        for (observed, _), block in list(self.observers.items()):
+            if observed == name:
+                block(FakeNotification(app))
+
+    def activate(self, app):
+        self.front = app
+        self.post(WorkspaceContextSource.ACTIVATED, app)
+
+    def launch(self, app):
+        self.apps.append(app)
+        self.post(WorkspaceContextSource.LAUNCHED, app)
+
+    def terminate(self, app):
+        self.apps.remove(app)
+        app.terminated = True
+        self.post(WorkspaceContextSource.TERMINATED, app)
+
+
+class WorkspaceContextSourceTest(unittest.TestCase):
+    def setUp(self):
+        self.safari = FakeApp(SAFARI)
+        self.mail = FakeApp(MAIL)
+        self.agent = FakeApp("/Library/Agent.app", policy = 2)
+        self.workspace = FakeWorkspace([self.safari, self.mail, self.agent], self.safari)
+        self.source = WorkspaceContextSource(self.workspace)
+        self.events = []
+
+    def test_start_reads_the_current_context(self):
+        self.source.start(lambda front_app, running_apps: self.events.append((front_app, running_apps)))
+        self.assertEqual(self.events, [(SAFARI, [MAIL, SAFARI])])
+        self.assertEqual(self.source.stats(), {"notifications": 0, "reads": 1})
+
+    def test_notifications_update_the_context(self):
+        self.source.start(lambda front_app, running_apps: self.events.append((front_app, running_apps)))
+        self.workspace.activate(self.mail)
+        notes = FakeApp(NOTES)
+        self.workspace.launch(notes)
+        self.workspace.terminate(self.safari)
+
+        self.assertEqual(self.events[1:], [(MAIL, [MAIL, SAFARI]), (MAIL, [MAIL, SAFARI, NOTES]), (MAIL, [MAIL, NOTES])])
+        # Switching apps does not read the running apps again
+        self.assertEqual(self.source.stats(), {"notifications": 3, "reads": 3})
+
+    def test_background_apps_are_ignored(self):
+        self.source.start(lambda front_app, running_apps: self.events.append((front_app, running_apps)))
+        self.workspace.launch(FakeApp("/Library/Helper.app", policy = 1))
+        self.assertEqual(len(self.events), 1)
+
+    def test_activation_before_launch_notification(self):
+        self.source.start(lambda front_app, running_apps: self.events.append((front_app, running_apps)))
+        notes = FakeApp(NOTES)
+        self.workspace.apps.append(notes)
+        self.workspace.activate(notes)
+        self.assertEqual(self.events[-1], (NOTES, [MAIL, SAFARI, NOTES]))
+
+    def test_stop_removes_observers(self):
+        self.source.start(lambda front_app, running_apps: self.events.append((front_app, running_apps)))
+        self.source.stop()
+        self.assertEqual(self.workspace.observers, {})
+        self.workspace.activate(self.mail)
+        self.assertEqual(len(self.events), 1)
+
+    @unittest.skipIf(importlib.util.find_spec("AppKit") is not None, "PyObjC is installed")
+    def test_polling_fallback_without_pyobjc(self):
+        with mock.patch("context_tools.ContextSources.sys.platform", "darwin"):
+            source = default_context_source(scripts = ScriptCache(StubScriptBackend()))
+        self.assertIsInstance(source, AppleScriptContextSource)
+
+
+class ContextManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.clock = SimulatedClock()
+        self.managers = {
+            "tracking": TrackingManager(self.folder.name + "/"),
+            "processes": ProcessManager(reader = lambda: []),
+        }
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def context_manager(self, source):
+        context_manager = ContextManager(self.managers, context_source = source, clock = self.clock)
+        context_manager.start()
+        self.addCleanup(context_manager.stop)
+        return context_manager
+
+    def history(self, context_manager):
+        return [(item.data["start_time"], item.data["end_time"], sorted(item.data["targets"])) for item in context_manager.context_tracker.items]
+
+    def test_scripted_changes_become_history_rows(self):
+        source = ScriptedContextSource([
+            (0, SAFARI, [SAFARI, MAIL]),
+            (0, MAIL, [SAFARI, MAIL]),
+            (0, MAIL, [MAIL, NOTES]),
+        ])
+        context_manager = self.context_manager(source)
+        self.assertFalse(context_manager.wait_for_change(timeout = 0))
+
+        source.step()
+        self.assertTrue(context_manager.wait_for_change(timeout = 0))
+        context_manager.update_context()
+        self.assertEqual(context_manager.current_app, SAFARI)
+        self.assertEqual(self.history(context_manager), [(32400.0, 32400.0, [MAIL, SAFARI])])
+
+        # Switching apps changes the focused app without opening a new row
+        self.clock.set(60)
+        source.step()
+        self.assertTrue(context_manager.wait_for_change(timeout = 0))
+        context_manager.update_context()
+        self.assertEqual(context_manager.current_app, MAIL)
+        self.assertEqual(context_manager.previous_apps, [SAFARI, MAIL])
+        self.assertEqual(len(context_manager.context_tracker.items), 1)
+
+        self.clock.set(120)
+        source.step()
+        context_manager.wait_for_change(timeout = 0)
+        context_manager.update_context()
+        self.assertEqual(self.history(context_manager), [(32400.0, 32520.0, [MAIL, SAFARI]), (32520.0, 32520.0, [MAIL, NOTES])])
+        self.assertIs(context_manager.context_tracker.items[0].data["targets"], context_manager.app_sets.intern([SAFARI, MAIL]))
+
+    def test_repeated_context_is_not_an_event(self):
+        source = ScriptedContextSource([(0, SAFARI, [SAFARI, MAIL]), (0, SAFARI, [MAIL, SAFARI, MAIL])])
+        context_manager = self.context_manager(source)
+        source.step()
+        self.assertTrue(context_manager.wait_for_change(timeout = 0))
+        source.step()
+        self.assertFalse(context_manager.wait_for_change(timeout = 0))
+
+    def test_terminal_is_never_the_current_app(self):
+        source = ScriptedContextSource([(0, SAFARI, [SAFARI, TERMINAL]), (0, TERMINAL, [SAFARI, TERMINAL])])
+        context_manager = self.context_manager(source)
+        while source.step():
+            context_manager.update_context()
+        self.assertEqual(context_manager.current_app, SAFARI)
+
+    def test_input_wakes_the_loop_and_ends_idle(self):
+        context_manager = self.context_manager(ScriptedContextSource())
+        context_manager.note_input()
+        self.assertTrue(context_manager.wait_for_change(timeout = 0))
+
+        context_manager.idle_after = 1
+        context_manager.last_activity -= 2
+        self.assertIsNone(context_manager.next_timeout())
+        self.assertTrue(context_manager.idle)
+
+        context_manager.note_input()
+        self.assertFalse(context_manager.idle)
+        self.assertIsNotNone(context_manager.next_timeout())
+
+    def test_workspace_notifications_drive_the_context(self):
+        safari = FakeApp(SAFARI)
+        workspace = FakeWorkspace([safari], safari)
+        context_manager = self.context_manager(WorkspaceContextSource(workspace))
+        self.assertTrue(context_manager.wait_for_change(timeout = 0))
+        context_manager.update_context()
+
+        self.clock.set(30)
+        workspace.launch(FakeApp(MAIL))
+        self.assertTrue(context_manager.wait_for_change(timeout = 0))
+        context_manager.update_context()
+        self.assertEqual(self.history(context_manager), [(32400.0, 32430.0, [SAFARI]), (32430.0, 32430.0, [MAIL, SAFARI])])
+        self.assertEqual(context_manager.stats()["polling"], {"notifications": 1, "reads": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from cmds.x import Command, ExecutionPlan
+from Managers import CommandManager
+
+
+class StubConfig:
+    def __init__(self, aria_path):
+        self.aria_path = aria_path
+
+    def get(self, key, default = None):
+        return self.aria_path if key == "aria_path" else default
+
+
+class StubPlugin:
+    """ Records its calls, tracking how many run at once. """
+    def __init__(self, name, log, delay = 0.02):
+        self.name = name
+        self.log = log
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def execute(self, str_in, managers):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+            self.log.append(str_in)
+        return "run " + str_in + " done"
+
+
+class ExecutionPlanTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        os.makedirs(self.folder.name + "/cmds")
+        for name in ["alpha", "beta", "x"]:
+            open(self.folder.name + "/cmds/" + name + ".py", "w").close()
+
+        self.command_manager = CommandManager({"config": StubConfig(self.folder.name)})
+        self.log = []
+        for name in ["alpha", "beta"]:
+            self.command_manager.plugins[name] = StubPlugin(name, self.log)
+        self.managers = {"command": self.command_manager}
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def compile(self, targets):
+        return ExecutionPlan.compile("plan", targets, self.command_manager)
+
+    def test_compile(self):
+        plan = self.compile(["alpha 1", "*beta 2", "*alpha 3", "beta 4"])
+
+        self.assertEqual([(step.cmd_name, step.text, step.concurrent) for step in plan.steps], [("alpha", "alpha 1", False), ("beta", "beta 2", True), ("alpha", "alpha 3", True), ("beta", "beta 4", False)])
+        self.assertEqual([len(batch) for batch in plan.batches], [1, 2, 1])
+        self.assertIs(plan.steps[0].plugin, self.command_manager.plugins["alpha"])
+
+    def test_steps_routed_at_run_time_are_not_compiled(self):
+        self.assertIsNone(self.compile(["alpha 1", "enable plugin beta"]))
+        self.assertIsNone(self.compile(["alpha 1", "gamma 2"]))
+
+    def test_concurrent_steps_of_one_plugin_run_in_order(self):
+        plan = self.compile(["*alpha 1", "*beta 2", "*alpha 3", "*alpha 4", "*beta 5"])
+        feedback = plan.run(self.managers)
+
+        alpha, beta = self.command_manager.plugins["alpha"], self.command_manager.plugins["beta"]
+        self.assertEqual((alpha.max_active, beta.max_active), (1, 1))
+        self.assertEqual([text for text in self.log if text.startswith("alpha")], ["alpha 1", "alpha 3", "alpha 4"])
+        self.assertEqual([text for text in self.log if text.startswith("beta")], ["beta 2", "beta 5"])
+        # Results come back in step order whatever order the steps finished in
+        self.assertEqual(feedback, ["alpha 1 done", "beta 2 done", "alpha 3 done", "alpha 4 done", "beta 5 done"])
+
+    def test_plugins_run_concurrently(self):
+        for plugin in self.command_manager.plugins.values():
+            plugin.delay = 0.3
+        start = time.perf_counter()
+        self.compile(["*alpha 1", "*beta 2"]).run(self.managers)
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_plan_is_recompiled_after_unload(self):
+        command = Command()
+        pathway = type("Pathway", (), {"data": {"name": "plan", "targets": ["alpha 1", "beta 2"]}})()
+
+        plan = command.get_plan(pathway, self.managers)
+        self.assertIs(command.get_plan(pathway, self.managers), plan)
+
+        self.command_manager.unload_command_plugin("beta")
+        self.assertIsNone(command.get_plan(pathway, self.managers))
+
+        self.command_manager.plugins["beta"] = StubPlugin("beta", self.log)
+        self.command_manager.generation += 1
+        replanned = command.get_plan(pathway, self.managers)
+        self.assertIsNot(replanned, plan)
+        self.assertIs(replanned.steps[1].plugin, self.command_manager.plugins["beta"])
+
+    def test_plan_is_recompiled_when_targets_change(self):
+        command = Command()
+        pathway = type("Pathway", (), {"data": {"name": "plan", "targets": ["alpha 1"]}})()
+        plan = command.get_plan(pathway, self.managers)
+
+        pathway.data["targets"] = ["alpha 1", "*beta 2"]
+        replanned = command.get_plan(pathway, self.managers)
+        self.assertIsNot(replanned, plan)
+        self.assertEqual(len(replanned.steps), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
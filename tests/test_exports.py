@@ -0,0 +1,101 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from net_tools import Exports
+from net_tools.Exports import ExportPipeline, default_pdf_merger, merge_pdfs
+
+
+class StubRenderer:
+    """ Writes each URL into its file instead of rendering it, failing for URLs containing "fail". """
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, url, file_path):
+        with self._lock:
+            self.calls.append(url)
+        if "fail" in url:
+            with open(file_path, "w") as part_file:
+                part_file.write("partial")
+            raise OSError("render failed")
+        with open(file_path, "w") as page_file:
+            page_file.write(url)
+
+
+class ExportPipelineTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.render = StubRenderer()
+        self.offset = 0
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def pipeline(self, **kwargs):
+        return ExportPipeline(self.folder.name, self.render, ttl = 60, clock = lambda: time.time() + self.offset, **kwargs)
+
+    def test_one_file_per_distinct_url(self):
+        urls = ["https://a.example", "https://b.example/news", "https://a.example"]
+        file_paths = self.pipeline().export(urls, "NEWS")
+
+        self.assertEqual([os.path.basename(file_path) for file_path in file_paths], ["NEWS-a.example.pdf", "NEWS-b.example-news.pdf"])
+        with open(file_paths[1]) as page_file:
+            self.assertEqual(page_file.read(), "https://b.example/news")
+        self.assertEqual(sorted(self.render.calls), ["https://a.example", "https://b.example/news"])
+
+    def test_urls_for_the_same_file_are_rendered_once(self):
+        file_paths = self.pipeline().export(["http://a.example", "https://a.example", "https://b.example"], "NEWS")
+
+        self.assertEqual([os.path.basename(file_path) for file_path in file_paths], ["NEWS-a.example.pdf", "NEWS-b.example.pdf"])
+        self.assertEqual(sorted(self.render.calls), ["http://a.example", "https://b.example"])
+
+    def test_recent_pages_are_reused(self):
+        pipeline = self.pipeline()
+        pipeline.export(["https://a.example"], "NEWS")
+        pipeline.export(["https://a.example"], "NEWS")
+        self.assertEqual((pipeline.renders, pipeline.reused), (1, 1))
+
+        self.offset = 60
+        pipeline.export(["https://a.example"], "NEWS")
+        self.assertEqual((pipeline.renders, pipeline.reused), (2, 1))
+
+    def test_failed_render_leaves_no_file(self):
+        pipeline = self.pipeline()
+        file_paths = pipeline.export(["https://fail.example", "https://a.example"], "NEWS")
+
+        self.assertEqual([os.path.basename(file_path) for file_path in file_paths], ["NEWS-a.example.pdf"])
+        self.assertEqual(pipeline.failures, 1)
+        self.assertEqual(sorted(os.listdir(self.folder.name)), ["NEWS-a.example.pdf"])
+
+    def test_merge(self):
+        merges = []
+
+        def merge(file_paths, merged_path):
+            merges.append(list(file_paths))
+            with open(merged_path, "w") as merged_file:
+                merged_file.write("merged")
+
+        file_paths = self.pipeline(merge = merge).export(["https://a.example", "https://b.example"], "NEWS")
+
+        self.assertEqual(merges, [file_paths[:2]])
+        self.assertEqual(file_paths[2], os.path.join(self.folder.name, "NEWS.pdf"))
+
+    def test_failed_merge_keeps_pages(self):
+        def merge(file_paths, merged_path):
+            raise OSError("merge failed")
+
+        file_paths = self.pipeline(merge = merge).export(["https://a.example", "https://b.example"], "NEWS")
+        self.assertEqual(len(file_paths), 2)
+
+    def test_default_merger(self):
+        if Exports.PdfMerger is None:
+            self.assertIsNone(default_pdf_merger())
+        else:
+            self.assertIs(default_pdf_merger(), merge_pdfs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import random
+import unittest
+
+from tracking_tools.Frecency import FrecencyIndex, tokenize
+
+DAY = 24 * 3600
+
+
+class FrecencyIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = FrecencyIndex(half_life = DAY)
+
+    def test_recent_visits_outrank_older_ones(self):
+        now = 100 * DAY
+        self.index.visit("/old", now - 3 * DAY, weight = 4)
+        self.index.visit("/new", now)
+
+        # Four visits three half-lives ago are worth half of one visit now
+        self.assertAlmostEqual(self.index.score("/old", now), 0.5)
+        self.assertAlmostEqual(self.index.score("/new", now), 1)
+        self.assertEqual(self.index.top(), "/new")
+
+        self.index.visit("/old", now)
+        self.assertEqual(self.index.top(), "/old")
+        self.assertEqual(self.index.visits["/old"], 2)
+
+    def test_ranking_matches_brute_force(self):
+        rng = random.Random(0)
+        destinations = ["/home/ada/" + name for name in ["code", "code/aria", "docs", "music", "photos", "code/notes"]]
+        for _ in range(300):
+            self.index.visit(rng.choice(destinations), rng.random() * 30 * DAY, weight = rng.randint(1, 3))
+            if rng.random() < 0.1:
+                self.index.remove(rng.choice(destinations))
+
+            for query in ["", "code", "ada co", "no"]:
+                matches = [destination for destination in self.index.scores if all(any(token.startswith(query_token) for token in tokenize(destination)) for query_token in tokenize(query))]
+                expected = max(matches, key = lambda destination: (self.index.score(destination, 30 * DAY), destination), default = None)
+                self.assertEqual(self.index.top(query), expected, query)
+
+    def test_prefix_matching(self):
+        for destination in ["/Users/ada/Code/aria", "/Users/ada/Documents", "https://docs.python.org"]:
+            self.index.visit(destination, 0)
+
+        self.assertEqual(self.index.matching("doc"), {"/Users/ada/Documents", "https://docs.python.org"})
+        self.assertEqual(self.index.matching("ada doc"), {"/Users/ada/Documents"})
+        self.assertEqual(self.index.matching("ARIA"), {"/Users/ada/Code/aria"})
+        self.assertEqual(self.index.matching("ruby"), set())
+        self.assertEqual(self.index.top(["ada", "co"]), "/Users/ada/Code/aria")
+        self.assertIsNone(self.index.top("ruby"))
+
+    def test_remove_keeps_vocabulary_in_step(self):
+        self.index.visit("/a/shared/one", 0)
+        self.index.visit("/b/shared/two", 0)
+
+        self.index.remove("/a/shared/one")
+        self.assertEqual(self.index.vocabulary, ["b", "shared", "two"])
+        self.assertEqual(self.index.postings["shared"], {"/b/shared/two"})
+        self.assertNotIn("/a/shared/one", self.index)
+        self.assertEqual(self.index.top(), "/b/shared/two")
+
+        self.index.remove("/b/shared/two")
+        self.index.remove("/b/shared/two")
+        self.assertEqual((self.index.vocabulary, self.index.postings, len(self.index)), ([], {}, 0))
+        self.assertIsNone(self.index.top())
+
+    def test_weight_must_be_positive(self):
+        for weight in [0, -1, float("nan")]:
+            with self.assertRaises(ValueError):
+                self.index.visit("/a", 0, weight = weight)
+        self.assertEqual(len(self.index), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+import signal
+import tempfile
+import unittest
+from unittest import mock
+
+from context_tools.Processes import Process, ProcessController, ProcessTable, ProcReader
+
+
+class FakeReader:
+    """ A process table that can be changed between reads; read(pid) always sees the current table. """
+    def __init__(self, processes):
+        self.live = dict((process.pid, process) for process in processes)
+
+    def __call__(self):
+        return list(self.live.values())
+
+    def read(self, pid):
+        return self.live.get(pid)
+
+
+class FakeKill:
+    """ Records signals instead of sending them. Processes listed in stubborn ignore SIGTERM. """
+    def __init__(self, reader, stubborn = ()):
+        self.reader = reader
+        self.stubborn = set(stubborn)
+        self.sent = []
+
+    def __call__(self, pid, sig):
+        if pid not in self.reader.live:
+            raise ProcessLookupError(pid)
+        if sig == 0:
+            return
+        self.sent.append((pid, sig))
+        if sig == signal.SIGKILL or pid not in self.stubborn:
+            del self.reader.live[pid]
+
+
+def app(pid, path, start_time = 100, uid = 501):
+    return Process(pid, uid, path, path, path, start_time)
+
+
+class ProcessControllerTest(unittest.TestCase):
+    def setUp(self):
+        self.reader = FakeReader([
+            app(10, "/Applications/Safari.app/Contents/MacOS/Safari"),
+            app(11, "/Applications/Mail.app/Contents/MacOS/Mail"),
+            app(12, "/usr/bin/python3 /Users/ada/safari_export.py"),
+        ])
+        self.table = ProcessTable(self.reader, ttl = 60)
+        self.controller = ProcessController(self.table, poll_interval = 0.001)
+        self.table.refresh()
+
+    def terminate(self, kill, *args, **kwargs):
+        with mock.patch("context_tools.Processes.os.kill", kill):
+            return self.controller.terminate(*args, **kwargs)
+
+    def test_terminate(self):
+        kill = FakeKill(self.reader)
+        result = self.terminate(kill, ["/Applications/Safari.app", "mail"])
+
+        self.assertEqual(result, {"/Applications/Safari.app": [10], "mail": [11]})
+        self.assertEqual(sorted(kill.sent), [(10, signal.SIGTERM), (11, signal.SIGTERM)])
+
+    def test_reused_pid_is_not_signalled(self):
+        # Safari exited and its pid went to an unrelated process before the snapshot was read again
+        self.reader.live[10] = app(10, "/usr/sbin/sshd", start_time = 200)
+        kill = FakeKill(self.reader)
+        result = self.terminate(kill, ["Safari"])
+
+        self.assertEqual(result, {"Safari": []})
+        self.assertEqual(kill.sent, [])
+
+    def test_changed_executable_is_not_signalled(self):
+        # Same pid and start time, but the process exec'd another program
+        self.reader.live[11] = app(11, "/bin/zsh")
+        kill = FakeKill(self.reader)
+        self.terminate(kill, ["mail"])
+        self.assertEqual(kill.sent, [])
+
+    def test_pid_reused_before_sigkill(self):
+        kill = FakeKill(self.reader, stubborn = [10])
+        original = kill.__call__
+
+        def kill_and_reuse(pid, sig):
+            original(pid, sig)
+            # Safari exits after the last liveness check, and its pid is reused before SIGKILL
+            if sig == 0 and pid == 10 and (10, signal.SIGTERM) in kill.sent:
+                self.reader.live[10] = app(10, "/usr/sbin/sshd", start_time = 300)
+
+        result = self.terminate(kill_and_reuse, ["Safari"], force_after = 0)
+        self.assertEqual(result, {"Safari": [10]})
+        self.assertEqual(kill.sent, [(10, signal.SIGTERM)])
+        self.assertIn(10, self.reader.live)
+
+    def test_stubborn_process_is_killed(self):
+        kill = FakeKill(self.reader, stubborn = [10])
+        self.terminate(kill, ["Safari"], force_after = 0)
+        self.assertEqual(kill.sent, [(10, signal.SIGTERM), (10, signal.SIGKILL)])
+
+    def test_exact_matching(self):
+        kill = FakeKill(self.reader)
+        self.assertEqual(self.terminate(kill, ["safari_export"], exact = True), {"safari_export": []})
+        self.assertEqual(kill.sent, [])
+
+        # Without exact, unmatched targets fall back to command lines, like pkill -f
+        self.assertEqual(self.terminate(kill, ["safari_export"]), {"safari_export": [12]})
+        self.assertEqual(kill.sent, [(12, signal.SIGTERM)])
+
+    def test_own_process_is_never_matched(self):
+        self.reader.live[os.getpid()] = app(os.getpid(), "/usr/bin/python3 aria")
+        self.table.refresh()
+        self.assertEqual(self.controller.find(["aria"]), {"aria": []})
+
+
+class ProcReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.proc = self.folder.name
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def add(self, pid, name, start_time, args):
+        path = os.path.join(self.proc, str(pid))
+        os.makedirs(path, exist_ok = True)
+        fields = ["S"] + ["0"] * 18 + [str(start_time)] + ["0"] * 10
+        with open(os.path.join(path, "stat"), "w") as stat_file:
+            stat_file.write(str(pid) + " (" + name + ") " + " ".join(fields) + "\n")
+        with open(os.path.join(path, "cmdline"), "wb") as cmdline_file:
+            cmdline_file.write(b"\0".join(arg.encode() for arg in args) + b"\0")
+
+    def test_start_time_with_awkward_names(self):
+        self.add(5, "a) (b 1 2", 4242, ["a"])
+        self.assertEqual(ProcReader(self.proc).start_time(5), 4242)
+        self.assertIsNone(ProcReader(self.proc).start_time(6))
+
+    def test_reused_pid_is_read_again(self):
+        reader = ProcReader(self.proc)
+        self.add(5, "Safari", 100, ["/Applications/Safari.app/Contents/MacOS/Safari"])
+        self.assertEqual([process.argv0 for process in reader()], ["/Applications/Safari.app/Contents/MacOS/Safari"])
+
+        self.add(5, "sshd", 200, ["/usr/sbin/sshd"])
+        processes = reader()
+        self.assertEqual([(process.argv0, process.start_time) for process in processes], [("/usr/sbin/sshd", 200)])
+        self.assertEqual(reader.read(5), processes[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
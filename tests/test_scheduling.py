@@ -0,0 +1,132 @@
+import unittest
+
+from context_tools.Scheduling import AdaptiveInterval, JobScheduler
+from Managers import SchedulerManager
+
+
+class FakeClock:
+    def __init__(self, now = 1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class JobSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.jobs = JobScheduler(self.clock, seed = 0)
+        self.calls = []
+
+    def record(self, name):
+        return lambda: self.calls.append(name)
+
+    def run_due(self):
+        due = self.jobs.due()
+        for job in due:
+            job.run()
+        return [job.name for job in due]
+
+    def test_invalid_intervals_are_rejected(self):
+        for interval in [0, -1, float("nan"), "60", None, True]:
+            with self.assertRaises(ValueError):
+                self.jobs.every("bad", interval, self.record("bad"))
+        with self.assertRaises(ValueError):
+            self.jobs.every("bad", 10, self.record("bad"), jitter = 1)
+        self.assertEqual(self.jobs.jobs, {})
+
+    def test_due(self):
+        self.jobs.every("now", 10, self.record("now"), jitter = 0, run_now = True)
+        self.jobs.every("later", 10, self.record("later"), jitter = 0)
+
+        self.assertEqual(self.run_due(), ["now"])
+        self.assertEqual(self.jobs.next_delay(), 10)
+        self.clock.now += 9.9
+        self.assertEqual(self.run_due(), [])
+        self.clock.now += 0.1
+        self.assertEqual(sorted(self.run_due()), ["later", "now"])
+        self.assertEqual(sorted(self.calls), ["later", "now", "now"])
+
+    def test_missed_runs_are_coalesced(self):
+        job = self.jobs.every("slow", 10, self.record("slow"), jitter = 0)
+
+        # The job is still running when it comes due twice more
+        self.clock.now += 10
+        self.assertEqual(self.jobs.due(), [job])
+        self.clock.now += 10
+        self.assertEqual(self.jobs.due(), [])
+        self.clock.now += 10
+        self.assertEqual(self.jobs.due(), [])
+        self.assertEqual(job.coalesced, 2)
+
+        job.run()
+        # A long sleep counts as one missed run, not a backlog
+        self.clock.now += 100
+        self.assertEqual(self.run_due(), ["slow"])
+        self.assertEqual(self.run_due(), [])
+        self.assertEqual(self.jobs.stats()["slow"], {"interval": 10, "runs": 2, "coalesced": 2, "failures": 0})
+
+    def test_jitter_spreads_runs_within_bounds(self):
+        delays = []
+        for index in range(50):
+            job = self.jobs.every("job " + str(index), 100, self.record("job"), jitter = 0.2)
+            delays.append(job.next_run - self.clock.now)
+
+        self.assertTrue(all(80 <= delay <= 120 for delay in delays))
+        self.assertGreater(len(set(delays)), 40)
+
+    def test_cancel(self):
+        self.jobs.every("job", 10, self.record("job"), jitter = 0, run_now = True)
+        self.assertTrue(self.jobs.cancel("job"))
+        self.assertFalse(self.jobs.cancel("job"))
+        self.assertEqual(self.run_due(), [])
+        self.assertIsNone(self.jobs.next_delay())
+
+    def test_replacing_a_job_cancels_the_old_one(self):
+        self.jobs.every("job", 10, self.record("old"), jitter = 0, run_now = True)
+        self.jobs.every("job", 10, self.record("new"), jitter = 0, run_now = True)
+        self.assertEqual(self.run_due(), ["job"])
+        self.assertEqual(self.calls, ["new"])
+
+    def test_failures_are_counted(self):
+        def fail():
+            raise RuntimeError("boom")
+
+        job = self.jobs.every("fail", 10, fail, jitter = 0, run_now = True)
+        self.run_due()
+        self.assertEqual((job.runs, job.failures, job.running), (1, 1, False))
+
+
+class SchedulerManagerTest(unittest.TestCase):
+    def test_run_pending_on_the_calling_thread(self):
+        clock = FakeClock()
+        scheduler = SchedulerManager(clock = clock, seed = 0)
+        calls = []
+        scheduler.every("job", 5, lambda: calls.append(clock.now), jitter = 0, run_now = True)
+
+        self.assertEqual(scheduler.run_pending(), 1)
+        clock.now += 5
+        self.assertEqual(scheduler.run_pending(), 1)
+        self.assertEqual(calls, [1000.0, 1005.0])
+
+        scheduler.stop()
+        clock.now += 5
+        self.assertEqual(scheduler.run_pending(), 0)
+
+    def test_invalid_interval_is_rejected(self):
+        with self.assertRaises(ValueError):
+            SchedulerManager().every("job", 0, lambda: None)
+
+
+class AdaptiveIntervalTest(unittest.TestCase):
+    def test_back_off_and_reset(self):
+        interval = AdaptiveInterval(1, 5)
+        for expected in [2, 4, 5, 5]:
+            interval.back_off()
+            self.assertEqual(interval.current, expected)
+        interval.reset()
+        self.assertEqual(interval.current, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from net_tools.SearchForms import SearchTemplateCache, discover_search_template, fill_template
+
+PAGES = {
+    "/": b"""<html><body>
+        <form action="/login" method="post"><input name="user"><input type="password" name="pass"></form>
+        <form action="/find" role="search">
+            <input type="hidden" name="lang" value="en">
+            <input type="text" name="title">
+            <input type="search" name="q">
+        </form>
+    </body></html>""",
+    "/plain": b"<html><body><p>No forms here.</p></body></html>",
+}
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """ Serves PAGES, counting requests on the server. """
+    def do_GET(self):
+        self.server.requests += 1
+        body = PAGES.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SearchFormsTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+        self.server.requests = 0
+        self.thread = threading.Thread(target = self.server.serve_forever, daemon = True)
+        self.thread.start()
+        self.base = "http://127.0.0.1:" + str(self.server.server_address[1])
+
+        self.folder = tempfile.TemporaryDirectory()
+        self.cache_path = self.folder.name + "/search_forms.json"
+        self.now = 1000.0
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.folder.cleanup()
+
+    def new_cache(self):
+        return SearchTemplateCache(self.cache_path, ttl = 60, clock = lambda: self.now)
+
+    def test_discovered_template(self):
+        template, bytes_read = discover_search_template(self.base + "/")
+
+        self.assertEqual(template, self.base + "/find?lang=en&q={query}")
+        self.assertGreater(bytes_read, 0)
+        self.assertEqual(fill_template(template, "rice & beans"), self.base + "/find?lang=en&q=rice+%26+beans")
+
+    def test_page_without_search_form(self):
+        template, _ = discover_search_template(self.base + "/plain")
+        self.assertIsNone(template)
+
+    def test_cache_hit(self):
+        cache = self.new_cache()
+        first = cache.find(self.base + "/")
+        second = cache.find(self.base + "/")
+
+        self.assertEqual(first, second)
+        self.assertEqual((cache.fetches, cache.hits), (1, 1))
+        self.assertEqual(self.server.requests, 1)
+
+        # Later sessions read the template from the file without fetching the page
+        reloaded = self.new_cache()
+        self.assertEqual(reloaded.find(self.base + "/"), first)
+        self.assertEqual(self.server.requests, 1)
+        with open(self.cache_path) as cache_file:
+            self.assertEqual(json.load(cache_file)["127.0.0.1:" + str(self.server.server_address[1])]["template"], first)
+
+    def test_expired_entry_is_discovered_again(self):
+        cache = self.new_cache()
+        cache.find(self.base + "/")
+        self.now += 59
+        cache.find(self.base + "/")
+        self.assertEqual(self.server.requests, 1)
+
+        self.now += 1
+        self.assertIsNone(cache.get(self.base + "/"))
+        self.assertEqual(cache.find(self.base + "/"), self.base + "/find?lang=en&q={query}")
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(cache.fetches, 2)
+
+    def test_missing_form_is_cached(self):
+        cache = self.new_cache()
+        self.assertIsNone(cache.find(self.base + "/plain"))
+        self.assertIsNone(cache.find(self.base + "/plain"))
+        self.assertEqual(self.server.requests, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
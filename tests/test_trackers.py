@@ -0,0 +1,209 @@
+import copy
+import random
+import tempfile
+import unittest
+
+from tracking_tools.Comparators import ColumnEquality
+from tracking_tools.TrackingManager import TrackingManager
+from tracking_tools.Views import AggregateView
+
+
+def make_rows(count, distinct, seed = 0):
+    rng = random.Random(seed)
+    return [[float(index), float(index + 1), rng.randrange(1, 4), ["site " + str(rng.randrange(distinct))]] for index in range(count)]
+
+
+class RemoveNearDuplicatesTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.tracking = TrackingManager(self.folder.name + "/")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def tracker_with(self, rows):
+        tracker = self.tracking.init_tracker("dedup")
+        for row in rows:
+            tracker.add_item(tracker.new_item(row))
+        return tracker
+
+    def assert_paths_agree(self, rows, min_parallel_items = 0, **kwargs):
+        serial = self.tracker_with(rows)
+        serial.register_view(AggregateView("frequency", value = "frequency"))
+        serial.remove_near_duplicates(**kwargs)
+
+        parallel = self.tracker_with(rows)
+        parallel.register_view(AggregateView("frequency", value = "frequency"))
+        parallel.remove_near_duplicates(workers = 2, min_parallel_items = min_parallel_items, **kwargs)
+
+        self.assertEqual([item.data for item in parallel.items], [item.data for item in serial.items])
+        self.assertEqual(parallel.get_view("frequency").groups, serial.get_view("frequency").groups)
+        return serial
+
+    def test_column_equality_with_default_merge(self):
+        # The default merge concatenates targets, so merged items stop matching their block
+        serial = self.assert_paths_agree(make_rows(3000, 20), min_parallel_items = 2000, compare_method = ColumnEquality(["targets"]))
+        self.assertGreater(len(serial.items), 20)
+
+    def test_column_equality_with_frequency_merge(self):
+        def increment_freq(item_1, item_2):
+            item_1.data["frequency"] += item_2.data["frequency"]
+            return item_1
+
+        serial = self.assert_paths_agree(make_rows(500, 20), compare_method = ColumnEquality(["targets"]), merge_method = increment_freq)
+        self.assertEqual(len(serial.items), 20)
+
+    def test_in_place_merge(self):
+        def extend_targets(item_1, item_2):
+            item_1.data["targets"].extend(item_2.data["targets"])
+            return item_1
+
+        self.assert_paths_agree(make_rows(300, 10), compare_method = ColumnEquality(["targets"]), merge_method = extend_targets)
+
+    def test_default_compare_method(self):
+        self.assert_paths_agree(make_rows(200, 5), threshold = 0.3)
+
+
+class SaveChangesTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.tracking = TrackingManager(self.folder.name + "/")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def saved_tracker(self, rows):
+        tracker = self.tracking.init_tracker("changes")
+        for row in rows:
+            tracker.add_item(tracker.new_item(row))
+        tracker.save_data()
+        return tracker
+
+    def rows_on_disk(self):
+        tracker = self.tracking.init_tracker("changes")
+        tracker.load_data()
+        return [item.data for item in tracker.items]
+
+    def change_from_outside(self, row):
+        other = self.tracking.init_tracker("changes")
+        other.append_data([other.new_item(row)])
+
+    def test_unchanged_file(self):
+        tracker = self.saved_tracker(make_rows(6, 6))
+        tracker.update_item(tracker.items[2], {"frequency": 9.0})
+        tracker.remove_item(tracker.items[4])
+        tracker.add_item(tracker.new_item([10.0, 11.0, 1, ["new"]]))
+        tracker.save_changes()
+
+        self.assertEqual(self.rows_on_disk(), [item.data for item in tracker.items])
+
+    def test_added_items_after_outside_change(self):
+        tracker = self.saved_tracker(make_rows(6, 6))
+        tracker.add_item(tracker.new_item([10.0, 11.0, 1, ["new"]]))
+        self.change_from_outside([20.0, 21.0, 1, ["outside"]])
+        tracker.save_changes()
+
+        rows = self.rows_on_disk()
+        self.assertEqual(len(rows), 8)
+        self.assertEqual([row["targets"] for row in rows[-2:]], [["outside"], ["new"]])
+        self.assertEqual(rows, [item.data for item in tracker.items])
+
+    def test_edits_after_outside_change(self):
+        tracker = self.saved_tracker(make_rows(6, 6))
+        tracker.update_item(tracker.items[1], {"frequency": 9.0})
+        tracker.add_item(tracker.new_item([10.0, 11.0, 1, ["new"]]))
+        tracker.remove_item(tracker.items[3])
+        self.change_from_outside([20.0, 21.0, 1, ["outside"]])
+        expected = [dict(item.data) for item in tracker.items]
+        tracker.save_changes()
+
+        # Edited rows cannot be matched to the changed file, so this tracker's items replace it
+        self.assertEqual(self.rows_on_disk(), expected)
+        self.assertFalse(tracker.changed_on_disk())
+
+
+class RowCodecTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.tracking = TrackingManager(self.folder.name + "/")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def reloaded(self):
+        tracker = self.tracking.init_tracker("codec")
+        tracker.load_data()
+        return [item.data for item in tracker.items]
+
+    def test_lists_round_trip_exactly(self):
+        awkward = [
+            ["a|b", "c"],
+            ["semi;colon", "comma,comma", "3,1;abc"],
+            [""],
+            ["", "", ""],
+            [],
+            ["quote \"inside\"", "new\nline", "ünïcode"],
+        ]
+        tracker = self.tracking.init_tracker("codec")
+        for index, targets in enumerate(awkward):
+            tracker.add_item(tracker.new_item([float(index), 0.5, 1, targets]))
+        tracker.save_data()
+        self.assertEqual([data["targets"] for data in self.reloaded()], awkward)
+
+        # Rows written incrementally use the same encoding
+        tracker.add_item(tracker.new_item([9.0, 9.5, 1, ["x|y", ";", ","]]))
+        tracker.save_changes()
+        self.assertEqual([data["targets"] for data in self.reloaded()], awkward + [["x|y", ";", ","]])
+
+    def test_legacy_rows_still_decode(self):
+        # The original format: no header, an all-zero first row, and lists joined with "|"
+        with open(self.folder.name + "/codec_tracking.csv", "w") as data_file:
+            data_file.write('0.0,0.0,0.0,"0"\n1.5,2.5,3.0,"a|b|c"\n4.0,5.0,1.0,"single"\n')
+
+        expected = [
+            {"start_time": 0.0, "end_time": 0.0, "frequency": 0.0, "targets": ["0"]},
+            {"start_time": 1.5, "end_time": 2.5, "frequency": 3.0, "targets": ["a", "b", "c"]},
+            {"start_time": 4.0, "end_time": 5.0, "frequency": 1.0, "targets": ["single"]},
+        ]
+        self.assertEqual(self.reloaded(), expected)
+
+        # The first save of a change upgrades the file to the current format
+        tracker = self.tracking.init_tracker("codec")
+        tracker.load_data()
+        tracker.add_item(tracker.new_item([6.0, 7.0, 1, ["x|y"]]))
+        tracker.save_changes()
+        expected.append({"start_time": 6.0, "end_time": 7.0, "frequency": 1.0, "targets": ["x|y"]})
+        with open(self.folder.name + "/codec_tracking.csv") as data_file:
+            self.assertTrue(data_file.readline().startswith('"#aria-tracker"'))
+        self.assertEqual(self.reloaded(), expected)
+
+    def test_saving_never_mutates_items(self):
+        tracker = self.tracking.init_tracker("codec")
+        for row in make_rows(50, 5):
+            tracker.add_item(tracker.new_item(row))
+        lists = [item.data["targets"] for item in tracker.items]
+        before = copy.deepcopy([item.data for item in tracker.items])
+
+        tracker.save_data()
+        tracker.update_item(tracker.items[10], {"frequency": 7.0})
+        tracker.add_item(tracker.new_item([1.0, 2.0, 1, ["late|item"]]))
+        tracker.save_changes()
+
+        before[10]["frequency"] = 7.0
+        before.append({"start_time": 1.0, "end_time": 2.0, "frequency": 1.0, "targets": ["late|item"]})
+        self.assertEqual([item.data for item in tracker.items], before)
+        self.assertTrue(all(item.data["targets"] is targets for item, targets in zip(tracker.items, lists)))
+
+    def test_loaded_lists_are_not_shared(self):
+        tracker = self.tracking.init_tracker("codec")
+        for _ in range(3):
+            tracker.add_item(tracker.new_item([0.0, 1.0, 1, ["same"]]))
+        tracker.save_data()
+
+        tracker.load_data()
+        tracker.items[0].data["targets"].append("changed")
+        self.assertEqual([item.data["targets"] for item in tracker.items[1:]], [["same"], ["same"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
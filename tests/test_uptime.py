@@ -0,0 +1,129 @@
+import contextlib
+import io
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cmds.uptime import Command
+from net_tools.Uptime import UptimeChecker, UPTIME_STRUCTURE, record_results, register_uptime_views
+from tracking_tools.TrackingManager import TrackingManager
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """ Answers /<status> with that status, and anything else with 200. """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status = int(self.path[1:]) if self.path[1:].isdigit() else 200
+        body = b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubConfig:
+    def get(self, key, default = None):
+        return default
+
+
+class CountingTrackingManager(TrackingManager):
+    """ Counts the trackers it creates. """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.created = 0
+
+    def init_tracker(self, *args, **kwargs):
+        self.created += 1
+        return super().init_tracker(*args, **kwargs)
+
+
+class UptimeCheckerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StatusHandler)
+        self.thread = threading.Thread(target = self.server.serve_forever, daemon = True)
+        self.thread.start()
+        self.base = "http://127.0.0.1:" + str(self.server.server_address[1])
+        self.checker = UptimeChecker(timeout = 2)
+
+    def tearDown(self):
+        self.checker.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_up_and_down(self):
+        up = self.checker.check(self.base + "/")
+        down = self.checker.check(self.base + "/503")
+
+        self.assertTrue(up.up)
+        self.assertEqual(up.status, 200)
+        self.assertIsNone(up.error)
+        self.assertFalse(down.up)
+        self.assertEqual(down.status, 503)
+
+    def test_connections_are_reused(self):
+        self.checker.check(self.base + "/")
+        self.checker.check(self.base + "/")
+
+        self.assertEqual(self.checker.pool.created, 1)
+        self.assertEqual(self.checker.pool.reused, 1)
+
+    def test_invalid_urls_are_down(self):
+        for url in ["http://", "http://h:99999", "http://h:port", "ftp://example.com", "http://[::1"]:
+            result = self.checker.check(url)
+            self.assertFalse(result.up, url)
+            self.assertEqual(result.status, 0, url)
+            self.assertIsNotNone(result.error, url)
+
+    def test_invalid_urls_do_not_end_the_batch(self):
+        urls = ["http://", self.base + "/", "http://h:99999", self.base + "/404"]
+        results = self.checker.check_all(urls)
+
+        self.assertEqual([result.url for result in results], urls)
+        self.assertEqual([result.up for result in results], [False, True, False, False])
+        self.assertEqual(results[3].status, 404)
+
+    def test_recorded_results(self):
+        with tempfile.TemporaryDirectory() as folder:
+            tracker = TrackingManager(folder + "/").init_tracker("uptime_checks", UPTIME_STRUCTURE)
+            register_uptime_views(tracker)
+            tracker.load_data()
+
+            url = self.base + "/"
+            record_results(tracker, self.checker.check_all([url, url, self.base + "/500"]))
+
+            self.assertEqual(tracker.get_view("availability").count(url), 2)
+            self.assertEqual(tracker.get_view("availability").mean(url), 1)
+            self.assertEqual(tracker.get_view("availability").mean(self.base + "/500"), 0)
+            self.assertIsNone(tracker.get_view("latency").mean(self.base + "/500"))
+
+    def test_command_keeps_its_tracker(self):
+        with tempfile.TemporaryDirectory() as folder:
+            managers = {"config": StubConfig(), "tracking": CountingTrackingManager(folder + "/")}
+            command = Command()
+            command.checker = self.checker
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                for _ in range(3):
+                    command.execute("uptime " + self.base + "/", managers)
+
+            self.assertEqual(managers["tracking"].created, 1)
+            self.assertEqual(command.tracker.get_view("availability").count(self.base + "/"), 3)
+            self.assertIn("up 100.0% of 3 checks", output.getvalue())
+
+            # Rows written by another session are picked up before the next check
+            other = TrackingManager(folder + "/").init_tracker("uptime_checks", UPTIME_STRUCTURE)
+            other.load_data()
+            record_results(other, self.checker.check_all([self.base + "/500"]))
+            with contextlib.redirect_stdout(output):
+                command.execute("uptime " + self.base + "/500", managers)
+            self.assertEqual(command.tracker.get_view("availability").count(self.base + "/500"), 2)
+            self.assertEqual(len(command.tracker.items), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,317 @@
+import random
+import tempfile
+import unittest
+
+from context_tools.AppSets import AppSetInterner, jaccard
+from context_tools.Neighbors import NeighborIndex
+from tracking_tools.TrackingManager import TrackingManager
+from tracking_tools.Views import AggregateView, IntervalView, TopKView
+
+DAY = 24 * 60 * 60
+
+
+def sum_frequencies(item_1, item_2):
+    item_1.data["frequency"] += item_2.data["frequency"]
+    return item_1
+
+
+class RandomEdits:
+    """ Applies random adds, removes, updates and merges to a tracker through its public methods. """
+    def __init__(self, tracker, new_row, new_values, merge_method, seed = 0):
+        self.tracker = tracker
+        self.new_row = new_row
+        self.new_values = new_values
+        self.merge_method = merge_method
+        self.rng = random.Random(seed)
+
+    def step(self):
+        items = self.tracker.items
+        choice = self.rng.random()
+        if len(items) < 2 or choice < 0.35:
+            self.tracker.add_item(self.tracker.new_item(self.new_row(self.rng)))
+        elif choice < 0.55:
+            self.tracker.remove_item(self.rng.choice(items))
+        elif choice < 0.85:
+            self.tracker.update_item(self.rng.choice(items), self.new_values(self.rng))
+        else:
+            # As in Tracker._merge_into: the merged-away item leaves the list without touching the views again
+            item_1, item_2 = self.rng.sample(items, 2)
+            merged_item = self.tracker.merge_items(item_1, item_2, self.merge_method)
+            items.remove(item_2)
+            items[items.index(item_1)] = merged_item
+
+
+class AggregateViewTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.tracker = TrackingManager(self.folder.name + "/").init_tracker("views")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def new_row(self, rng):
+        sites = ["site " + str(rng.randrange(8)) for _ in range(rng.randrange(0, 3))]
+        return [float(rng.randrange(100)), 0.0, rng.randrange(1, 5), sites]
+
+    def new_values(self, rng):
+        values = {"frequency": float(rng.randrange(1, 5))}
+        if rng.random() < 0.5:
+            values["targets"] = self.new_row(rng)[3]
+        if rng.random() < 0.5:
+            values["start_time"] = float(rng.randrange(100))
+        return values
+
+    def brute_force(self, keys_for, value):
+        groups = {}
+        for item in self.tracker.items:
+            for key in keys_for(item):
+                stats = groups.setdefault(key, [0, 0])
+                stats[0] += item.data["frequency"]
+                stats[1] += item.data["frequency"] * item.data[value]
+        return groups
+
+    def assert_matches(self, view, expected):
+        self.assertEqual(set(view.groups), set(expected))
+        for key, (count, total) in expected.items():
+            self.assertEqual(view.count(key), count, key)
+            self.assertAlmostEqual(view.sum(key), total, msg = key)
+            self.assertAlmostEqual(view.mean(key), total / count, msg = key)
+
+    def assert_top_matches(self, view, expected, k):
+        top = view.top(k)
+        counts = sorted((stats[0] for stats in expected.values()), reverse = True)
+        self.assertEqual([count for _, count in top], counts[:k])
+        for key, count in top:
+            self.assertEqual(expected[key][0], count, key)
+
+    def check_random_edits(self, seed, merge_method, initial_rows):
+        rng = random.Random(seed)
+        for _ in range(initial_rows):
+            self.tracker.add_item(self.tracker.new_item(self.new_row(rng)))
+
+        # Views registered over existing items are filled in bulk, then kept up to date
+        by_site = self.tracker.register_view(AggregateView("by_site", value = "start_time", group_by = "targets", weight = "frequency"))
+        overall = self.tracker.register_view(AggregateView("overall", value = "start_time", weight = "frequency"))
+        top_sites = self.tracker.register_view(TopKView("top_sites", group_by = "targets", weight = "frequency", value = "start_time"))
+
+        edits = RandomEdits(self.tracker, self.new_row, self.new_values, merge_method, seed = seed)
+        for _ in range(400):
+            edits.step()
+            expected = self.brute_force(lambda item: item.data["targets"], "start_time")
+            self.assert_matches(by_site, expected)
+            self.assert_matches(top_sites, expected)
+            self.assert_matches(overall, self.brute_force(lambda item: (None,), "start_time"))
+            # Alternate k so that both cached and recomputed rankings are checked
+            self.assert_top_matches(top_sites, expected, edits.rng.choice([1, 3, 3, 10]))
+
+    def test_random_edits_from_empty(self):
+        self.check_random_edits(1, sum_frequencies, 0)
+
+    def test_random_edits_from_loaded_items(self):
+        self.check_random_edits(2, sum_frequencies, 40)
+
+    def test_random_edits_with_default_merge(self):
+        # The default merge averages numbers and concatenates targets, repeating keys
+        self.check_random_edits(3, None, 20)
+
+
+class IntervalViewTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.tracker = TrackingManager(self.folder.name + "/").init_tracker("views")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def interval(self, rng, period):
+        # Whole minutes, so that many intervals share an endpoint with each other and with queries
+        start = rng.randrange(period // 60) * 60.0
+        if rng.random() < 0.3:
+            # Ends before it starts, wrapping around the period
+            end = rng.randrange(int(start) // 60 + 1) * 60.0
+        else:
+            end = min(start + rng.randrange(0, 180) * 60.0, period - 60.0)
+        return start, end
+
+    def brute_force(self, period, query_start, query_end):
+        def segments(start, end):
+            if period is not None and end < start:
+                return [(start, period), (0, end)]
+            return [(start, end)]
+
+        found = set()
+        for item in self.tracker.items:
+            for start, end in segments(item.data["start_time"], item.data["end_time"]):
+                if any(start <= q_end and end >= q_start for q_start, q_end in segments(query_start, query_end)):
+                    found.add(id(item))
+        return found
+
+    def check_random_edits(self, seed, period, initial_rows):
+        rng = random.Random(seed)
+        query_period = period or DAY
+
+        def new_row(rng):
+            start, end = self.interval(rng, query_period)
+            if period is None and end < start:
+                start, end = end, start
+            return [start, end, 1, []]
+
+        def new_values(rng):
+            return dict(zip(["start_time", "end_time"], new_row(rng)))
+
+        for _ in range(initial_rows):
+            self.tracker.add_item(self.tracker.new_item(new_row(rng)))
+        view = self.tracker.register_view(IntervalView("history", period = period))
+
+        edits = RandomEdits(self.tracker, new_row, new_values, sum_frequencies, seed = seed)
+        for _ in range(300):
+            edits.step()
+            self.assertEqual(len(view), len(self.tracker.items))
+            for _ in range(3):
+                query_start, query_end = self.interval(rng, query_period)
+                if period is None and query_end < query_start:
+                    query_start, query_end = query_end, query_start
+                found = view.overlapping(query_start, query_end)
+                self.assertEqual(len(found), len(set(map(id, found))))
+                self.assertEqual(set(map(id, found)), self.brute_force(period, query_start, query_end), (query_start, query_end))
+                self.assertEqual(set(map(id, view.at(query_start))), self.brute_force(period, query_start, query_start))
+
+    def test_random_edits(self):
+        self.check_random_edits(1, None, 0)
+
+    def test_random_edits_from_loaded_items(self):
+        self.check_random_edits(2, None, 60)
+
+    def test_random_edits_with_wrap_around(self):
+        self.check_random_edits(3, DAY, 60)
+
+    def test_wrap_around_queries(self):
+        view = self.tracker.register_view(IntervalView("history", period = DAY))
+        late = self.tracker.new_item([23 * 3600.0, 3600.0, 1, []])
+        morning = self.tracker.new_item([8 * 3600.0, 9 * 3600.0, 1, []])
+        for item in (late, morning):
+            self.tracker.add_item(item)
+
+        self.assertEqual(view.at(0.0), [late])
+        self.assertEqual(view.at(23.5 * 3600), [late])
+        self.assertEqual(view.at(12 * 3600.0), [])
+        self.assertEqual(view.overlapping(22 * 3600.0, 8 * 3600.0), [late, morning])
+
+
+class NeighborIndexTest(unittest.TestCase):
+    APPS = ["/Applications/App " + str(index) + ".app" for index in range(12)]
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        structure = {"start_time": float, "end_time": float, "frequency": int, "targets": frozenset}
+        self.tracker = TrackingManager(self.folder.name + "/").init_tracker("context", structure)
+        self.app_sets = AppSetInterner()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def new_row(self, rng):
+        # A few common sets with small variations, so that near neighbours exist
+        base = [self.APPS[:4], self.APPS[3:8], self.APPS[6:12]][rng.randrange(3)]
+        apps = set(base)
+        for _ in range(rng.randrange(3)):
+            apps.symmetric_difference_update([rng.choice(self.APPS)])
+        return [0.0, 1.0, rng.randrange(1, 4), apps]
+
+    def new_values(self, rng):
+        values = {"frequency": rng.randrange(1, 4)}
+        if rng.random() < 0.5:
+            values["targets"] = frozenset(self.new_row(rng)[3])
+        return values
+
+    def merge_targets(self, item_1, item_2):
+        item_1.data["targets"] = item_1.data["targets"] | item_2.data["targets"]
+        item_1.data["frequency"] += item_2.data["frequency"]
+        return item_1
+
+    def assert_matches_rebuild(self, index):
+        rows = {}
+        weights = {}
+        for item in self.tracker.items:
+            app_set = frozenset(item.data["targets"])
+            rows[app_set] = rows.get(app_set, 0) + 1
+            weights[app_set] = weights.get(app_set, 0) + item.data["frequency"]
+        self.assertEqual(index.rows, rows)
+        self.assertEqual(index.weights, weights)
+
+        postings = {}
+        for app_set in rows:
+            for app in app_set:
+                postings.setdefault(app, set()).add(app_set)
+        self.assertEqual(index.postings, postings)
+
+        # Every bucket holds exactly the indexed sets that hash to it
+        buckets = [{} for _ in range(index.bands)]
+        for app_set in rows:
+            for band, key in enumerate(index.band_keys(app_set)):
+                buckets[band].setdefault(key, set()).add(app_set)
+        self.assertEqual(index._buckets, buckets)
+
+    def assert_nearest_is_sound(self, index, query):
+        neighbours = index.nearest(query, k = len(index))
+        for app_set, similarity in neighbours:
+            self.assertIn(app_set, index.rows)
+            self.assertEqual(similarity, jaccard(query, app_set))
+        keys = [(-similarity, -index.weights[app_set]) for app_set, similarity in neighbours]
+        self.assertEqual(keys, sorted(keys))
+
+        if query in index.rows:
+            # Identical sets share every bucket, so an indexed set always finds itself first
+            self.assertEqual(neighbours[0], (query, 1))
+        found = set(app_set for app_set, _ in neighbours)
+        for app_set in index.rows:
+            if jaccard(query, app_set) == 1:
+                self.assertIn(app_set, found)
+
+    def check_random_edits(self, seed, initial_rows):
+        rng = random.Random(seed)
+        for _ in range(initial_rows):
+            self.tracker.add_item(self.tracker.new_item(self.new_row(rng)))
+        index = self.tracker.register_view(NeighborIndex("neighbors", self.app_sets))
+
+        edits = RandomEdits(self.tracker, self.new_row, self.new_values, self.merge_targets, seed = seed)
+        for _ in range(300):
+            edits.step()
+            self.assertEqual(len(index), len(set(frozenset(item.data["targets"]) for item in self.tracker.items)))
+            self.assert_matches_rebuild(index)
+            query = frozenset(self.new_row(rng)[3])
+            self.assert_nearest_is_sound(index, query)
+            if len(index) > 0:
+                self.assert_nearest_is_sound(index, rng.choice(list(index.rows)))
+
+    def test_random_edits(self):
+        self.check_random_edits(1, 0)
+
+    def test_random_edits_from_loaded_items(self):
+        self.check_random_edits(2, 50)
+
+    def test_nearest_matches_brute_force_on_close_sets(self):
+        rng = random.Random(4)
+        for _ in range(80):
+            self.tracker.add_item(self.tracker.new_item(self.new_row(rng)))
+        index = self.tracker.register_view(NeighborIndex("neighbors", self.app_sets))
+
+        # With 16 bands of 2 rows, sets with similarity 0.75 or more collide with near certainty
+        for query in list(index.rows):
+            found = set(app_set for app_set, _ in index.nearest(query, k = len(index)))
+            close = set(app_set for app_set in index.rows if jaccard(query, app_set) >= 0.75)
+            self.assertLessEqual(close, found, sorted(query))
+
+    def test_containing(self):
+        index = self.tracker.register_view(NeighborIndex("neighbors", self.app_sets))
+        rng = random.Random(5)
+        for _ in range(40):
+            self.tracker.add_item(self.tracker.new_item(self.new_row(rng)))
+
+        for names in (["App 1."], ["App 1", "App 7"], ["App 3.", "App 11."], []):
+            expected = set(app_set for app_set in index.rows if all(any(name in app for app in app_set) for name in names))
+            self.assertEqual(index.containing(names), expected, names)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+from itertools import accumulate
+
+HEADER_TAG = "#aria-tracker"
+CODEC_VERSION = 2
+
+LIST_TYPES = (list, tuple, set, frozenset)
+
+def encode_list(values):
+    """ Encode a list of strings as its element lengths followed by their concatenation, e.g. ["a|b", ""] -> "3,0;a|b". """
+    if len(values) == 0:
+        return ""
+    try:
+        body = "".join(values)
+    except TypeError:
+        values = [str(value) for value in values]
+        body = "".join(values)
+    return ",".join(map(str, map(len, values))) + ";" + body
+
+def encode_set(values):
+    """ Encode a set like a list, in sorted order so that saves are deterministic. """
+    return encode_list(sorted(map(str, values)))
+
+def decode_list(text):
+    """ Decode a length-prefixed list produced by encode_list. """
+    if text == "":
+        return []
+    lengths, _, body = text.partition(";")
+    offsets = list(accumulate(map(int, lengths.split(",")), initial = 0))
+    return [body[start:end] for start, end in zip(offsets, offsets[1:])]
+
+def decode_legacy_list(text):
+    """ Decode a list column written by the original "|"-joined format. """
+    if "|" in text:
+        return text.split("|")
+    return [text]
+
+def decode_bool(text):
+    return text in ("True", "1", "1.0")
+
+def decode_int(text):
+    try:
+        return int(text)
+    except ValueError:
+        # Numeric merges can leave a float in an int column
+        return int(float(text))
+
+
+class RowCodec:
+    """ Converts TrackerItem data to and from csv rows for a given item structure. """
+    def __init__(self, cols, coltypes, memo_size = 4096):
+        self.cols = list(cols)
+        self.coltypes = list(coltypes)
+        self.memo_size = memo_size
+
+        self.encoders = []
+        self.decoders = {}
+        self.legacy_decoders = {}
+        for key, coltype in zip(self.cols, self.coltypes):
+            if coltype in LIST_TYPES:
+                if coltype in (set, frozenset):
+                    self.encoders.append((key, self._memoized_encoder(encode_set, frozenset)))
+                else:
+                    self.encoders.append((key, self._memoized_encoder(encode_list, tuple)))
+                self.decoders[key] = self._memoized_decoder(coltype, decode_list)
+                self.legacy_decoders[key] = self._memoized_decoder(coltype, decode_legacy_list)
+            else:
+                self.encoders.append((key, None))
+                if coltype == bool:
+                    decoder = decode_bool
+                elif coltype == int:
+                    decoder = decode_int
+                else:
+                    decoder = coltype
+                self.decoders[key] = decoder
+                self.legacy_decoders[key] = decoder
+
+    def _memoized_encoder(self, encoder, make_key):
+        # Tracker data is highly repetitive (the same app sets and targets recur), so most
+        # lists are encoded once and then looked up by value
+        memo = {}
+
+        def memoized_encoder(values):
+            memo_key = make_key(values)
+            text = memo.get(memo_key)
+            if text is None:
+                if len(memo) >= self.memo_size:
+                    memo.clear()
+                text = encoder(values)
+                memo[memo_key] = text
+            return text
+        return memoized_encoder
+
+    def _memoized_decoder(self, coltype, decoder):
+        memo = {}
+
+        def memoized_decoder(text):
+            values = memo.get(text)
+            if values is None:
+                if len(memo) >= self.memo_size:
+                    memo.clear()
+                values = coltype(decoder(text))
+                memo[text] = values
+            if coltype == list:
+                # Items own their lists, so never hand out a shared one
+                return values[:]
+            return values
+        return memoized_decoder
+
+    def header(self):
+        """ Get the header row identifying the codec version and item structure of a data file. """
+        return [HEADER_TAG, CODEC_VERSION] + [key + ":" + coltype.__name__ for key, coltype in zip(self.cols, self.coltypes)]
+
+    def is_header(self, row):
+        return len(row) > 0 and row[0] == HEADER_TAG
+
+    def encode(self, data):
+        """ Get the csv row for an item's data dictionary. The data is not modified. """
+        return [data[key] if encoder is None else encoder(data[key]) for key, encoder in self.encoders]
+
+    def row_decoder(self, header = None):
+        """
+        Get a function converting csv rows to data dictionaries.
+
+        Rows are decoded according to the column order recorded in the header, so files written
+        with a different column order (or missing columns) still load. Without a header, rows
+        are assumed to use the original "|"-joined format in the current column order.
+        """
+        if header is None:
+            decoders = [(key, self.legacy_decoders[key]) for key in self.cols]
+        else:
+            if int(header[1]) > CODEC_VERSION:
+                raise ValueError("Tracker file uses codec version " + str(header[1]) + ", expected " + str(CODEC_VERSION) + " or lower.")
+            file_cols = [column.rsplit(":", 1)[0] for column in header[2:]]
+            decoders = [(key, self.decoders.get(key)) for key in file_cols]
+
+        missing = [key for key in self.cols if key not in [key for key, _ in decoders]]
+        width = len(decoders)
+
+        def decode(row):
+            if len(row) < width:
+                return None
+            data = {key: decoder(value) for (key, decoder), value in zip(decoders, row) if decoder is not None}
+            for key in missing:
+                data[key] = self.empty_value(key)
+            return data
+        return decode
+
+    def empty_value(self, key):
+        coltype = self.coltypes[self.cols.index(key)]
+        if coltype in LIST_TYPES:
+            return coltype()
+        return self.decoders[key]("0")
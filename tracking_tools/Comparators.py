@@ -0,0 +1,210 @@
+import math
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+
+def default_compare(values_1, values_2, coltypes):
+    """ Compare two rows of values column by column; 0 = min. diff, 1 = max. diff. """
+    diff = 0
+    for coltype, value_1, value_2 in zip(coltypes, values_1, values_2):
+        if coltype == bool:
+            diff += 2 * abs(value_1 - value_2) # Max 2
+        
+        elif coltype == int or coltype == float:
+            num_diff = abs(value_2 - value_1)
+            diff += 16 * num_diff / math.sqrt((num_diff + 2) * (num_diff + 2) + 1) # Max 16
+            
+        elif coltype == str:
+            # Length diff
+            len_diff = abs(len(value_1) - len(value_2))
+
+            # Number of letters diff
+            num_eq = 0
+            num_diff = 0
+            num_consec = 0
+            max_consec = 0
+            for letter1 in value_1:
+                found = False
+                for letter2 in value_2:
+                    if letter1 == letter2 and not found:
+                        found = True
+
+                if found:
+                    num_eq += 1
+                    num_consec += 1
+                    if num_consec > max_consec:
+                        max_consec = num_consec
+                else:
+                    num_diff += 1
+                    num_consec = 0
+
+            sim_diff = max(0, num_eq + max_consec * 2 - num_diff - len_diff * 2)
+            diff += 16 * sim_diff / math.sqrt((sim_diff + 2) * (sim_diff + 2) + 1) # Max 16
+
+
+        elif coltype == list:
+            # No restrictions on list types, so just compare length and equality
+            len_diff = abs(len(value_1) - len(value_2))
+
+            num_eq = 0
+            num_diff = 0
+            for item1 in value_1:
+                found = False
+                for item2 in value_2:
+                    if item1 == item2 and not found:
+                        found = True
+
+                if found:
+                    num_eq += 1
+                else:
+                    num_diff += 1
+
+            sim_diff = max(0, num_eq - num_diff - len_diff * 2)
+            diff += 16 * sim_diff / math.sqrt((sim_diff + 2) * (sim_diff + 2) + 1) # Max 16
+    return diff / 50 # 0-1, 0 = min. diff, 1 = max. diff
+
+
+class RowComparator(ABC):
+    """
+    A picklable compare method that works on rows of column values as well as TrackerItems.
+
+    Subclasses list the columns they read in self.columns and implement compare_rows. They can
+    also implement block_key, in which case only rows with equal block keys are compared, and
+    set exact_blocks when rows with equal block keys always match.
+    """
+    exact_blocks = False
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+
+    def row(self, item):
+        return tuple(item.data[key] for key in self.columns)
+
+    @abstractmethod
+    def compare_rows(self, row_1, row_2):
+        """ Score two rows; higher scores are more similar. """
+
+    def block_key(self, row):
+        return None
+
+    def __call__(self, item_1, item_2):
+        return self.compare_rows(self.row(item_1), self.row(item_2))
+
+
+class ColumnEquality(RowComparator):
+    """ Scores 1 when all of the given columns are equal, otherwise 0. """
+    exact_blocks = True
+
+    def compare_rows(self, row_1, row_2):
+        if row_1 == row_2:
+            return 1
+        return 0
+
+    def block_key(self, row):
+        return tuple(tuple(value) if isinstance(value, (list, set)) else value for value in row)
+
+
+class DefaultComparator(RowComparator):
+    """ The Tracker default compare method, for a given item structure. """
+    def __init__(self, item_structure):
+        super().__init__(item_structure.keys())
+        self.coltypes = list(item_structure.values())
+
+    def compare_rows(self, row_1, row_2):
+        return default_compare(row_1, row_2, self.coltypes)
+
+
+# State shared with each worker process by find_similar_pairs
+_worker_state = {}
+
+def _init_worker(rows, blocks, comparator, threshold):
+    _worker_state["rows"] = rows
+    _worker_state["blocks"] = blocks
+    _worker_state["comparator"] = comparator
+    _worker_state["threshold"] = threshold
+
+def _similar_pairs_in_chunk(block_index, start, end):
+    rows = _worker_state["rows"]
+    block = _worker_state["blocks"][block_index]
+    compare_rows = _worker_state["comparator"].compare_rows
+    threshold = _worker_state["threshold"]
+
+    pairs = []
+    for position_1 in range(start, end):
+        index_1 = block[position_1]
+        row_1 = rows[index_1]
+        for index_2 in block[position_1 + 1:]:
+            if compare_rows(row_1, rows[index_2]) > threshold:
+                pairs.append((index_1, index_2))
+    return pairs
+
+def _chunks(blocks, num_chunks):
+    """ Split each block's rows into ranges holding roughly equal numbers of pairs. """
+    total_pairs = sum(len(block) * (len(block) - 1) // 2 for block in blocks)
+    pairs_per_chunk = max(1, total_pairs // num_chunks)
+
+    chunks = []
+    for block_index, block in enumerate(blocks):
+        start = 0
+        pairs = 0
+        for position in range(len(block)):
+            pairs += len(block) - position - 1
+            if pairs >= pairs_per_chunk:
+                chunks.append((block_index, start, position + 1))
+                start = position + 1
+                pairs = 0
+        if start < len(block) - 1:
+            chunks.append((block_index, start, len(block)))
+    return chunks
+
+def find_blocks(rows, comparator):
+    """
+    Group row indexes by the comparator's block key.
+
+    Returns:
+        [[int]] - Ascending lists of the indexes of rows sharing a block key, for keys shared by more than one row.
+    """
+    blocks = {}
+    for index, row in enumerate(rows):
+        key = comparator.block_key(row)
+        if key in blocks:
+            blocks[key].append(index)
+        else:
+            blocks[key] = [index]
+    return [block for block in blocks.values() if len(block) > 1]
+
+def find_similar_pairs(columns, comparator, threshold = 0.5, workers = None):
+    """
+    Find every pair of rows whose comparator score exceeds the threshold, using a process pool.
+
+    Parameters:
+        columns : [list] - One list of values per comparator column, all the same length.
+        comparator : RowComparator - The picklable compare method to apply.
+        threshold : float - Pairs scoring above this are similar.
+        workers : int - Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        [(int, int)] - Sorted (index_1, index_2) pairs with index_1 < index_2.
+    """
+    if workers is None or workers <= 0:
+        workers = os.cpu_count() or 1
+
+    rows = list(zip(*columns))
+    blocks = find_blocks(rows, comparator)
+
+    if comparator.exact_blocks:
+        # Every pair of rows in a block matches, so there is nothing to farm out
+        return sorted((block[position_1], index_2) for block in blocks for position_1 in range(len(block)) for index_2 in block[position_1 + 1:])
+
+    chunks = _chunks(blocks, workers * 4)
+    if len(chunks) == 0:
+        return []
+
+    with ProcessPoolExecutor(max_workers = workers, initializer = _init_worker, initargs = (rows, blocks, comparator, threshold)) as executor:
+        futures = [executor.submit(_similar_pairs_in_chunk, *chunk) for chunk in chunks]
+        pairs = []
+        for future in futures:
+            pairs.extend(future.result())
+
+    pairs.sort()
+    return pairs
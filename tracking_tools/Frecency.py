@@ -0,0 +1,135 @@
+import heapq
+import math
+import re
+import time
+from bisect import bisect_left, insort
+
+TOKEN_SEPARATORS = re.compile(r"[^a-z0-9]+")
+
+def tokenize(text):
+    """ Split a path, URL or query into lowercase alphanumeric tokens. """
+    return [token for token in TOKEN_SEPARATORS.split(text.lower()) if token != ""]
+
+def log2_add(log_a, log_b):
+    """ Get log2(2^a + 2^b) without overflowing. """
+    if log_a < log_b:
+        log_a, log_b = log_b, log_a
+    return log_a + math.log2(1 + 2 ** (log_b - log_a))
+
+
+class FrecencyIndex:
+    """
+    Ranks destinations by visit counts that decay exponentially with age.
+
+    Each destination's score is the sum of 2^((visit_time - now) / half_life) over its visits.
+    Scores are stored as log2 of that sum at time 0, which never needs to be decayed: the
+    ranking is the same at any "now", so a visit is one O(log n) heap push and the decayed
+    score is only computed when asked for.
+    """
+    def __init__(self, half_life = 7 * 24 * 3600):
+        self.half_life = half_life
+        self.scores = {}
+        self.visits = {}
+        self.last_visits = {}
+        self.postings = {}
+        self.vocabulary = []
+        self._heap = []
+
+    def __contains__(self, destination):
+        return destination in self.scores
+
+    def __len__(self):
+        return len(self.scores)
+
+    def visit(self, destination, when = None, weight = 1):
+        """ Record a visit to a destination, counted weight times. Raises ValueError if weight is not positive. """
+        if not weight > 0:
+            raise ValueError("visit weight must be positive, not " + str(weight))
+        if when is None:
+            when = time.time()
+
+        contribution = when / self.half_life + math.log2(weight)
+        if destination in self.scores:
+            self.set(destination, log2_add(self.scores[destination], contribution), self.visits[destination] + 1, when)
+        else:
+            self.set(destination, contribution, 1, when)
+
+    def set(self, destination, log_score, visits, last_visit):
+        """ Set a destination's stored score directly, e.g. when loading saved scores. """
+        if destination not in self.scores:
+            for token in set(tokenize(destination)):
+                if token not in self.postings:
+                    self.postings[token] = set()
+                    insort(self.vocabulary, token)
+                self.postings[token].add(destination)
+
+        self.scores[destination] = log_score
+        self.visits[destination] = visits
+        self.last_visits[destination] = last_visit
+        heapq.heappush(self._heap, (-log_score, destination))
+
+        # Drop stale heap entries once they outnumber live ones
+        if len(self._heap) > 2 * len(self.scores) + 64:
+            self._heap = [(-score, name) for name, score in self.scores.items()]
+            heapq.heapify(self._heap)
+
+    def remove(self, destination):
+        """ Forget a destination. """
+        if destination not in self.scores:
+            return
+
+        for token in set(tokenize(destination)):
+            self.postings[token].discard(destination)
+            if len(self.postings[token]) == 0:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+
+        del self.scores[destination]
+        del self.visits[destination]
+        del self.last_visits[destination]
+
+    def score(self, destination, when = None):
+        """ Get a destination's decayed score at the given time (default now). """
+        if when is None:
+            when = time.time()
+        return 2 ** (self.scores[destination] - when / self.half_life)
+
+    def matching(self, query):
+        """ Get the destinations with a token starting with each of the query's tokens. """
+        matches = None
+        for query_token in tokenize(query):
+            destinations = set()
+            index = bisect_left(self.vocabulary, query_token)
+            while index < len(self.vocabulary) and self.vocabulary[index].startswith(query_token):
+                destinations.update(self.postings[self.vocabulary[index]])
+                index += 1
+
+            if matches is None:
+                matches = destinations
+            else:
+                matches &= destinations
+
+            if len(matches) == 0:
+                break
+
+        if matches is None:
+            return set(self.scores.keys())
+        return matches
+
+    def top(self, query = ""):
+        """ Get the highest scoring destination matching a query, or None if nothing matches. """
+        if isinstance(query, list):
+            query = " ".join(query)
+
+        if len(tokenize(query)) == 0:
+            while len(self._heap) > 0:
+                negative_score, destination = self._heap[0]
+                if self.scores.get(destination) == -negative_score:
+                    return destination
+                heapq.heappop(self._heap)
+            return None
+
+        matches = self.matching(query)
+        if len(matches) == 0:
+            return None
+        return max(matches, key = lambda destination: (self.scores[destination], destination))
@@ -0,0 +1,94 @@
+import re
+
+WHITESPACE = re.compile(r"\s+")
+
+def normalize_query(query):
+    """ Lowercase a query and collapse its whitespace, so that trivially different searches share an entry. """
+    return WHITESPACE.sub(" ", query.strip().lower())
+
+
+class SearchHistory:
+    """
+    A resident index over a search tracker (start_time, end_time, frequency, targets = [query]).
+
+    Entries are keyed by normalized query. The more general queries contained in a new search
+    are found by looking up each of its word sequences as a key, so recording a search only
+    touches the entries it affects. Changes are written with Tracker.save_changes().
+    """
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.entries = {}
+        self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, query):
+        return normalize_query(query) in self.entries
+
+    def load(self):
+        """ (Re)load the tracker and rebuild the index, merging entries whose queries normalize the same. """
+        self.tracker.load_data()
+        self.entries = {}
+        for item in list(self.tracker.items):
+            query = normalize_query(item.data["targets"][0])
+            existing = self.entries.get(query)
+            if existing is None:
+                self._index(query, item)
+                continue
+
+            self.tracker.update_item(existing, {
+                "frequency": existing.data["frequency"] + item.data["frequency"],
+                "start_time": max(existing.data["start_time"], item.data["start_time"]),
+                "end_time": max(existing.data["end_time"], item.data["end_time"]),
+            })
+            self.tracker.remove_item(item)
+
+    def _index(self, query, item):
+        self.entries[query] = item
+
+    def get(self, query):
+        """ Get the tracker item for a query, or None if it has not been searched. """
+        return self.entries.get(normalize_query(query))
+
+    def more_general(self, query):
+        """ Get the shorter recorded queries whose words appear, in order and adjacent, within a query's words. """
+        words = normalize_query(query).split(" ")
+        general = []
+        for length in range(1, len(words)):
+            for start in range(len(words) - length + 1):
+                phrase = " ".join(words[start:start + length])
+                if phrase in self.entries and phrase not in general:
+                    general.append(phrase)
+        return general
+
+    def record(self, query, when):
+        """
+        Record a search: an exact repeat increments its entry, a new query gets an entry, and
+        every more general query it contains is incremented.
+
+        Returns:
+            TrackerItem - The entry for the query.
+        """
+        if self.tracker.changed_on_disk():
+            self.load()
+
+        normalized = normalize_query(query)
+        item = self.entries.get(normalized)
+        if item is None:
+            item = self.tracker.new_item([when, when, 1, [query]])
+            self.tracker.add_item(item)
+            self._index(normalized, item)
+        else:
+            self.tracker.update_item(item, {
+                "frequency": item.data["frequency"] + 1,
+                "start_time": when,
+                "end_time": when,
+            })
+
+        for general_query in self.more_general(normalized):
+            general_item = self.entries[general_query]
+            self.tracker.update_item(general_item, {"frequency": general_item.data["frequency"] + 1})
+
+        self.tracker.save_changes()
+        return item
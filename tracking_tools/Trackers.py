@@ -1,6 +1,9 @@
+import copy
 import csv
-import math
+import io
 import os
+from .Codecs import RowCodec
+from .Comparators import RowComparator, DefaultComparator, default_compare, find_blocks, find_similar_pairs
 
 class TrackerItem:
     def __init__(self):
@@ -64,6 +67,19 @@ class Tracker:
         self.allow_near_duplicates = allow_near_duplicates
         self.compare_method = compare_method
         self.merge_method = merge_method
+        self.views = {}
+        self.codec = RowCodec(self.cols, self.coltypes)
+
+        # Incremental save state: the first _synced items match the rows on disk, and items from
+        # _persisted on have never been written
+        self._synced = 0
+        self._persisted = 0
+        self._row_offsets = None
+        self._file_stat = None
+
+        # Totals of item rows and bytes written to tracking.csv by this tracker
+        self.rows_written = 0
+        self.bytes_written = 0
 
     def run(self):
         if self.data_file_path is not None:
@@ -110,15 +126,70 @@ class Tracker:
     def add_item(self, item):
         """ Adds a TrackerItem object to this Tracker's items list. """
         self.items.append(item)
+        for view in self.views.values():
+            view.add(item)
+
+    def remove_item(self, item):
+        """ Removes a TrackerItem object from this Tracker's items list. """
+        self.mark_dirty(item)
+        self.items.remove(item)
+        for view in self.views.values():
+            view.remove(item)
+
+    def update_item(self, item, values):
+        """ Update the given columns of a TrackerItem, keeping registered views in sync. """
+        self.mark_dirty(item)
+        for view in self.views.values():
+            view.remove(item)
+        item.data.update(values)
+        for view in self.views.values():
+            view.add(item)
+
+    def mark_dirty(self, item):
+        """ Mark an item as changed since the last save, so that save_changes() rewrites it. """
+        # Recently added items are the most likely to change, so search from the end
+        for index in range(len(self.items) - 1, -1, -1):
+            if self.items[index] is item:
+                self._synced = min(self._synced, index)
+                return
+
+    def merge_items(self, item_1, item_2, merge_method = None):
+        """ Merge item_2 into item_1 and return the merged item, keeping registered views in sync. """
+        for view in self.views.values():
+            view.remove(item_1)
+            view.remove(item_2)
+
+        merged_item = self._resolve_merge_method(merge_method)(item_1, item_2)
+
+        for view in self.views.values():
+            view.add(merged_item)
+        return merged_item
 
     def clear_items(self):
         """ Remove all TrackerItems from this Tracker's items list. Leave csv file unchanged. """
         self.items = []
-
-    def create_csv(self, first_item = []):
+        self._synced = 0
+        for view in self.views.values():
+            view.clear()
+
+    def register_view(self, view):
+        """ Register an aggregate view, populating it from the current items. """
+        self.views[view.name] = view
+        view.clear()
+        view.add_all(self.items)
+        return view
+
+    def get_view(self, name):
+        """ Get a registered aggregate view by name. """
+        return self.views[name]
+
+    def create_csv(self, first_item = None):
         """ Create tracking.csv if it doesn't already exist. """
+        if first_item is None:
+            first_item = self.codec.header()
+
         print("Creating " + self.data_file_path + "...")
-        with open(self.data_file_path, 'a') as new_csv:
+        with open(self.data_file_path, 'a', encoding="utf-8") as new_csv:
             csv_writer = csv.writer(
                 new_csv,
                 delimiter=",",
@@ -128,124 +199,366 @@ class Tracker:
 
     def update_csv(self, items):
         """ Update tracking.csv with data from csv_row parameter. """
-        with open(self.data_file_path, 'w') as data_file:
-            for item in items:
-                csv_writer = csv.writer(
-                    data_file,
-                    delimiter=",",
-                    quotechar='"',
-                    quoting=csv.QUOTE_NONNUMERIC)
-                csv_writer.writerow(item)
+        with open(self.data_file_path, 'w', encoding="utf-8") as data_file:
+            csv_writer = csv.writer(
+                data_file,
+                delimiter=",",
+                quotechar='"',
+                quoting=csv.QUOTE_NONNUMERIC)
+            csv_writer.writerow(self.codec.header())
+            csv_writer.writerows(items)
 
     def purge_csv(self):
         """ Delete all rows in this Tracker's csv data file. """
-        with open(self.data_file_path, 'w') as data_file:
+        with open(self.data_file_path, 'w', encoding="utf-8") as data_file:
             csv_writer = csv.writer(
                     data_file,
                     delimiter=",",
                     quotechar='"',
                     quoting=csv.QUOTE_NONNUMERIC)
-            csv_writer.writerow([])
+            csv_writer.writerow(self.codec.header())
+        self._synced = 0
+        self._persisted = 0
+        self._row_offsets = None
+        self._file_stat = self._stat()
 
     def save_data(self):
         """ Export all objects to tracking.csv. """
-        # Check whether tracking.csv needs to be made
+        encode = self.codec.encode
+        self.update_csv([encode(item.data) for item in self.items])
+        self._synced = len(self.items)
+        self._persisted = len(self.items)
+        self._row_offsets = None
+        self._file_stat = self._stat()
+        self.rows_written += len(self.items)
+        if self._file_stat is not None:
+            self.bytes_written += self._file_stat[1]
+
+    def save_changes(self):
+        """
+        Export only the items changed since the last save or load to tracking.csv.
+
+        Rows before the first changed item are left in place; the file is truncated there and
+        the remaining rows are rewritten, so appending to or updating the end of a large tracker
+        costs the same as for a small one. If the file was modified by something else since this
+        tracker last read or wrote it, it is reloaded first and the items added since the last
+        save are re-added. Saved rows that were edited or removed here cannot be matched to the
+        changed file, so in that case all items are saved instead, replacing the other changes.
+        """
         if not os.path.isfile(self.data_file_path):
-            initial_item = self.new_empty_item()
-            self.create_csv(initial_item.as_list())
+            self.save_data()
+            return
 
-        # Prepare entries for export
-        items_to_export = []
-        for item in self.items:
-            # Convert python list object to string list expression
-            for index, key in enumerate(self.cols):
-                if self.coltypes[index] == list:
-                    item.data[key] = "|".join(item.data[key])
+        if self._stat() != self._file_stat:
+            if self._synced < self._persisted:
+                self.save_data()
+                return
+            unsaved_items = self.items[self._persisted:]
+            self.load_data()
+            for item in unsaved_items:
+                self.add_item(item)
+
+        if self._synced == len(self.items):
+            return
+
+        if self._row_offsets is None:
+            self._row_offsets = self._scan_row_offsets()
+            if self._row_offsets is None:
+                # Files in the original format are upgraded by a full save
+                self.save_data()
+                return
+
+        if self._synced < len(self._row_offsets) - 1:
+            start = self._row_offsets[self._synced]
+        else:
+            start = self._row_offsets[-1]
+
+        # Encode each row separately to know where it starts in the file
+        buffer = io.StringIO()
+        csv_writer = csv.writer(
+            buffer,
+            delimiter=",",
+            quotechar='"',
+            quoting=csv.QUOTE_NONNUMERIC)
+
+        offsets = self._row_offsets
+        del offsets[self._synced:]
+        position = start
+        chunks = []
+        for item in self.items[self._synced:]:
+            csv_writer.writerow(self.codec.encode(item.data))
+            chunk = buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+            offsets.append(position)
+            position += len(chunk)
+            chunks.append(chunk)
+        offsets.append(position)
+
+        with open(self.data_file_path, 'r+b') as data_file:
+            data_file.seek(start)
+            data_file.truncate()
+            data_file.write(b"".join(chunks))
+
+        self.rows_written += len(self.items) - self._synced
+        self.bytes_written += position - start
+        self._synced = len(self.items)
+        self._persisted = len(self.items)
+        self._file_stat = self._stat()
+
+    def changed_on_disk(self):
+        """ Check whether tracking.csv was modified by something else since this tracker last read or wrote it. """
+        return self._file_stat is not None and self._stat() != self._file_stat
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.data_file_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _scan_row_offsets(self):
+        """ Get the byte offset of each item row in tracking.csv, followed by the file size, or None if the file has no header. """
+        offsets = []
+        with open(self.data_file_path, 'rb') as data_file:
+            rows = self._read_rows(data_file, with_offsets = True)
+            if not next(rows):
+                return None
+            for offset, _ in rows:
+                offsets.append(offset)
+            offsets.append(data_file.tell())
+        return offsets
+
+    def _read_rows(self, data_file, with_offsets = False):
+        """
+        Yield whether the file has a header, then (offset, data) for each item row.
+
+        With with_offsets, data_file must be opened in binary mode and offsets are byte
+        offsets of the start of each row; otherwise offsets are None.
+        """
+        if with_offsets:
+            line_offsets = []
+
+            def lines():
+                position = 0
+                for line in data_file:
+                    line_offsets.append(position)
+                    position += len(line)
+                    yield line.decode("utf-8")
+
+            csv_reader = csv.reader(lines(), delimiter=",")
+        else:
+            csv_reader = csv.reader(data_file, delimiter=",")
+
+        decode = None
+        row_start = 0
+        for row in csv_reader:
+            offset = None
+            if with_offsets:
+                # Quoted newlines can make one row span several lines
+                offset = line_offsets[row_start]
+                row_start = csv_reader.line_num
+
+            if row == []:
+                continue
+
+            if decode is None:
+                if self.codec.is_header(row):
+                    decode = self.codec.row_decoder(row)
+                    yield True
+                    continue
+                # Files without a header use the original "|"-joined list format
+                decode = self.codec.row_decoder()
+                yield False
+
+            data = decode(row)
+            if data is not None:
+                yield offset, data
 
-            items_to_export.append(item.format([*self.cols]))
+        if decode is None:
+            yield False
 
-        # Update csv with modified rows
-        self.update_csv(items_to_export)
+    def append_data(self, items):
+        """ Append rows for the given items to tracking.csv without rewriting the rows already there. """
+        if not os.path.isfile(self.data_file_path):
+            self.create_csv()
+
+        encode = self.codec.encode
+        previous_size = os.path.getsize(self.data_file_path)
+        with open(self.data_file_path, 'a', encoding="utf-8") as data_file:
+            csv_writer = csv.writer(
+                data_file,
+                delimiter=",",
+                quotechar='"',
+                quoting=csv.QUOTE_NONNUMERIC)
+            csv_writer.writerows([encode(item.data) for item in items])
+        self._row_offsets = None
+        self._file_stat = self._stat()
+        self.rows_written += len(items)
+        self.bytes_written += self._file_stat[1] - previous_size
 
     def load_data(self, append = False):
         """ Get data from tracking.csv. """
         # Check whether tracking.csv needs to be made
         if not os.path.isfile(self.data_file_path):
-            initial_item = self.new_empty_item()
-            self.create_csv(initial_item.as_list())
+            self.create_csv()
 
         # Extract entries from csv
         items = []
-        with open(self.data_file_path, 'r') as data_file:
-            csv_reader = csv.reader(data_file, delimiter=",")
-            for _, row in enumerate(csv_reader):
-                if row == []:
-                    continue
-
-                # Convert string list expression to python list object
-                for index, element in enumerate(row):
-                    if self.coltypes[index] == list:
-                        if "|" in str(element):
-                            row[index] = element.split("|")
-                        else:
-                            row[index] = [element]
-
-                new_item = self.new_item(row)
-                items.append(new_item)
+        with open(self.data_file_path, 'r', encoding="utf-8") as data_file:
+            rows = self._read_rows(data_file)
+            next(rows)
+            for _, data in rows:
+                items.append(TrackerItem(data))
 
         # Add old entries to current items list
         if append:
             self.items = self.items + items
+            self._synced = 0
         else:
             self.items = items
+            self._synced = len(items)
+            for view in self.views.values():
+                view.clear()
+        self._persisted = len(self.items)
+        self._row_offsets = None
+        self._file_stat = self._stat()
+
+        for view in self.views.values():
+            view.add_all(items)
 
     def remove_duplicates(self, merge_values = True, merge_method = None):
         """ Remove items that are exact duplicates, leaving one in the items array. """
-        items_to_remove = []
-        for index_1, item_1 in enumerate(self.items):
-            for index_2, item_2 in enumerate(self.items[index_1+1:]):
-                if item_1.data == item_2.data:
-                    if merge_values or merge_method is not None:
-                        if callable(merge_method):
-                            self.items[index_1] = merge_method(item_1, item_2)
-                            print("whai")
-                        else:
-                            if callable(self.merge_method):
-                                self.items[index_1] = self.merge_method(item_1, item_2)
-                            else:
-                                self.items[index_1] = self.default_merge_method(item_1, item_2)
-                    items_to_remove.append(index_2+index_1+1)
-
-        for item_index in items_to_remove:
-            self.items.pop(item_index)
-
-    def remove_near_duplicates(self, compare_method = None, threshold = 0.5, merge_values = True, merge_method = None):
-        """ Remove items that are near duplicates, leaving one in the items array. """
-        items_to_remove = []
-        for index_1, item_1 in enumerate(self.items):
-            for index_2, item_2 in enumerate(self.items[index_1+1:]):
-                similar = False
-                if callable(compare_method):
-                    similar = compare_method(item_1, item_2) > threshold
-                else:
-                    if callable(self.compare_method):
-                        similar = self.compare_method(item_1, item_2) > threshold
-                    else:
-                        similar = self.default_compare_method(item_1, item_2) > threshold
-
-                if similar:
-                    if merge_values or merge_method is not None:
-                        if callable(merge_method):
-                            self.items[index_1] = merge_method(item_1, item_2)
-                        else:
-                            if callable(self.merge_method):
-                                self.items[index_1] = self.merge_method(item_1, item_2)
-                            else:
-                                self.items[index_1] = self.default_merge_method(item_1, item_2)
-                    items_to_remove.append(index_2+index_1+1)
-
-        for item_index in items_to_remove:
-            self.items.pop(item_index)
+        def is_duplicate(item_1, item_2):
+            return item_1.data == item_2.data
+
+        self._remove_matching(is_duplicate, merge_values, merge_method)
+
+    def remove_near_duplicates(self, compare_method = None, threshold = 0.5, merge_values = True, merge_method = None, workers = None, min_parallel_items = 2000):
+        """
+        Remove items that are near duplicates, leaving one in the items array.
+
+        With workers set (0 for one per CPU), trackers of at least min_parallel_items items are
+        compared in a process pool. This needs a RowComparator compare method (the default compare
+        method is one); other compare methods always run in this process. The pool only finds which
+        items match as they were before any merges; the merges are then applied in the same order
+        as the serial loop, and an item whose compared columns change when it is merged is compared
+        again in this process, so both paths give the same result.
+        """
+        if not callable(compare_method):
+            compare_method = self.compare_method
+        if not callable(compare_method):
+            compare_method = self.default_compare_method
+
+        parallel_compare_method = compare_method
+        if compare_method == self.default_compare_method:
+            parallel_compare_method = DefaultComparator(self.item_structure)
+
+        def is_near_duplicate(item_1, item_2):
+            return compare_method(item_1, item_2) > threshold
+
+        if workers is not None and len(self.items) >= min_parallel_items and isinstance(parallel_compare_method, RowComparator):
+            comparator = parallel_compare_method
+            if comparator.exact_blocks:
+                # Matches are exactly the later rows of the same block, so no pool is needed
+                blocks = find_blocks([comparator.row(item) for item in self.items], comparator)
+                block_positions = {}
+                for block in blocks:
+                    for position, index in enumerate(block):
+                        block_positions[index] = (block, position)
+
+                def partners(index_1):
+                    if index_1 not in block_positions:
+                        return []
+                    block, position = block_positions[index_1]
+                    return block[position + 1:]
+            else:
+                columns = [[item.data[key] for item in self.items] for key in comparator.columns]
+                matches = {}
+                for index_1, index_2 in find_similar_pairs(columns, comparator, threshold, workers):
+                    matches.setdefault(index_1, []).append(index_2)
+
+                def partners(index_1):
+                    return matches.get(index_1, [])
+
+            self._remove_partners(partners, comparator.row, is_near_duplicate, merge_values, merge_method)
+            return
+
+        self._remove_matching(is_near_duplicate, merge_values, merge_method)
+
+    def _merge_into(self, index_1, index_2, merge_values, merge_method):
+        """ Fold the item at index_2 into the item at index_1, keeping registered views in sync. """
+        self._synced = min(self._synced, index_1)
+        if merge_values or merge_method is not None:
+            self.items[index_1] = self.merge_items(self.items[index_1], self.items[index_2], merge_method)
+        else:
+            for view in self.views.values():
+                view.remove(self.items[index_2])
+
+    def _remove_partners(self, partners, row, is_match, merge_values, merge_method):
+        """
+        Apply precomputed matches exactly as _remove_matching would.
+
+        partners(index_1) lists, in ascending order, the later items that matched item index_1
+        before any merges. Items after index_1 are never changed before index_1 is reached, so
+        those matches hold until a merge changes the columns that row(item) reads; from then on
+        the remaining items are compared with is_match as in the serial loop.
+        """
+        removed = set()
+        for index_1 in range(len(self.items)):
+            if index_1 in removed:
+                continue
+
+            matches = partners(index_1)
+            if len(matches) == 0:
+                continue
+
+            # Copied, since a merge method may change list values in place
+            original_row = copy.deepcopy(row(self.items[index_1]))
+            rescan_from = None
+            for index_2 in matches:
+                if index_2 in removed:
+                    continue
+                self._merge_into(index_1, index_2, merge_values, merge_method)
+                removed.add(index_2)
+                if row(self.items[index_1]) != original_row:
+                    rescan_from = index_2 + 1
+                    break
+
+            if rescan_from is not None:
+                for index_2 in range(rescan_from, len(self.items)):
+                    if index_2 not in removed and is_match(self.items[index_1], self.items[index_2]):
+                        self._merge_into(index_1, index_2, merge_values, merge_method)
+                        removed.add(index_2)
+
+        if len(removed) > 0:
+            self.items = [item for index, item in enumerate(self.items) if index not in removed]
+
+    def _remove_matching(self, is_match, merge_values, merge_method):
+        """ Fold every item matching an earlier surviving item into that item, then drop it. """
+        removed = set()
+        for index_1 in range(len(self.items)):
+            if index_1 in removed:
+                continue
+
+            for index_2 in range(index_1 + 1, len(self.items)):
+                if index_2 in removed:
+                    continue
+
+                if is_match(self.items[index_1], self.items[index_2]):
+                    self._merge_into(index_1, index_2, merge_values, merge_method)
+                    removed.add(index_2)
+
+        if len(removed) > 0:
+            self.items = [item for index, item in enumerate(self.items) if index not in removed]
+
+    def _resolve_merge_method(self, merge_method):
+        if callable(merge_method):
+            return merge_method
+        if callable(self.merge_method):
+            return self.merge_method
+        return self.default_merge_method
 
     def default_merge_method(self, item_1, item_2):
         """ Combine the values of two items into one item's data dictionary. """
@@ -264,63 +577,7 @@ class Tracker:
         return item_1
 
     def default_compare_method(self, item_1, item_2):
-        diff = 0
-        for index, key in enumerate(self.cols):
-            if self.coltypes[index] == bool:
-                diff += 2 * abs(item_1.data[key] - item_2.data[key]) # Max 2
-            
-            elif self.coltypes[index] == int or self.coltypes[index] == float:
-                num_diff = abs(item_2.data[key] - item_1.data[key])
-                diff += 16 * num_diff / math.sqrt((num_diff + 2) * (num_diff + 2) + 1) # Max 16
-                
-            elif self.coltypes[index] == str:
-                # Length diff
-                len_diff = abs(len(item_1.data[key]) - len(item_2.data[key]))
-
-                # Number of letters diff
-                num_eq = 0
-                num_diff = 0
-                num_consec = 0
-                max_consec = 0
-                for letter1 in item_1.data[key]:
-                    found = False
-                    for letter2 in item_2.data[key]:
-                        if letter1 == letter2 and not found:
-                            found = True
-
-                    if found:
-                        num_eq += 1
-                        num_consec += 1
-                        if num_consec > max_consec:
-                            max_consec = num_consec
-                    else:
-                        num_diff += 1
-                        num_consec = 0
-
-                sim_diff = max(0, num_eq + max_consec * 2 - num_diff - len_diff * 2)
-                diff += 16 * sim_diff / math.sqrt((sim_diff + 2) * (sim_diff + 2) + 1) # Max 16
-
-
-            elif self.coltypes[index] == list:
-                # No restrictions on list types, so just compare length and equality
-                len_diff = abs(len(item_1.data[key]) - len(item_2.data[key]))
-
-                num_eq = 0
-                num_diff = 0
-                for item1 in item_1.data[key]:
-                    found = False
-                    for item2 in item_2.data[key]:
-                        if item1 == item2 and not found:
-                            found = True
-
-                    if found:
-                        num_eq += 1
-                    else:
-                        num_diff += 1
-
-                sim_diff = max(0, num_eq - num_diff - len_diff * 2)
-                diff += 16 * sim_diff / math.sqrt((sim_diff + 2) * (sim_diff + 2) + 1) # Max 16
-        return diff / 50 # 0-1, 0 = min. diff, 1 = max. diff
+        return default_compare([item_1.data[key] for key in self.cols], [item_2.data[key] for key in self.cols], self.coltypes)
 
     def get_items_containing(self, column, target_values):
         """ Get a list of items containing all members of the target array """
@@ -336,7 +593,7 @@ class Tracker:
                     # TODO: Make this check use some approximation logic, e.g. to accept minceraft instead of minecraft
                     missing = False
 
-                if isinstance(item.data[column],list):
+                if isinstance(item.data[column], (list, tuple, set, frozenset)):
                     for word in item.data[column]:
                         if value in word:
                             missing = False
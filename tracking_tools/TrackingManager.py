@@ -1,4 +1,5 @@
 from .Trackers import Tracker
+from .Comparators import ColumnEquality
 from pathlib import Path
 
 class TrackingManager:
@@ -43,11 +44,6 @@ class TrackingManager:
     def run_frequency_tracker(self, title, data_source):
         data_file_name = title+"_tracking.csv"
 
-        def check_targets(item_1, item_2):
-            if item_1.data["target"] == item_2.data["target"]:
-                return 1
-            return 0
-
         def increment_freq(item_1, item_2):
             item_1.data["frequency"] += 1
             return item_1
@@ -63,7 +59,7 @@ class TrackingManager:
             data_file_path = self.data_folder_path + "/" + data_file_name,
             item_structure = item_structure,
             data_source = data_source,
-            compare_method = check_targets,
+            compare_method = ColumnEquality(["target"]),
             merge_method = increment_freq
         )
 
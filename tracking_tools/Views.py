@@ -0,0 +1,307 @@
+import heapq
+import random
+
+class AggregateView:
+    """ A materialized group-by aggregate (count, sum and mean) kept up to date by its Tracker. """
+    def __init__(self, name, value = None, group_by = None, weight = None):
+        """
+        Parameters:
+            name : str - The name the view is registered under.
+            value : str or callable - The column (or function of an item) to sum and average.
+            group_by : str or callable - The column (or function of an item) to group by. A list of keys adds the item to every listed group. None aggregates all items together.
+            weight : str or callable - The column (or function of an item) each item is counted as, e.g. "frequency". Defaults to 1.
+        """
+        self.name = name
+        self.value = value
+        self.group_by = group_by
+        self.weight = weight
+        self.groups = {}
+
+    def _get(self, spec, item, default):
+        if spec is None:
+            return default
+        if callable(spec):
+            return spec(item)
+        return item.data[spec]
+
+    def keys_for(self, item):
+        """ Get the group keys that an item contributes to. """
+        if self.group_by is None:
+            return (None,)
+
+        key = self._get(self.group_by, item, None)
+        if isinstance(key, (list, tuple, set, frozenset)):
+            return key
+        return (key,)
+
+    def add(self, item):
+        """ Add an item's contribution to the aggregate. """
+        self._apply(item, 1)
+
+    def add_all(self, items):
+        """ Add the contributions of many items. """
+        for item in items:
+            self._apply(item, 1)
+
+    def remove(self, item):
+        """ Retract an item's contribution from the aggregate. """
+        self._apply(item, -1)
+
+    def clear(self):
+        """ Reset the aggregate to its empty state. """
+        self.groups = {}
+
+    def _apply(self, item, sign):
+        weight = self._get(self.weight, item, 1) * sign
+        value = self._get(self.value, item, 0)
+        for key in self.keys_for(item):
+            stats = self.groups.get(key)
+            if stats is None:
+                stats = [0, 0]
+                self.groups[key] = stats
+
+            stats[0] += weight
+            stats[1] += weight * value
+            if stats[0] <= 0:
+                del self.groups[key]
+            self._group_changed(key, stats[0], sign)
+
+    def _group_changed(self, key, count, sign):
+        pass
+
+    def count(self, key = None):
+        """ Get the total weight of a group. """
+        if key in self.groups:
+            return self.groups[key][0]
+        return 0
+
+    def sum(self, key = None):
+        """ Get the weighted sum of a group's values. """
+        if key in self.groups:
+            return self.groups[key][1]
+        return 0
+
+    def mean(self, key = None):
+        """ Get the weighted mean of a group's values, or None if the group is empty. """
+        if key in self.groups:
+            return self.groups[key][1] / self.groups[key][0]
+        return None
+
+
+class TopKView(AggregateView):
+    """ An AggregateView that can also report its k largest groups by count. """
+    def __init__(self, name, group_by, weight = None, value = None):
+        super().__init__(name, value = value, group_by = group_by, weight = weight)
+        self._top = None
+        self._top_keys = set()
+
+    def clear(self):
+        super().clear()
+        self._top = None
+
+    def _group_changed(self, key, count, sign):
+        if self._top is None:
+            return
+
+        # Only invalidate the cached ranking when the change could reorder it
+        if key in self._top_keys:
+            self._top = None
+        elif sign > 0 and count > 0 and (len(self._top) < self._top_size or count > self._top[-1][1]):
+            self._top = None
+
+    def top(self, k = 10):
+        """ Get a list of (key, count) pairs for the k largest groups, largest first. """
+        if self._top is None or k > self._top_size:
+            self._top_size = k
+            self._top = [(key, stats[0]) for key, stats in heapq.nlargest(k, self.groups.items(), key = lambda group: group[1][0])]
+            self._top_keys = set(key for key, _ in self._top)
+        return self._top[:k]
+
+
+class _IntervalNode:
+    __slots__ = ("start", "end", "max_end", "key", "item", "priority", "left", "right")
+
+    def __init__(self, start, end, key, item):
+        self.start = start
+        self.end = end
+        self.max_end = end
+        self.key = key
+        self.item = item
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+
+    def update(self):
+        self.max_end = self.end
+        if self.left is not None and self.left.max_end > self.max_end:
+            self.max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > self.max_end:
+            self.max_end = self.right.max_end
+
+
+class IntervalView:
+    """
+    An interval tree over two columns of a Tracker, e.g. start_time and end_time, answering
+    point and range overlap queries in O(log n + k) instead of scanning every item.
+
+    The tree is a treap ordered by start, with each node holding the largest end in its
+    subtree, so subtrees that end before a query are skipped.
+    """
+    def __init__(self, name, start = "start_time", end = "end_time", period = None):
+        """
+        Parameters:
+            name : str - The name the view is registered under.
+            start : str or callable - The column (or function of an item) holding the interval's start.
+            end : str or callable - The column (or function of an item) holding the interval's end.
+            period : float - Optional length of a repeating cycle, e.g. 86400 for times of day. Intervals and queries whose end is before their start wrap around it.
+        """
+        self.name = name
+        self.start = start
+        self.end = end
+        self.period = period
+        self.clear()
+
+    def _get(self, spec, item):
+        if callable(spec):
+            return spec(item)
+        return item.data[spec]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def clear(self):
+        """ Reset the view to its empty state. """
+        self._root = None
+        self._keys = {}
+        self._counter = 0
+
+    def _segments(self, start, end):
+        if self.period is not None and end < start:
+            return [(start, self.period), (0, end)]
+        return [(start, end)]
+
+    def add(self, item):
+        """ Index an item's interval. """
+        if id(item) in self._keys:
+            return
+
+        keys = []
+        for start, end in self._segments(self._get(self.start, item), self._get(self.end, item)):
+            # The counter breaks ties between intervals with the same start
+            self._counter += 1
+            key = (start, self._counter)
+            self._root = self._insert(self._root, _IntervalNode(start, end, key, item))
+            keys.append(key)
+        self._keys[id(item)] = keys
+
+    def add_all(self, items):
+        """ Index many items' intervals, building the tree in one pass when the view is empty. """
+        if self._root is not None:
+            for item in items:
+                self.add(item)
+            return
+
+        nodes = []
+        for item in items:
+            if id(item) in self._keys:
+                continue
+            keys = []
+            for start, end in self._segments(self._get(self.start, item), self._get(self.end, item)):
+                self._counter += 1
+                key = (start, self._counter)
+                nodes.append(_IntervalNode(start, end, key, item))
+                keys.append(key)
+            self._keys[id(item)] = keys
+        nodes.sort(key = lambda node: node.key)
+
+        # Build the treap as a Cartesian tree of the sorted nodes, using a stack of its right spine
+        spine = []
+        for node in nodes:
+            last = None
+            while spine and spine[-1].priority < node.priority:
+                last = spine.pop()
+                last.update()
+            node.left = last
+            if spine:
+                spine[-1].right = node
+            spine.append(node)
+        while spine:
+            spine.pop().update()
+        if nodes:
+            self._root = max(nodes, key = lambda node: node.priority)
+
+    def remove(self, item):
+        """ Remove an item's interval from the index. """
+        for key in self._keys.pop(id(item), ()):
+            self._root = self._delete(self._root, key)
+
+    def _insert(self, node, new_node):
+        if node is None:
+            return new_node
+        if new_node.key < node.key:
+            node.left = self._insert(node.left, new_node)
+            if node.left.priority > node.priority:
+                node = self._rotate_right(node)
+        else:
+            node.right = self._insert(node.right, new_node)
+            if node.right.priority > node.priority:
+                node = self._rotate_left(node)
+        node.update()
+        return node
+
+    def _delete(self, node, key):
+        if node is None:
+            return None
+        if key < node.key:
+            node.left = self._delete(node.left, key)
+        elif key > node.key:
+            node.right = self._delete(node.right, key)
+        elif node.left is None:
+            return node.right
+        elif node.right is None:
+            return node.left
+        elif node.left.priority > node.right.priority:
+            node = self._rotate_right(node)
+            node.right = self._delete(node.right, key)
+        else:
+            node = self._rotate_left(node)
+            node.left = self._delete(node.left, key)
+        node.update()
+        return node
+
+    def _rotate_right(self, node):
+        left = node.left
+        node.left = left.right
+        node.update()
+        left.right = node
+        left.update()
+        return left
+
+    def _rotate_left(self, node):
+        right = node.right
+        node.right = right.left
+        node.update()
+        right.left = node
+        right.update()
+        return right
+
+    def at(self, point):
+        """ Get the items whose intervals contain a point, ordered by start. """
+        return self.overlapping(point, point)
+
+    def overlapping(self, start, end):
+        """ Get the items whose intervals overlap [start, end], ordered by start. """
+        found = {}
+        for query_start, query_end in self._segments(start, end):
+            self._collect(self._root, query_start, query_end, found)
+        return list(found.values())
+
+    def _collect(self, node, start, end, found):
+        while node is not None and node.max_end >= start:
+            self._collect(node.left, start, end, found)
+            if node.start > end:
+                # Everything to the right starts even later
+                return
+            if node.end >= start:
+                found.setdefault(id(node.item), node.item)
+            node = node.right